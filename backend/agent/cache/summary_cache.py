@@ -0,0 +1,64 @@
+import os
+import time
+import hashlib
+import logging
+import boto3
+from opentelemetry import metrics
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Shared with the channel poller, which only reads these items; the agent is the only writer
+SUMMARY_CACHE_TABLE = os.environ.get("SUMMARY_CACHE_TABLE")
+SUMMARY_CACHE_TTL_SECONDS = int(os.environ.get("SUMMARY_CACHE_TTL_SECONDS", str(7 * 86400)))
+
+_table = boto3.resource("dynamodb").Table(SUMMARY_CACHE_TABLE) if SUMMARY_CACHE_TABLE else None
+
+_meter = metrics.get_meter(__name__)
+_cache_hits = _meter.create_counter("summary_cache.hits", description="Summaries served from the summary cache")
+_cache_misses = _meter.create_counter("summary_cache.misses", description="Summaries that had to be generated")
+
+def summary_cache_key(video_id: str, prompt: str, model_id: str) -> dict:
+    """
+    Key of the cached summary for (video, prompt, model).
+    PK = SUMMARY#<videoId>, SK = PROMPT#<sha256(prompt)>#MODEL#<modelId>
+    """
+    prompt_hash = hashlib.sha256((prompt or "").encode("utf-8")).hexdigest()
+    return {"userId": f"SUMMARY#{video_id}", "targetId": f"PROMPT#{prompt_hash}#MODEL#{model_id}"}
+
+def get_cached_summary(video_id: str, prompt: str, model_id: str) -> str | None:
+    """
+    Returns the cached summary, or None when missing, expired or caching is disabled.
+    Cache errors are logged and treated as a miss.
+    """
+    if _table is None:
+        return None
+
+    try:
+        item = _table.get_item(Key=summary_cache_key(video_id, prompt, model_id)).get("Item")
+    except Exception as e:
+        logger.warning(f"⚠️ Summary cache read failed: {str(e)}")
+        return None
+
+    # TTL deletion can lag behind expiresAt
+    if item and int(item.get("expiresAt", 0)) > time.time():
+        _cache_hits.add(1, {"model_id": model_id})
+        return item.get("summary")
+
+    _cache_misses.add(1, {"model_id": model_id})
+    return None
+
+def put_cached_summary(video_id: str, prompt: str, model_id: str, summary: str) -> None:
+    if _table is None:
+        return
+
+    try:
+        _table.put_item(Item={
+            **summary_cache_key(video_id, prompt, model_id),
+            "videoId": video_id,
+            "modelId": model_id,
+            "summary": summary,
+            "expiresAt": int(time.time()) + SUMMARY_CACHE_TTL_SECONDS
+        })
+    except Exception as e:
+        logger.warning(f"⚠️ Summary cache write failed: {str(e)}")
@@ -0,0 +1,109 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+import boto3
+from tools.transcript import TranscriptSegments
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# In-process tier: number of transcripts kept per container
+TRANSCRIPT_CACHE_SIZE = int(os.environ.get("TRANSCRIPT_CACHE_SIZE", "64"))
+
+# Optional persistent tier, shared by every container
+TRANSCRIPT_CACHE_TABLE = os.environ.get("TRANSCRIPT_CACHE_TABLE")
+TRANSCRIPT_CACHE_TTL_SECONDS = int(os.environ.get("TRANSCRIPT_CACHE_TTL_SECONDS", str(30 * 86400)))
+
+# Stay well below DynamoDB's 400KB item limit
+MAX_PERSISTED_BYTES = 350 * 1024
+
+class LRUCache:
+    """Thread-safe LRU map bounded to max_entries"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._items:
+                return None
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+class TranscriptCache:
+    """
+    Two tier transcript cache keyed by (video ID, language).
+    TranscriptSegments are kept in a bounded in-process LRU and, when a table is configured,
+    persisted zlib-compressed as TRANSCRIPT#<videoId> / LANG#<language> items with an expiresAt TTL.
+    """
+
+    def __init__(self, max_entries: int, table=None, ttl_seconds: int = TRANSCRIPT_CACHE_TTL_SECONDS):
+        self._memory = LRUCache(max_entries)
+        self._table = table
+        self._ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def _key(video_id: str, language: str) -> dict:
+        return {"userId": f"TRANSCRIPT#{video_id}", "targetId": f"LANG#{language}"}
+
+    def get(self, video_id: str, language: str) -> TranscriptSegments | None:
+        transcript = self._memory.get((video_id, language))
+        if transcript is not None:
+            logger.info(f"Transcript cache hit (memory) for video: {video_id}")
+            return transcript
+
+        if self._table is None:
+            return None
+
+        try:
+            item = self._table.get_item(Key=self._key(video_id, language)).get("Item")
+        except Exception as e:
+            logger.warning(f"⚠️ Transcript cache read failed: {str(e)}")
+            return None
+
+        # TTL deletion can lag behind expiresAt; items written before segments were cached are ignored
+        if not item or "segments" not in item or int(item.get("expiresAt", 0)) <= time.time():
+            return None
+
+        transcript = TranscriptSegments.from_bytes(item["segments"].value)
+        self._memory.put((video_id, language), transcript)
+
+        logger.info(f"Transcript cache hit (table) for video: {video_id}")
+
+        return transcript
+
+    def put(self, video_id: str, language: str, transcript: TranscriptSegments) -> None:
+        self._memory.put((video_id, language), transcript)
+
+        if self._table is None:
+            return
+
+        compressed = transcript.to_bytes()
+        if len(compressed) > MAX_PERSISTED_BYTES:
+            logger.info(f"Transcript for video {video_id} too large to persist ({len(compressed)} bytes)")
+            return
+
+        try:
+            self._table.put_item(Item={
+                **self._key(video_id, language),
+                "segments": compressed,
+                "expiresAt": int(time.time()) + self._ttl_seconds
+            })
+        except Exception as e:
+            logger.warning(f"⚠️ Transcript cache write failed: {str(e)}")
+
+transcript_cache = TranscriptCache(
+    TRANSCRIPT_CACHE_SIZE,
+    table=boto3.resource("dynamodb").Table(TRANSCRIPT_CACHE_TABLE) if TRANSCRIPT_CACHE_TABLE else None
+)
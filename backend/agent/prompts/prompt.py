@@ -7,4 +7,18 @@ When a user provides a YouTube video URL:
 2. If the transcript is successfully retrieved, summarize the key points.
 3. Your summary should be concise, structured (bullet points are good), and capture the main ideas.
 4. If you cannot get the transcript, apologize and explain why (e.g., no subtitles available).
-"""
\ No newline at end of file
+"""
+
+CHUNK_SUMMARY_PROMPT = """
+You summarize one part of a longer YouTube video transcript.
+Capture the key points, claims and examples from this part only, as concise bullet points.
+Each transcript line starts with its [m:ss] timestamp; prefix each bullet with the timestamp where the point is made.
+Do not add an introduction or conclusion; your notes will be merged with notes from the other parts.
+"""
+
+REDUCE_SUMMARY_PROMPT = """
+You are a YouTube Video Summarizer Agent.
+You are given notes taken from consecutive parts of one video's transcript, in order.
+Merge them into a single summary of the whole video: remove repetition, keep the key points,
+and keep it concise and structured (bullet points are good).
+"""
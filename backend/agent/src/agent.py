@@ -3,6 +3,10 @@ import sys
 import json
 import logging
 import re
+import asyncio
+import functools
+import threading
+from contextlib import contextmanager
 from dotenv import load_dotenv
 
 # Add parent directory to path to allow importing from tools and prompts
@@ -11,14 +15,84 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from strands import Agent
 from strands.models import BedrockModel
 from bedrock_agentcore.runtime import BedrockAgentCoreApp
-from tools.youtube import get_video_transcript
+from tools.youtube import get_video_transcript, extract_video_id, fetch_transcript
 from prompts.prompt import SYSTEM_PROMPT
+from summarize.map_reduce import should_chunk, split_transcript, map_reduce_summary
+from cache.summary_cache import get_cached_summary, put_cached_summary
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+MODEL_ID = os.environ.get("MODEL_ID", "us.amazon.nova-2-lite-v1:0")
+
+# Idle agents kept warm between requests
+AGENT_POOL_SIZE = int(os.environ.get("AGENT_POOL_SIZE", "8"))
+
+@functools.lru_cache(maxsize=1)
+def get_model() -> BedrockModel:
+    """Process-wide Bedrock model, built on first use so its client and connections are reused"""
+    return BedrockModel(
+        model_id=MODEL_ID
+    )
+
+def build_agent() -> Agent:
+    return Agent(
+        name="youtube_summarizer",
+        model=get_model(),
+        system_prompt=SYSTEM_PROMPT,
+        tools=[get_video_transcript]
+    )
+
+class AgentPool:
+    """
+    Keeps built agents (and their tool registries) warm between requests.
+    An agent is checked out for the exclusive use of one request and starts with an empty
+    conversation, so no conversation state is shared. Agents are discarded if a request fails.
+    """
+
+    def __init__(self, factory, max_idle: int):
+        self._factory = factory
+        self._max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def acquire(self):
+        with self._lock:
+            agent = self._idle.pop() if self._idle else None
+
+        if agent is None:
+            agent = self._factory()
+
+        agent.messages = []
+
+        # An exception raised in the caller's block propagates out of the yield, so failed agents are never returned
+        yield agent
+
+        with self._lock:
+            if len(self._idle) < self._max_idle:
+                self._idle.append(agent)
+
+agent_pool = AgentPool(build_agent, AGENT_POOL_SIZE)
+
+class TranscriptUnavailable(Exception):
+    """The transcript could not be fetched, so there is nothing to summarize"""
+
+def _tool_statuses(messages) -> list:
+    return [
+        block["toolResult"].get("status")
+        for message in messages
+        for block in message.get("content", [])
+        if "toolResult" in block
+    ]
+
+def _transcript_retrieved(messages) -> bool:
+    """True if the agent fetched the transcript and no tool call failed, i.e. the summary is safe to cache"""
+    statuses = _tool_statuses(messages)
+    return bool(statuses) and "error" not in statuses
+
 # Monkey patch BedrockAgentCoreApp to avoid "data: " prefix and quotes for strings
 def _raw_convert_to_sse(self, obj) -> bytes:
     if isinstance(obj, str):
@@ -28,7 +102,8 @@ def _raw_convert_to_sse(self, obj) -> bytes:
     # Fallback for other types
     try:    
         json_string = json.dumps(obj, ensure_ascii=False)
-        sse_data = f"data: {json_string}\n\n"
+        # Frames start on a line of their own, so the poller never mistakes "data: " in the text for one
+        sse_data = f"\ndata: {json_string}\n\n"
         return sse_data.encode("utf-8")
     except:
         return str(obj).encode("utf-8")
@@ -48,24 +123,55 @@ async def invoke(payload):
         yield "🛑 Error: Missing video_url parameter"
 
     try:
-        agent = Agent(
-            name="youtube_summarizer",
-            model=BedrockModel(
-                model_id='us.amazon.nova-2-lite-v1:0'
-            ),
-            system_prompt=SYSTEM_PROMPT,
-            tools=[get_video_transcript]
-        )    
-        
+        video_id = extract_video_id(video_url)
+
+        cached_summary = get_cached_summary(video_id, additional_instructions, MODEL_ID)
+        if cached_summary:
+            logger.info(f"✅ Summary cache hit for video {video_id}")
+            yield cached_summary
+            return
+
+        # The transcript is fetched up front (and cached for the agent's tool call) so a missing transcript
+        # is reported before any tokens are generated
+        try:
+            transcript = await asyncio.to_thread(fetch_transcript, video_id)
+        except Exception as e:
+            raise TranscriptUnavailable(str(e))
+
+        # Long transcripts are summarized in chunks; short ones go through the agent's tool call as usual
+        if should_chunk(transcript):
+            chunks = []
+            async for data in map_reduce_summary(get_model(), split_transcript(transcript), additional_instructions):
+                chunks.append(data)
+                yield data
+
+            put_cached_summary(video_id, additional_instructions, MODEL_ID, "".join(chunks))
+
+            logger.info("✅ Chunked summary completed")
+            return
+
         user_prompt = f"Summarize this YouTube video: {video_url}"
         if additional_instructions:
             user_prompt += f"\n\nAdditional User Instructions:\n{additional_instructions}"
 
-        async for event in agent.stream_async(user_prompt):
-            if "data" in event:
-                yield event["data"]
+        with agent_pool.acquire() as agent:
+            chunks = []
+            async for event in agent.stream_async(user_prompt):
+                if "data" in event:
+                    chunks.append(event["data"])
+                    yield event["data"]
+
+                # Stop before the model writes an apology for a failed tool call (the agent is discarded, not pooled)
+                if "message" in event and "error" in _tool_statuses([event["message"]]):
+                    raise TranscriptUnavailable("Transcript tool call failed")
+
+            if _transcript_retrieved(agent.messages):
+                put_cached_summary(video_id, additional_instructions, MODEL_ID, "".join(chunks))
 
         logger.info("✅ Agent completed")
+    except TranscriptUnavailable as e:
+        logger.warning(f"⚠️ Transcript unavailable for {video_url}: {str(e)}")
+        yield {"type": "transcript_unavailable", "error": str(e)}
     except Exception as e:
         error_response = {"error": str(e), "type": "stream_error"}
         logger.error(f"🛑 Streaming error: {error_response}", exc_info=True)
@@ -0,0 +1,83 @@
+import os
+import re
+import asyncio
+import logging
+from bisect import bisect_right
+from typing import AsyncIterator
+from strands import Agent
+from prompts.prompt import CHUNK_SUMMARY_PROMPT, REDUCE_SUMMARY_PROMPT
+from tools.transcript import TranscriptSegments, TranscriptWindow, format_timestamp
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Transcripts longer than this are summarized chunk by chunk (0 disables chunked summarization)
+SUMMARY_CHUNK_THRESHOLD_CHARS = int(os.environ.get("SUMMARY_CHUNK_THRESHOLD_CHARS", "80000"))
+SUMMARY_CHUNK_CHARS = int(os.environ.get("SUMMARY_CHUNK_CHARS", "20000"))
+SUMMARY_CHUNK_PARALLELISM = int(os.environ.get("SUMMARY_CHUNK_PARALLELISM", "4"))
+
+SENTENCE_END = re.compile(r"[.!?][\"')\]]*$")
+
+def should_chunk(transcript: TranscriptSegments) -> bool:
+    return SUMMARY_CHUNK_THRESHOLD_CHARS > 0 and len(transcript.text) > SUMMARY_CHUNK_THRESHOLD_CHARS
+
+def split_transcript(transcript: TranscriptSegments, max_chars: int = SUMMARY_CHUNK_CHARS) -> list[TranscriptWindow]:
+    """
+    Splits a transcript into windows of whole segments of at most max_chars each (a single longer
+    segment gets a window of its own). Each window ends at the last segment in its second half that
+    closes a sentence, falling back to the last segment that fits, since auto-generated captions are
+    often unpunctuated.
+    """
+    offsets = transcript.offsets
+    windows = []
+    lo = 0
+
+    while lo < len(transcript):
+        # Furthest hi with offsets[hi] - offsets[lo] - 1 <= max_chars
+        hi = max(bisect_right(offsets, offsets[lo] + max_chars + 1, lo) - 1, lo + 1)
+
+        if hi < len(transcript):
+            half = offsets[lo] + max_chars // 2
+            for end in range(hi, lo, -1):
+                if offsets[end] < half:
+                    break
+                if SENTENCE_END.search(transcript.segment(end - 1)[2]):
+                    hi = end
+                    break
+
+        windows.append(TranscriptWindow(transcript, lo, hi))
+        lo = hi
+
+    return windows
+
+async def map_reduce_summary(model, chunks: list[TranscriptWindow], additional_instructions: str = "") -> AsyncIterator[str]:
+    """
+    Summarizes chunks concurrently (at most SUMMARY_CHUNK_PARALLELISM at a time), then streams
+    a final pass that merges the chunk notes into one summary.
+    """
+    semaphore = asyncio.Semaphore(SUMMARY_CHUNK_PARALLELISM)
+
+    async def summarize_chunk(index: int, chunk: TranscriptWindow) -> str:
+        async with semaphore:
+            agent = Agent(model=model, system_prompt=CHUNK_SUMMARY_PROMPT, callback_handler=None)
+            result = await agent.invoke_async(
+                f"Transcript part {index + 1} of {len(chunks)} "
+                f"({format_timestamp(chunk.start)} - {format_timestamp(chunk.end)}):\n\n{chunk.to_timestamped()}"
+            )
+            return str(result)
+
+    logger.info(f"Summarizing {len(chunks)} transcript chunks")
+
+    notes = await asyncio.gather(*(summarize_chunk(i, chunk) for i, chunk in enumerate(chunks)))
+
+    reduce_prompt = "\n\n".join(
+        f"Notes for part {i + 1} ({format_timestamp(chunk.start)} - {format_timestamp(chunk.end)}):\n{note}"
+        for i, (chunk, note) in enumerate(zip(chunks, notes))
+    )
+    if additional_instructions:
+        reduce_prompt += f"\n\nAdditional User Instructions:\n{additional_instructions}"
+
+    agent = Agent(model=model, system_prompt=REDUCE_SUMMARY_PROMPT, callback_handler=None)
+    async for event in agent.stream_async(reduce_prompt):
+        if "data" in event:
+            yield event["data"]
@@ -0,0 +1,264 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+import time
+import asyncio
+from types import SimpleNamespace
+
+# Add directory to path to import the agent's packages
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Mock strands and boto3 before importing the summarizer and caches since they might not be installed locally
+sys.modules['strands'] = MagicMock()
+sys.modules['boto3'] = MagicMock()
+
+from tools.transcript import TranscriptSegments
+from cache import transcript_cache
+from cache.transcript_cache import TranscriptCache
+from summarize import map_reduce
+from summarize.map_reduce import split_transcript, map_reduce_summary
+
+def make_transcript(texts, seconds_per_snippet=5.0):
+    snippets = [SimpleNamespace(text=text, start=i * seconds_per_snippet, duration=seconds_per_snippet) for i, text in enumerate(texts)]
+    return TranscriptSegments.from_snippets(snippets)
+
+class FakeTable:
+    """Dict-backed stand-in for a DynamoDB Table; binary attributes come back wrapped like boto3's Binary"""
+
+    def __init__(self):
+        self.items = {}
+        self.get_calls = 0
+
+    def get_item(self, Key):
+        self.get_calls += 1
+        item = self.items.get((Key["userId"], Key["targetId"]))
+        return {"Item": item} if item else {}
+
+    def put_item(self, Item):
+        item = {name: SimpleNamespace(value=value) if isinstance(value, bytes) else value for name, value in Item.items()}
+        self.items[(Item["userId"], Item["targetId"])] = item
+
+class FakeAgent:
+    """Stands in for strands.Agent: records prompts and how many chunk summaries run at once"""
+
+    running = 0
+    max_running = 0
+    prompts = []
+
+    def __init__(self, model=None, system_prompt=None, callback_handler=None):
+        self.model = model
+
+    @classmethod
+    def reset(cls):
+        cls.running = 0
+        cls.max_running = 0
+        cls.prompts = []
+
+    async def invoke_async(self, prompt):
+        FakeAgent.running += 1
+        FakeAgent.max_running = max(FakeAgent.max_running, FakeAgent.running)
+        FakeAgent.prompts.append(prompt)
+        # Let the other chunks start before this one finishes
+        await asyncio.sleep(0.01)
+        FakeAgent.running -= 1
+        part = prompt.split(" of ")[0].rsplit(" ", 1)[1]
+        return f"notes {part}"
+
+    async def stream_async(self, prompt):
+        FakeAgent.prompts.append(prompt)
+        for data in ("Final ", "summary"):
+            yield {"data": data}
+        yield {"complete": True}
+
+class TestSplitTranscript(unittest.TestCase):
+
+    def assert_contiguous(self, transcript, windows):
+        """Windows cover every segment, in order, without gaps or overlaps"""
+        self.assertEqual(windows[0].lo, 0)
+        self.assertEqual(windows[-1].hi, len(transcript))
+        for previous, current in zip(windows, windows[1:]):
+            self.assertEqual(previous.hi, current.lo)
+        self.assertTrue(all(len(window) > 0 for window in windows))
+
+    def test_windows_cover_transcript_within_budget(self):
+        transcript = make_transcript([f"word{i} and some more words" for i in range(200)])
+
+        windows = split_transcript(transcript, max_chars=300)
+
+        self.assert_contiguous(transcript, windows)
+        self.assertGreater(len(windows), 1)
+        self.assertTrue(all(window.char_count <= 300 for window in windows))
+        self.assertEqual(" ".join(window.text for window in windows), transcript.text)
+
+    def test_split_prefers_sentence_end(self):
+        # Unpunctuated filler with one sentence end in the second half of the first window's budget
+        texts = ["filler words here"] * 30
+        texts[12] = "and that is the end."
+        transcript = make_transcript(texts)
+
+        windows = split_transcript(transcript, max_chars=300)
+
+        self.assert_contiguous(transcript, windows)
+        self.assertEqual(windows[0].hi, 13)
+        self.assertTrue(windows[0].text.endswith("the end."))
+
+    def test_unpunctuated_falls_back_to_last_segment_that_fits(self):
+        transcript = make_transcript(["no punctuation here"] * 50)
+
+        windows = split_transcript(transcript, max_chars=100)
+
+        self.assert_contiguous(transcript, windows)
+        # 19 characters plus a separating space per segment: five fit in 100
+        self.assertTrue(all(len(window) == 5 for window in windows))
+
+    def test_oversized_segment_gets_its_own_window(self):
+        transcript = make_transcript(["short one.", "x" * 500, "short two."])
+
+        windows = split_transcript(transcript, max_chars=100)
+
+        self.assert_contiguous(transcript, windows)
+        oversized = [window for window in windows if window.char_count > 100]
+        self.assertEqual(len(oversized), 1)
+        self.assertEqual(len(oversized[0]), 1)
+        self.assertEqual(oversized[0].text, "x" * 500)
+
+    def test_empty_transcript_has_no_windows(self):
+        self.assertEqual(split_transcript(make_transcript([]), max_chars=100), [])
+
+class TestMapReduceSummary(unittest.TestCase):
+
+    def setUp(self):
+        FakeAgent.reset()
+
+    def test_chunks_summarized_concurrently_and_reduced_in_order(self):
+        transcript = make_transcript([f"sentence number {i}." for i in range(40)])
+        chunks = split_transcript(transcript, max_chars=100)
+        self.assertGreater(len(chunks), 4)
+
+        async def run():
+            return [data async for data in map_reduce_summary(MagicMock(), chunks, "Use bullet points")]
+
+        with patch.object(map_reduce, 'Agent', FakeAgent), patch.object(map_reduce, 'SUMMARY_CHUNK_PARALLELISM', 2):
+            output = asyncio.run(run())
+
+        self.assertEqual("".join(output), "Final summary")
+        self.assertEqual(FakeAgent.max_running, 2)
+
+        # Every chunk was summarized, and the reduce prompt lists the notes in chunk order
+        reduce_prompt = FakeAgent.prompts[-1]
+        self.assertEqual(len(FakeAgent.prompts), len(chunks) + 1)
+        positions = [reduce_prompt.index(f"Notes for part {i + 1} ") for i in range(len(chunks))]
+        self.assertEqual(positions, sorted(positions))
+        for i in range(len(chunks)):
+            self.assertIn(f"notes {i + 1}\n", reduce_prompt + "\n")
+        self.assertTrue(reduce_prompt.endswith("Additional User Instructions:\nUse bullet points"))
+
+class TestTranscriptSegments(unittest.TestCase):
+
+    def setUp(self):
+        self.texts = ["Hello there", "line one\nline two", "café ☕", "last."]
+        self.transcript = make_transcript(self.texts)
+
+    def test_text_is_space_joined_snippets(self):
+        self.assertEqual(self.transcript.text, "Hello there line one line two café ☕ last.")
+        self.assertEqual(len(self.transcript), 4)
+        self.assertEqual(self.transcript.segment(1), (5.0, 5.0, "line one line two"))
+        self.assertEqual([self.transcript.segment(i)[2] for i in range(4)], [text.replace("\n", " ") for text in self.texts])
+        self.assertEqual(self.transcript.end, 20.0)
+
+    def test_window_slice_boundaries(self):
+        # Segments starting in [5, 15): the second and third
+        window = self.transcript.window(5, 15)
+        self.assertEqual((window.lo, window.hi), (1, 3))
+        self.assertEqual(window.text, "line one line two café ☕")
+        self.assertEqual(window.char_count, len(window.text))
+        self.assertEqual((window.start, window.end), (5.0, 15.0))
+        self.assertEqual(window.to_timestamped(), "[0:05] line one line two\n[0:10] café ☕")
+
+        # A start between segments rounds up to the next one
+        self.assertEqual(self.transcript.window(6, 15).lo, 2)
+        self.assertEqual(self.transcript.all().text, self.transcript.text)
+        self.assertEqual(self.transcript.all().char_count, len(self.transcript.text))
+
+    def test_windows_cover_transcript(self):
+        windows = self.transcript.windows(10)
+        self.assertEqual([(window.lo, window.hi) for window in windows], [(0, 2), (2, 4)])
+
+        # A gap in the captions produces no empty windows
+        snippets = [SimpleNamespace(text=text, start=start, duration=1.0) for text, start in [("a", 0.0), ("b", 1.0), ("c", 100.0)]]
+        windows = TranscriptSegments.from_snippets(snippets).windows(10)
+        self.assertEqual([window.text for window in windows], ["a b", "c"])
+
+    def test_empty_transcript(self):
+        transcript = make_transcript([])
+        self.assertEqual(len(transcript), 0)
+        self.assertEqual(transcript.text, "")
+        self.assertEqual(transcript.end, 0.0)
+        self.assertEqual(transcript.windows(10), [])
+
+        window = transcript.all()
+        self.assertEqual((window.text, window.char_count, window.start, window.end), ("", 0, 0.0, 0.0))
+        self.assertEqual(transcript.window(0, 10).text, "")
+
+    def test_bytes_round_trip(self):
+        for transcript in (self.transcript, make_transcript([])):
+            restored = TranscriptSegments.from_bytes(transcript.to_bytes())
+            self.assertEqual(restored.text, transcript.text)
+            self.assertEqual(restored.starts.tolist(), transcript.starts.tolist())
+            self.assertEqual(restored.durations.tolist(), transcript.durations.tolist())
+            self.assertEqual(restored.offsets.tolist(), transcript.offsets.tolist())
+
+class TestTranscriptCache(unittest.TestCase):
+
+    def setUp(self):
+        self.transcript = make_transcript(["Hello there", "general remarks."])
+
+    def test_memory_tier(self):
+        cache = TranscriptCache(max_entries=1)
+        cache.put("VIDEO1", "en", self.transcript)
+        self.assertIs(cache.get("VIDEO1", "en"), self.transcript)
+        self.assertIsNone(cache.get("VIDEO1", "de"))
+
+        # Bounded: the least recently used transcript is evicted
+        cache.put("VIDEO2", "en", self.transcript)
+        self.assertIsNone(cache.get("VIDEO1", "en"))
+
+    def test_table_tier(self):
+        table = FakeTable()
+        TranscriptCache(max_entries=4, table=table).put("VIDEO1", "en", self.transcript)
+        item = table.items[("TRANSCRIPT#VIDEO1", "LANG#en")]
+        self.assertGreater(item["expiresAt"], time.time())
+
+        # Another container reads it from the table once, then from memory
+        cache = TranscriptCache(max_entries=4, table=table)
+        restored = cache.get("VIDEO1", "en")
+        self.assertEqual(restored.text, self.transcript.text)
+        self.assertEqual(restored.offsets.tolist(), self.transcript.offsets.tolist())
+        self.assertIs(cache.get("VIDEO1", "en"), restored)
+        self.assertEqual(table.get_calls, 1)
+
+    def test_expired_items_are_misses(self):
+        table = FakeTable()
+        TranscriptCache(max_entries=4, table=table, ttl_seconds=-1).put("VIDEO1", "en", self.transcript)
+
+        self.assertIsNone(TranscriptCache(max_entries=4, table=table).get("VIDEO1", "en"))
+
+    def test_oversized_transcripts_are_not_persisted(self):
+        table = FakeTable()
+        cache = TranscriptCache(max_entries=4, table=table)
+
+        with patch.object(transcript_cache, 'MAX_PERSISTED_BYTES', 10):
+            cache.put("VIDEO1", "en", self.transcript)
+
+        self.assertEqual(table.items, {})
+        self.assertIs(cache.get("VIDEO1", "en"), self.transcript)
+
+    def test_table_errors_are_misses(self):
+        table = MagicMock()
+        table.get_item.side_effect = Exception("Throttled")
+
+        self.assertIsNone(TranscriptCache(max_entries=4, table=table).get("VIDEO1", "en"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+import json
+import zlib
+from array import array
+from bisect import bisect_left
+
+def format_timestamp(seconds: float) -> str:
+    """Formats an offset as m:ss, or h:mm:ss for videos over an hour"""
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes}:{secs:02d}"
+
+class TranscriptSegments:
+    """
+    Timestamped transcript held as parallel arrays instead of one object per snippet.
+    All snippet text lives in a single string (snippets separated by one space, so it doubles as the
+    plain-text transcript); segment i spans text[offsets[i]:offsets[i + 1] - 1] and starts at
+    starts[i] seconds for durations[i] seconds.
+    """
+
+    __slots__ = ("text", "starts", "durations", "offsets")
+
+    def __init__(self, text: str, starts: array, durations: array, offsets: array):
+        self.text = text
+        self.starts = starts
+        self.durations = durations
+        self.offsets = offsets
+
+    @classmethod
+    def from_snippets(cls, snippets) -> "TranscriptSegments":
+        """Builds segments from youtube_transcript_api snippets (anything with text, start and duration)"""
+        starts = array("d")
+        durations = array("d")
+        offsets = array("L")
+        parts = []
+        position = 0
+
+        for snippet in snippets:
+            text = snippet.text.replace("\n", " ")
+            starts.append(snippet.start)
+            durations.append(snippet.duration)
+            offsets.append(position)
+            parts.append(text)
+            position += len(text) + 1
+
+        # Sentinel, so the end of the last segment is found the same way as every other
+        offsets.append(position)
+
+        return cls(" ".join(parts), starts, durations, offsets)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def end(self) -> float:
+        return self.starts[-1] + self.durations[-1] if self.starts else 0.0
+
+    def segment(self, index: int) -> tuple[float, float, str]:
+        return self.starts[index], self.durations[index], self.text[self.offsets[index]:self.offsets[index + 1] - 1]
+
+    def window(self, start_seconds: float, end_seconds: float) -> "TranscriptWindow":
+        """Segments starting in [start_seconds, end_seconds), as a view that shares this transcript's arrays"""
+        return TranscriptWindow(self, bisect_left(self.starts, start_seconds), bisect_left(self.starts, end_seconds))
+
+    def windows(self, seconds: float) -> list["TranscriptWindow"]:
+        """Consecutive windows of about `seconds` each covering the whole transcript; gaps produce no empty windows"""
+        windows = []
+        lo = 0
+        while lo < len(self):
+            hi = max(bisect_left(self.starts, self.starts[lo] + seconds, lo), lo + 1)
+            windows.append(TranscriptWindow(self, lo, hi))
+            lo = hi
+        return windows
+
+    def all(self) -> "TranscriptWindow":
+        return TranscriptWindow(self, 0, len(self))
+
+    def to_bytes(self) -> bytes:
+        """zlib-compressed serialized form, used by the persistent transcript cache"""
+        lengths = [self.offsets[i + 1] - self.offsets[i] - 1 for i in range(len(self))]
+        return zlib.compress(json.dumps({
+            "text": self.text,
+            "starts": self.starts.tolist(),
+            "durations": self.durations.tolist(),
+            "lengths": lengths
+        }).encode("utf-8"))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "TranscriptSegments":
+        payload = json.loads(zlib.decompress(data).decode("utf-8"))
+
+        offsets = array("L", [0])
+        for length in payload["lengths"]:
+            offsets.append(offsets[-1] + length + 1)
+
+        return cls(payload["text"], array("d", payload["starts"]), array("d", payload["durations"]), offsets)
+
+class TranscriptWindow:
+    """
+    View of the contiguous segments [lo, hi) of a transcript.
+    Holds only two indices into the parent's arrays; text is sliced out when asked for.
+    """
+
+    __slots__ = ("segments", "lo", "hi")
+
+    def __init__(self, segments: TranscriptSegments, lo: int, hi: int):
+        self.segments = segments
+        self.lo = lo
+        self.hi = hi
+
+    def __len__(self) -> int:
+        return self.hi - self.lo
+
+    @property
+    def start(self) -> float:
+        return self.segments.starts[self.lo] if self.hi > self.lo else 0.0
+
+    @property
+    def end(self) -> float:
+        if self.hi <= self.lo:
+            return 0.0
+        return self.segments.starts[self.hi - 1] + self.segments.durations[self.hi - 1]
+
+    @property
+    def char_count(self) -> int:
+        return max(self.segments.offsets[self.hi] - self.segments.offsets[self.lo] - 1, 0)
+
+    @property
+    def text(self) -> str:
+        """Plain text of the window, as one slice of the transcript string"""
+        if self.hi <= self.lo:
+            return ""
+        return self.segments.text[self.segments.offsets[self.lo]:self.segments.offsets[self.hi] - 1]
+
+    def to_timestamped(self) -> str:
+        """One line per segment, prefixed with its start time, e.g. [12:34] and that's why..."""
+        return "\n".join(
+            f"[{format_timestamp(start)}] {text}"
+            for start, _, text in (self.segments.segment(i) for i in range(self.lo, self.hi))
+        )
@@ -1,13 +1,19 @@
 import os
 import re
 import logging
+import functools
 from strands import tool
 from youtube_transcript_api import YouTubeTranscriptApi
 from youtube_transcript_api.proxies import WebshareProxyConfig
+from cache.transcript_cache import transcript_cache
+from tools.transcript import TranscriptSegments
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# Transcript language requested from YouTube, also part of the transcript cache key
+TRANSCRIPT_LANGUAGE = "en"
+
 def extract_video_id(url: str) -> str:
     """
     Extracts the video ID from a YouTube URL.
@@ -22,32 +28,50 @@ def extract_video_id(url: str) -> str:
         return match.group(1)
     raise ValueError("❌ Invalid YouTube URL. Could not extract video ID.")
 
+@functools.lru_cache(maxsize=1)
+def get_transcript_api() -> YouTubeTranscriptApi:
+    """
+    Process-wide transcript client, built on first use.
+    Reusing it keeps the proxied HTTP session and its open connections warm between calls.
+    """
+    return YouTubeTranscriptApi(
+        proxy_config=WebshareProxyConfig(
+            proxy_username=os.environ.get("WEBSHARE_PROXY_USERNAME"),
+            proxy_password=os.environ.get("WEBSHARE_PROXY_PASSWORD")
+        )
+    )
+
+def fetch_transcript(video_id: str) -> TranscriptSegments:
+    """Returns the timestamped transcript of a video, from the transcript cache when possible"""
+    cached_transcript = transcript_cache.get(video_id, TRANSCRIPT_LANGUAGE)
+    if cached_transcript is not None:
+        return cached_transcript
+
+    logger.info(f"Fetching transcript for video: {video_id}")
+
+    transcript = TranscriptSegments.from_snippets(
+        get_transcript_api().fetch(video_id, languages=[TRANSCRIPT_LANGUAGE])
+    )
+
+    logger.info(f"Transcript fetched successfully ({len(transcript)} segments)")
+
+    transcript_cache.put(video_id, TRANSCRIPT_LANGUAGE, transcript)
+
+    return transcript
+
 @tool
-def get_video_transcript(video_url: str) -> str:
+def get_video_transcript(video_url: str, with_timestamps: bool = False) -> str:
     """
     Fetches the transcript/subtitles for a YouTube video given its URL.
     Use this tool when the user provides a YouTube link and asks for a summary or content extraction.
+    Set with_timestamps to get one line per caption prefixed with its start time, e.g. "[12:34] ...",
+    when the summary should link to moments in the video.
 
     Returns the transcript as a single string.
     """
     try:
-        video_id = extract_video_id(video_url)
-        
-        logger.info(f"Fetching transcript for video: {video_id}")
-
-        api = YouTubeTranscriptApi(
-            proxy_config=WebshareProxyConfig(
-                proxy_username=os.environ.get("WEBSHARE_PROXY_USERNAME"),
-                proxy_password=os.environ.get("WEBSHARE_PROXY_PASSWORD")
-            )
-        )
-        transcript = api.fetch(video_id)
-        
-        text_transcript = " ".join([item.text for item in transcript])
-
-        logger.info("Transcript fetched successfully")
-
-        return text_transcript
+        transcript = fetch_transcript(extract_video_id(video_url))
+        return transcript.all().to_timestamped() if with_timestamps else transcript.text
     except Exception as e:
         logger.error(f"❌ Error fetching transcript: {str(e)}", exc_info=True) 
         raise e
\ No newline at end of file
@@ -0,0 +1,176 @@
+import io
+import re
+import json
+import codecs
+
+SSE_PREFIX = "data: "
+
+# Phrases the agent uses when it could not summarize the video, usually because there is no transcript
+DEFAULT_FAILURE_PHRASES = [
+    "The system returned an error",
+    "I apologize",
+    "I couldn't retrieve the transcript",
+    "subtitles or transcripts are disabled for this video",
+    "transcripts are disabled for this video",
+    "I wasn't able to retrieve the transcript",
+    "it seems that subtitles are disabled", 
+    "I cannot access the transcript",
+    "Subtitles are disabled for this video",
+    "transcripts/subtitles are disabled for this video"
+]
+
+class AgentStreamError(Exception):
+    """Raised when the agent signals a failure in its response stream"""
+
+class TranscriptUnavailable(AgentStreamError):
+    """The agent reported a transcript_unavailable event: there is no transcript to summarize (yet)"""
+
+class FailurePhraseDetected(AgentStreamError):
+    def __init__(self, phrase):
+        super().__init__(f"Failure phrase in summary: {phrase}")
+        self.phrase = phrase
+
+class PhraseMatcher:
+    """
+    Finds any of a set of phrases in a single pass, using one precompiled alternation.
+    Immutable, so one instance is shared by every stream; AgentStreamReader carries the last
+    `overlap` characters between chunks so phrases split across chunks are still found.
+    """
+
+    def __init__(self, phrases):
+        phrases = [phrase for phrase in phrases if phrase]
+        # Longest first, so the reported phrase is the most specific one at a position
+        alternation = "|".join(re.escape(phrase) for phrase in sorted(phrases, key=len, reverse=True))
+        self._pattern = re.compile(alternation) if phrases else None
+        self.overlap = max((len(phrase) for phrase in phrases), default=1) - 1
+
+    def search(self, text):
+        """Returns the first phrase found in text, or None"""
+        if self._pattern is None:
+            return None
+        match = self._pattern.search(text)
+        return match.group(0) if match else None
+
+class AgentStreamReader:
+    """
+    Incrementally consumes an invoke_agent_runtime response.
+
+    The agent streams summary text as raw bytes and every other event as an SSE `data: <json>`
+    frame on a line of its own (see _raw_convert_to_sse in backend/agent/src/agent.py), so a
+    response can mix both. Only a line starting with `data: ` can be a frame, so text that merely
+    contains it stays text; the newline the agent emits before each frame is not part of the text.
+    Text is written to a buffer as it arrives; frames are decoded and dispatched, and an error
+    frame (or, with a failure_matcher, a failure phrase in the text) aborts the read straight away
+    instead of after the whole stream.
+    """
+
+    def __init__(self, failure_matcher=None):
+        self._failure_matcher = failure_matcher
+        self._scan_tail = ""
+        self._buffer = io.StringIO()
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._pending = ""
+        self._after_frame = False
+        # A text line's newline is held back until the next line shows it was not a frame separator
+        self._held_newline = False
+
+    @property
+    def text(self):
+        return self._buffer.getvalue()
+
+    def read(self, response):
+        """Reads the whole response and returns the summary text. Raises AgentStreamError on an error event."""
+        if 'completion' in response:
+            for event in response['completion']:
+                if 'chunk' in event:
+                    self.feed(event['chunk']['bytes'])
+        elif 'response' in response:
+            stream = response['response']
+            try:
+                for line in stream.iter_lines(keepends=True):
+                    if line:
+                        self.feed(line)
+            except AgentStreamError:
+                # Stop paying for a generation that will be discarded
+                stream.close()
+                raise
+
+        self.flush()
+
+        return self.text
+
+    def feed(self, data):
+        """Consumes the next piece of the stream. Pieces may split lines and multi-byte characters anywhere."""
+        self._pending += self._decoder.decode(data) if isinstance(data, bytes) else data
+
+        # Frames are line oriented; complete lines are processed, the remainder waits for more data
+        start = 0
+        newline = self._pending.find("\n")
+        while newline != -1:
+            self._process_line(self._pending[start:newline + 1])
+            start = newline + 1
+            newline = self._pending.find("\n", start)
+
+        self._pending = self._pending[start:]
+
+    def flush(self):
+        self._pending += self._decoder.decode(b"", final=True)
+        if self._pending:
+            self._process_line(self._pending)
+            self._pending = ""
+        self._release_newline()
+
+    def _process_line(self, line):
+        # An SSE frame is terminated by a blank line, which is not part of the summary
+        if self._after_frame and not line.strip():
+            self._after_frame = False
+            return
+        self._after_frame = False
+
+        if line.startswith(SSE_PREFIX):
+            try:
+                event = json.loads(line[len(SSE_PREFIX):])
+            except ValueError:
+                event = None
+
+            if isinstance(event, (dict, str)):
+                # The held newline was the one the agent put before the frame
+                self._held_newline = False
+                self._after_frame = True
+                self._handle_event(event)
+                return
+
+        self._release_newline()
+        if line.endswith("\n"):
+            self._write(line[:-1])
+            self._held_newline = True
+        else:
+            self._write(line)
+
+    def _release_newline(self):
+        if self._held_newline:
+            self._held_newline = False
+            self._write("\n")
+
+    def _handle_event(self, event):
+        if isinstance(event, str):
+            self._write(event)
+        elif event.get('type') == 'transcript_unavailable':
+            raise TranscriptUnavailable(event.get('error', 'transcript unavailable'))
+        elif 'error' in event:
+            raise AgentStreamError(f"{event.get('type', 'error')}: {event['error']}")
+
+    def _write(self, text):
+        if not text:
+            return
+
+        self._buffer.write(text)
+
+        if self._failure_matcher:
+            window = self._scan_tail + text
+            phrase = self._failure_matcher.search(window)
+            if phrase:
+                raise FailurePhraseDetected(phrase)
+
+            overlap = self._failure_matcher.overlap
+            self._scan_tail = window[-overlap:] if overlap else ""
@@ -0,0 +1,109 @@
+import gzip
+import time
+import random
+import threading
+import http.client
+import urllib.parse
+from collections import namedtuple
+
+FeedResponse = namedtuple('FeedResponse', ['status', 'headers', 'body'])
+
+# Statuses worth another attempt: the host is overloaded or briefly unavailable
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+class FeedClient:
+    """
+    Keep-alive HTTP(S) client for feed fetches, shared by every channel thread and kept across warm
+    invocations so each host's TLS handshake is paid once per container, not once per channel.
+
+    Idle connections are pooled per host. At most max_connections requests are in flight at once.
+    Connecting and reading have separate timeouts, so one hung connection cannot use up the Lambda's
+    time budget. Responses are requested gzip-compressed and decoded here. Connection errors and
+    RETRYABLE_STATUSES are retried with full-jitter exponential backoff. A failure on a reused
+    connection (usually one the server closed while the container was frozen) drops that host's idle
+    connections and is retried straight away.
+    """
+
+    def __init__(self, max_connections=8, connect_timeout=3.0, read_timeout=10.0, max_attempts=3, base_delay=0.2, max_delay=2.0, sleep=time.sleep):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._sleep = sleep
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._lock = threading.Lock()
+        # (scheme, host, port) -> idle connections
+        self._idle = {}
+
+    def get(self, url, headers=None):
+        """
+        GETs url and returns a FeedResponse with the decoded body. Non-retryable statuses (including 304)
+        are returned, not raised; the last error is raised once every attempt has failed.
+        """
+        parts = urllib.parse.urlsplit(url)
+        host = (parts.scheme, parts.hostname, parts.port)
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+        headers = {'Accept-Encoding': 'gzip', **(headers or {})}
+
+        attempt = 0
+        while True:
+            with self._slots:
+                connection, reused = self._checkout(host)
+                try:
+                    response, will_close = self._request(connection, path, headers)
+                except (OSError, http.client.HTTPException):
+                    connection.close()
+                    if reused:
+                        self.close(host)
+                        continue
+                    attempt += 1
+                    if attempt >= self.max_attempts:
+                        raise
+                else:
+                    self._checkin(host, connection, will_close)
+                    if response.status not in RETRYABLE_STATUSES or attempt + 1 >= self.max_attempts:
+                        return response
+                    attempt += 1
+
+            self._sleep(random.uniform(0, min(self.base_delay * 2 ** attempt, self.max_delay)))
+
+    def close(self, host=None):
+        """Closes the idle connections to one host, or to every host"""
+        with self._lock:
+            hosts = [host] if host else list(self._idle)
+            connections = [connection for h in hosts for connection in self._idle.pop(h, [])]
+        for connection in connections:
+            connection.close()
+
+    def _checkout(self, host):
+        with self._lock:
+            idle = self._idle.get(host)
+            if idle:
+                return idle.pop(), True
+
+        scheme, hostname, port = host
+        connection_class = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+        return connection_class(hostname, port, timeout=self.connect_timeout), False
+
+    def _checkin(self, host, connection, will_close):
+        if will_close:
+            connection.close()
+            return
+        with self._lock:
+            self._idle.setdefault(host, []).append(connection)
+
+    def _request(self, connection, path, headers):
+        """Returns the response, and whether the server is closing the connection"""
+        if connection.sock is None:
+            # Connect with the connect timeout, then wait at most read_timeout for each read
+            connection.connect()
+            connection.sock.settimeout(self.read_timeout)
+
+        connection.request('GET', path, headers=headers)
+        response = connection.getresponse()
+        # The body must be read in full before the connection can be reused
+        body = response.read()
+        if response.getheader('Content-Encoding', '').lower() == 'gzip':
+            body = gzip.decompress(body)
+        return FeedResponse(response.status, response.headers, body), response.will_close
@@ -1,21 +1,70 @@
 import os
-import base64
+import io
 import json
 import boto3
 import uuid
-import urllib.request
+import time
+import random
+import re
+import base64
+import hashlib
+import hmac
+import threading
+import html
 import xml.etree.ElementTree as ET
-from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from botocore.config import Config
 from markdown_utils import convert_markdown_to_html
-from aws_lambda_powertools import Logger
+from work_queue import SqsQueue
+from rate_limiter import RateLimiter
+from feed_client import FeedClient
+from websub import WebSubHub, callback_url, channel_id_from_topic, topic_url, verify_signature
+from agent_stream import DEFAULT_FAILURE_PHRASES, AgentStreamReader, AgentStreamError, FailurePhraseDetected, PhraseMatcher, TranscriptUnavailable
+from summary_cache import DEFAULT_MODEL_ID, get_cached_summary
+from aws_lambda_powertools import Logger, Metrics
+from aws_lambda_powertools.metrics import MetricUnit
+
+# Number of channels polled in parallel (1 = sequential)
+POLLER_CONCURRENCY = max(1, int(os.environ.get('POLLER_CONCURRENCY', '8')))
+
+# One pool per container, kept across warm invocations, so its threads (and each thread's DynamoDB resource,
+# see ThreadLocalResource) are created once rather than on every run
+executor = ThreadPoolExecutor(max_workers=POLLER_CONCURRENCY, thread_name_prefix='poller')
+
+# Feed fetches share one keep-alive connection pool per container, across channels and warm invocations
+FEED_MAX_CONNECTIONS = max(1, int(os.environ.get('FEED_MAX_CONNECTIONS', str(POLLER_CONCURRENCY))))
+FEED_CONNECT_TIMEOUT_SECONDS = float(os.environ.get('FEED_CONNECT_TIMEOUT_SECONDS', '3'))
+FEED_READ_TIMEOUT_SECONDS = float(os.environ.get('FEED_READ_TIMEOUT_SECONDS', '10'))
+feed_client = FeedClient(
+    max_connections=FEED_MAX_CONNECTIONS,
+    connect_timeout=FEED_CONNECT_TIMEOUT_SECONDS,
+    read_timeout=FEED_READ_TIMEOUT_SECONDS
+)
+
+class ThreadLocalResource:
+    """
+    boto3 resources are not thread-safe, so every thread gets its own resource, created from its own
+    session on first use. Attribute access (Table, batch_get_item, ...) goes to the calling thread's resource.
+    """
 
-# Initialize clients
-dynamodb = boto3.resource('dynamodb')
-agentcore = boto3.client('bedrock-agentcore', config=Config(read_timeout=1200))
+    def __init__(self, service_name):
+        self.service_name = service_name
+        self._local = threading.local()
+
+    def __getattr__(self, name):
+        resource = getattr(self._local, 'resource', None)
+        if resource is None:
+            resource = self._local.resource = boto3.session.Session().resource(self.service_name)
+        return getattr(resource, name)
+
+# Initialize clients (low-level clients are thread-safe and shared)
+dynamodb = ThreadLocalResource('dynamodb')
+agentcore = boto3.client('bedrock-agentcore', config=Config(read_timeout=1200, max_pool_connections=max(10, POLLER_CONCURRENCY)))
 ses = boto3.client('ses')
 
 logger = Logger(service="channel_poller")
+metrics = Metrics(namespace="BrieflyAI", service="channel_poller")
 
 TABLE_NAME = os.environ.get('TABLE_NAME')
 if TABLE_NAME is None:
@@ -27,7 +76,100 @@ AGENT_RUNTIME_ARN = os.environ.get('AGENT_RUNTIME_ARN')
 if AGENT_RUNTIME_ARN is None:
     raise ValueError("AGENT_RUNTIME_ARN environment variable is not set")
 
+# Queue mode: when a queue is configured the poller only detects new videos and enqueues one job
+# per (video, prompt group); consume_handler summarizes and emails. Otherwise everything runs inline.
+SUMMARY_QUEUE_URL = os.environ.get('SUMMARY_QUEUE_URL')
+job_queue = SqsQueue(SUMMARY_QUEUE_URL) if SUMMARY_QUEUE_URL else None
+
+# Failed attempts allowed per video (inline) or per job (queue mode) before giving up
+MAX_RETRIES = int(os.environ.get('MAX_RETRIES', '3'))
+
+# Retries back off exponentially (with jitter) from RETRY_BASE_DELAY_SECONDS up to RETRY_MAX_DELAY_SECONDS.
+# Inline, the tracker's nextAttemptAt holds the channel back until then; in queue mode the failed job's
+# message stays hidden until then. A video still failing after RETRY_MAX_AGE_SECONDS since upload is
+# given up on regardless of MAX_RETRIES.
+RETRY_BASE_DELAY_SECONDS = int(os.environ.get('RETRY_BASE_DELAY_SECONDS', '300'))
+RETRY_MAX_DELAY_SECONDS = int(os.environ.get('RETRY_MAX_DELAY_SECONDS', '3600'))
+RETRY_MAX_AGE_SECONDS = int(os.environ.get('RETRY_MAX_AGE_SECONDS', str(2 * 86400)))
+
+# Each channel is polled at a fraction of its typical gap between uploads (an EWMA, weighted by
+# UPLOAD_GAP_ALPHA), clamped to [POLL_MIN_INTERVAL_SECONDS, POLL_MAX_INTERVAL_SECONDS] and stored as the
+# tracker's nextPollAt. The average is seeded from the publish times already in the feed; channels
+# without enough history for that are polled on every run.
+POLL_MIN_INTERVAL_SECONDS = int(os.environ.get('POLL_MIN_INTERVAL_SECONDS', '300'))
+POLL_MAX_INTERVAL_SECONDS = int(os.environ.get('POLL_MAX_INTERVAL_SECONDS', str(6 * 3600)))
+POLL_INTERVAL_FRACTION = float(os.environ.get('POLL_INTERVAL_FRACTION', '0.05'))
+UPLOAD_GAP_ALPHA = float(os.environ.get('UPLOAD_GAP_ALPHA', '0.3'))
+
+# WebSub push ingestion: when WEBSUB_CALLBACK_URL (the websub_handler function URL) is set, the poller keeps
+# a hub subscription per channel, renewed WEBSUB_RENEW_BEFORE_SECONDS before its lease runs out. Channels
+# with an active lease are only polled every WEBSUB_FALLBACK_POLL_SECONDS, in case a push is lost.
+WEBSUB_CALLBACK_URL = os.environ.get('WEBSUB_CALLBACK_URL')
+WEBSUB_SECRET = os.environ.get('WEBSUB_SECRET')
+WEBSUB_LEASE_SECONDS = int(os.environ.get('WEBSUB_LEASE_SECONDS', str(5 * 86400)))
+WEBSUB_RENEW_BEFORE_SECONDS = int(os.environ.get('WEBSUB_RENEW_BEFORE_SECONDS', '86400'))
+WEBSUB_FALLBACK_POLL_SECONDS = int(os.environ.get('WEBSUB_FALLBACK_POLL_SECONDS', str(6 * 3600)))
+# A subscribe request the hub has not verified yet is not repeated for WEBSUB_REQUEST_RETRY_SECONDS,
+# and each run sends at most WEBSUB_MAX_REQUESTS_PER_RUN, so unverifiable channels cannot stall the poller
+WEBSUB_REQUEST_RETRY_SECONDS = int(os.environ.get('WEBSUB_REQUEST_RETRY_SECONDS', '3600'))
+WEBSUB_MAX_REQUESTS_PER_RUN = int(os.environ.get('WEBSUB_MAX_REQUESTS_PER_RUN', '25'))
+websub_hub = WebSubHub()
+
+# A worker claims a video on the channel tracker before notifying anyone. The claim is a lease, so a
+# worker that dies mid-video only blocks the channel until it expires; keep it above the Lambda timeout.
+TRACKER_LEASE_SECONDS = int(os.environ.get('TRACKER_LEASE_SECONDS', '900'))
+
+# Summaries are cached per (video, prompt, model) by the agent, so retries and repeat requests skip it
+SUMMARY_MODEL_ID = os.environ.get('SUMMARY_MODEL_ID', DEFAULT_MODEL_ID)
+
+# Phrases that mark a summary as failed, as a JSON list (defaults to DEFAULT_FAILURE_PHRASES)
+FAILURE_PHRASES = json.loads(os.environ['FAILURE_PHRASES']) if os.environ.get('FAILURE_PHRASES') else DEFAULT_FAILURE_PHRASES
+failure_matcher = PhraseMatcher(FAILURE_PHRASES)
+
+# Bulk delivery: when SES templates are configured, emails go out with SendBulkTemplatedEmail,
+# rendered once per (video, prompt group) and sent to up to 50 destinations per call
+SES_SUMMARY_TEMPLATE = os.environ.get('SES_SUMMARY_TEMPLATE')
+SES_FAILURE_TEMPLATE = os.environ.get('SES_FAILURE_TEMPLATE')
+SES_BULK_MAX_DESTINATIONS = 50
+
+# SES send quota, shared by every send path and every channel thread in this container. The limit is per
+# process: concurrent containers each get their own bucket, so the deployment splits the account quota
+# across them (see app_stack.py) and SES_MAX_SEND_RATE is this container's share.
+SES_MAX_SEND_RATE = float(os.environ.get('SES_MAX_SEND_RATE', '14'))
+SES_MAX_CONCURRENCY = int(os.environ.get('SES_MAX_CONCURRENCY', '4'))
+ses_limiter = RateLimiter(SES_MAX_SEND_RATE, SES_MAX_CONCURRENCY)
+
+# Bulk destination statuses worth retrying for that destination alone
+SES_RETRYABLE_STATUSES = {'AccountThrottled', 'TransientFailure'}
+
+# How long per-job tracker items and delivery ledger items are kept
+JOB_TTL_SECONDS = 7 * 86400
+DELIVERY_TTL_SECONDS = 30 * 86400
+
+# Partition holding one CHANNEL#<channelId> item per subscribed channel (maintained by the frontend)
+CHANNEL_REGISTRY_PK = "CHANNEL_REGISTRY"
+
+# Written to the registry partition once it has been rebuilt from subscriptions, so the rebuild runs
+# exactly once however many channels were registered before the poller first ran
+REGISTRY_BACKFILL_MARKER = "BACKFILL#1"
+
+# Last known feed validators per channel, kept across warm invocations so an unchanged feed
+# can be skipped without reading the tracker. Only used when process_channel gets no tracker snapshot.
+# channel_id -> {'etag', 'lastModified', 'contentHash', 'pending', 'nextAttemptAt'}
+_feed_cache = {}
+
+# Upper bound on how many unseen uploads are summarized in one poll. Channel feeds list the latest 15
+# uploads, so by default the whole backlog the feed shows is summarized; anything over is logged and counted.
+MAX_BACKLOG_VIDEOS = int(os.environ.get('MAX_BACKLOG_VIDEOS', '15'))
+
+FEED_NS = {'yt': 'http://www.youtube.com/xml/schemas/2015', 'media': 'http://search.yahoo.com/mrss/', 'atom': 'http://www.w3.org/2005/Atom'}
+
+# BatchGetItem accepts at most 100 keys per request
+BATCH_GET_MAX_KEYS = 100
+BATCH_GET_MAX_ATTEMPTS = 5
+
 @logger.inject_lambda_context
+@metrics.log_metrics
 def handler(event, context):
     logger.info("⚙️ Starting Channel Poller")
 
@@ -35,69 +177,317 @@ def handler(event, context):
 
     logger.info("Checking for channels to poll")
 
-    # Get all unique channels to poll
-    # TODO Create a separate table for Subscriptions so we don't need to Scan the GSI and then perform a deduplication step
+    channels = get_channels_to_poll(table)
+
+    logger.info(f"Found {len(channels)} unique channels to poll.")
+
+    trackers = load_trackers(table) if channels else {}
+
+    due = due_channels(channels, trackers)
+
+    logger.info(f"{len(due)} of {len(channels)} channels are due for a poll.")
+
+    if WEBSUB_CALLBACK_URL:
+        renew_websub_subscriptions(due, trackers)
+
+    results = poll_channels(due, trackers)
+
+    return {"statusCode": 200, "body": "Polling complete", "results": results}
+
+def get_channels_to_poll(table):
+    """
+    Reads the channel registry and returns a channel_id -> channel_title mapping for every channel
+    that still has subscribers. Rebuilds the registry from the subscriptions GSI first if that has
+    not been done yet (no backfill marker).
+    """
+    items = query_all(table,
+        KeyConditionExpression='userId = :pk',
+        ExpressionAttributeValues={':pk': CHANNEL_REGISTRY_PK}
+    )
+
+    if not any(item.get('targetId') == REGISTRY_BACKFILL_MARKER for item in items):
+        logger.warning("⚠️ Channel registry has not been backfilled, rebuilding it from subscriptions")
+        items = backfill_channel_registry(table, items)
+
+    channels = {}  # channel_id -> channel_title
+    for item in items:
+        if not item.get('targetId', '').startswith('CHANNEL#'):
+            continue
+        channel_id = item.get('channelId') or item.get('targetId', '').replace('CHANNEL#', '')
+        # Channels drop out once their last subscriber leaves
+        if int(item.get('subscriberCount', 0)) <= 0:
+            continue
+        channels[channel_id] = item.get('channelTitle', '')
+        logger.info(f"Found channel: {channels[channel_id]} ({channel_id})")
+
+    return channels
+
+def backfill_channel_registry(table, existing_items=()):
+    """
+    Scans the SubscriptionsByChannelIndex GSI once and rewrites the channel registry with recounted
+    subscriber counts, then writes the backfill marker. Registry items already written by
+    subscribe/unsubscribe (existing_items) are recounted too, so counts that went wrong before the
+    backfill (e.g. an unsubscribe from a channel that had no registry item yet) are corrected.
+    Afterwards subscribe/unsubscribe keep the registry up to date.
+    """
     response = table.scan(
         IndexName='SubscriptionsByChannelIndex',
         ProjectionExpression='targetId, channelTitle'
     )
-    items = response.get('Items', [])
+    subscriptions = response.get('Items', [])
     while 'LastEvaluatedKey' in response:
         response = table.scan(
             IndexName='SubscriptionsByChannelIndex',
             ProjectionExpression='targetId, channelTitle',
             ExclusiveStartKey=response['LastEvaluatedKey']
         )
-        items.extend(response.get('Items', []))
-        
-    # Deduplicate channels and store channel_id -> channel_title mapping
-    channels = {}  # channel_id -> channel_title
-    for item in items:
+        subscriptions.extend(response.get('Items', []))
+
+    registry = {}  # channel_id -> registry item
+    for sub in subscriptions:
         # targetId is "SUBSCRIPTION#<channelId>"
-        tid = item.get('targetId', '')
-        channel_title = item.get('channelTitle', '')
-        if tid.startswith('SUBSCRIPTION#'):
-            channel_id = tid.replace('SUBSCRIPTION#', '')
-            # Keep first non-empty title we find for each channel
-            if channel_id not in channels or (not channels[channel_id] and channel_title):
-                channels[channel_id] = channel_title
-            logger.info(f"Found channel: {channel_title} ({tid})")    
-    
-    logger.info(f"Found {len(channels)} unique channels to poll.")
-    
+        tid = sub.get('targetId', '')
+        if not tid.startswith('SUBSCRIPTION#'):
+            continue
+        channel_id = tid.replace('SUBSCRIPTION#', '')
+        item = registry.setdefault(channel_id, {
+            'userId': CHANNEL_REGISTRY_PK,
+            'targetId': f"CHANNEL#{channel_id}",
+            'channelId': channel_id,
+            'channelTitle': '',
+            'subscriberCount': 0
+        })
+        item['subscriberCount'] += 1
+        # Keep first non-empty title we find for each channel
+        if not item['channelTitle'] and sub.get('channelTitle'):
+            item['channelTitle'] = sub['channelTitle']
+
+    # Registered channels without a subscription left have no subscribers
+    for existing in existing_items:
+        channel_id = existing.get('targetId', '').replace('CHANNEL#', '', 1)
+        if existing.get('targetId', '').startswith('CHANNEL#') and channel_id not in registry:
+            registry[channel_id] = {**existing, 'subscriberCount': 0}
+
+    with table.batch_writer() as batch:
+        for item in registry.values():
+            batch.put_item(Item=item)
+
+    # Marker last, so an interrupted rebuild runs again on the next poll
+    table.put_item(Item={
+        'userId': CHANNEL_REGISTRY_PK,
+        'targetId': REGISTRY_BACKFILL_MARKER,
+        'backfilledAt': datetime.now(timezone.utc).isoformat()
+    })
+
+    logger.info(f"Backfilled channel registry with {len(registry)} channels")
+
+    return list(registry.values())
+
+def query_all(table, **kwargs):
+    """Runs a query and follows LastEvaluatedKey until every page has been read"""
+    response = table.query(**kwargs)
+    items = response.get('Items', [])
+    while 'LastEvaluatedKey' in response:
+        response = table.query(ExclusiveStartKey=response['LastEvaluatedKey'], **kwargs)
+        items.extend(response.get('Items', []))
+    return items
+
+def load_trackers(table):
+    """
+    Reads every channel tracker with one partition query (a few pages at most), so channels are
+    polled from a snapshot instead of one get_item each. Returns channel_id -> tracker item.
+    """
+    items = query_all(table,
+        KeyConditionExpression='userId = :pk AND begins_with(targetId, :prefix)',
+        ExpressionAttributeValues={':pk': "system", ':prefix': "CHANNEL#"}
+    )
+
+    trackers = {item['targetId'].replace('CHANNEL#', '', 1): item for item in items}
+    logger.info(f"Loaded {len(trackers)} channel trackers")
+
+    return trackers
+
+def due_channels(channels, trackers, now=None):
+    """
+    Filters channels down to those due for a poll: a pending retry once its nextAttemptAt has passed,
+    any other channel once its nextPollAt has. Channels without a tracker are always due.
+    """
+    now = now or time.time()
+
+    due = {}
     for channel_id, channel_title in channels.items():
-        process_channel(channel_title, channel_id, table)
-        
-    return {"statusCode": 200, "body": "Polling complete"}
+        tracker_item = trackers.get(channel_id, {})
+        due_at = tracker_item.get('nextAttemptAt') if tracker_item.get('pendingVideoId') else tracker_item.get('nextPollAt')
+        if int(due_at or 0) <= now:
+            due[channel_id] = channel_title
+
+    return due
+
+def poll_channels(channels, trackers=None):
+    """
+    Polls channels on a bounded thread pool so one slow agent call cannot hold up every channel behind it.
+    Each task uses a Table from its own thread's resource.
+    trackers is the snapshot from load_trackers; a channel missing from it has never been polled.
+    Returns a mapping of channel_id -> result of process_channel ("error" if it raised).
+    """
+    logger.info(f"Polling {len(channels)} channels with concurrency {POLLER_CONCURRENCY}")
+
+    def poll(channel_id, channel_title):
+        try:
+            tracker_item = trackers.get(channel_id, {}) if trackers is not None else None
+            table = dynamodb.Table(TABLE_NAME)
+            return process_channel(channel_title, channel_id, table, tracker_item=tracker_item)
+        except Exception as e:
+            logger.error(f"🛑 Error processing channel {channel_id}: {e}", exc_info=True)
+            return "error"
+
+    futures = {channel_id: executor.submit(poll, channel_id, channel_title) for channel_id, channel_title in channels.items()}
+    results = {channel_id: future.result() for channel_id, future in futures.items()}
+
+    counts = {}
+    for result in results.values():
+        counts[result] = counts.get(result, 0) + 1
+    logger.info(f"Polling results: {counts}")
 
-def process_channel(channel_title, channel_id, table):
+    return results
+
+def process_channel(channel_title, channel_id, table, tracker_item=None):
+    """
+    Polls one channel's feed and processes its new videos. tracker_item is a snapshot of the channel's
+    tracker read up front ({} if there is none yet); without one the tracker is read on demand.
+    """
     logger.info(f"Getting latest video for channel: {channel_title} ({channel_id})")
-    
-    # Fetch RSS Feed
-    feed_xml = get_channel_feed(channel_id)
-    latest_video = parse_feed(feed_xml)
-    
-    if not latest_video:
-        logger.info(f"⚠️ No video found for channel {channel_id}")
-        return
 
-    video_id = latest_video['videoId']
-    video_url = latest_video['link']
-    
-    # Check if there is a new video
     tracker_pk = "system"
     tracker_sk = f"CHANNEL#{channel_id}"
-    
-    tracker_item = table.get_item(Key={'userId': tracker_pk, 'targetId': tracker_sk}).get('Item')
-    
-    last_video_id = tracker_item.get('lastVideoId') if tracker_item else None
-    pending_video_id = tracker_item.get('pendingVideoId') if tracker_item else None
-    retry_count = int(tracker_item.get('retryCount', 0)) if tracker_item else 0
-    
-    if last_video_id == video_id:
-        logger.info(f"⚠️ Video {video_id} already processed for channel {channel_id}.")
-        return
-        
+
+    # Feed validators come from the tracker snapshot, else the warm cache, else a tracker read
+    cached_feed = _feed_cache.get(channel_id) if tracker_item is None else None
+    if cached_feed is None:
+        if tracker_item is None:
+            tracker_item = table.get_item(Key={'userId': tracker_pk, 'targetId': tracker_sk}).get('Item') or {}
+        cached_feed = {
+            'etag': tracker_item.get('etag'),
+            'lastModified': tracker_item.get('lastModified'),
+            'contentHash': tracker_item.get('contentHash'),
+            'pending': bool(tracker_item.get('pendingVideoId')),
+            'nextAttemptAt': int(tracker_item.get('nextAttemptAt') or 0),
+            'uploadGapEwma': int(tracker_item.get('uploadGapEwma') or 0),
+            'nextPollAt': int(tracker_item.get('nextPollAt') or 0),
+            'pushed': websub_active(tracker_item)
+        }
+
+    # A pending retry waits out its backoff
+    if cached_feed['pending'] and cached_feed.get('nextAttemptAt', 0) > time.time():
+        logger.info(f"Retry for channel {channel_id} not due yet, skipping.")
+        return "retry_not_due"
+
+    # Fetch RSS Feed
+    # A pending retry needs the feed body, and so does a channel whose cadence is still to be seeded
+    # from it, so only send conditional headers otherwise
+    if cached_feed['pending'] or cached_feed.get('uploadGapEwma') == 0:
+        feed = get_channel_feed(channel_id)
+    else:
+        feed = get_channel_feed(channel_id, etag=cached_feed['etag'], last_modified=cached_feed['lastModified'])
+
+    if feed is None:
+        return "fetch_failed"
+
+    if feed['notModified'] or feed['contentHash'] == cached_feed['contentHash']:
+        if not cached_feed['pending']:
+            logger.info(f"Feed unchanged for channel {channel_id}, skipping.")
+            cadence = seed_upload_gap(feed['content']) if cached_feed.get('uploadGapEwma') == 0 else {}
+            schedule_next_poll(table, channel_id, cadence.get('uploadGapEwma', cached_feed.get('uploadGapEwma')), cached_feed.get('pushed'), cached_feed.get('nextPollAt'), cadence)
+            return "unchanged"
+
+    validators = {
+        'etag': feed['etag'],
+        'lastModified': feed['lastModified'],
+        'contentHash': feed['contentHash']
+    }
+
+    # Check if there are new videos
+    if tracker_item is None:
+        tracker_item = table.get_item(Key={'userId': tracker_pk, 'targetId': tracker_sk}).get('Item') or {}
+
+    tracker = {
+        'lastVideoId': tracker_item.get('lastVideoId'),
+        'pendingVideoId': tracker_item.get('pendingVideoId'),
+        'retryCount': int(tracker_item.get('retryCount', 0)),
+        'nextAttemptAt': int(tracker_item.get('nextAttemptAt') or 0),
+        'lastUploadAt': int(tracker_item.get('lastUploadAt') or 0),
+        'uploadGapEwma': int(tracker_item.get('uploadGapEwma') or 0),
+        'nextPollAt': int(tracker_item.get('nextPollAt') or 0),
+        'pushed': websub_active(tracker_item)
+    }
+
+    # Until the channel has an upload cadence, estimate one from the feed. It is stored with the next
+    # tracker update (complete_video folds later uploads into it).
+    cadence = seed_upload_gap(feed['content']) if not tracker['uploadGapEwma'] else {}
+    tracker.update(cadence)
+
+    # Collect entries newer than the last processed video (newest first). The parser stops at
+    # lastVideoId, and a first run only looks at the latest upload. If lastVideoId has left the feed
+    # (deleted or made private), uploads published at or before the last processed one are not new.
+    cutoff = backlog_cutoff(tracker_item) if tracker['lastVideoId'] else 0
+    new_videos = []
+    skipped = 0
+    for video in parse_feed(feed['content'], stop_at=tracker['lastVideoId']):
+        uploaded_at = published_at(video)
+        if cutoff and uploaded_at is not None and uploaded_at <= cutoff:
+            break
+        if len(new_videos) >= MAX_BACKLOG_VIDEOS:
+            skipped += 1
+            continue
+        new_videos.append(video)
+        if not tracker['lastVideoId']:
+            break
+
+    if skipped:
+        logger.warning(f"⚠️ Backlog for channel {channel_id} exceeds MAX_BACKLOG_VIDEOS ({MAX_BACKLOG_VIDEOS}), skipping {skipped} older upload(s)")
+        metrics.add_metric(name="BacklogVideosSkipped", unit=MetricUnit.Count, value=skipped)
+
+    if not new_videos:
+        if not tracker['lastVideoId']:
+            logger.info(f"⚠️ No video found for channel {channel_id}")
+            schedule_next_poll(table, channel_id, tracker['uploadGapEwma'], tracker['pushed'], tracker['nextPollAt'], cadence)
+            return "no_video"
+
+        logger.info(f"⚠️ Video {tracker['lastVideoId']} already processed for channel {channel_id}.")
+        # Persist the new validators so the next poll can be conditional
+        schedule_next_poll(table, channel_id, tracker['uploadGapEwma'], tracker['pushed'], tracker['nextPollAt'], {**validators, **cadence})
+        remember_feed(channel_id, validators, pending=bool(tracker['pendingVideoId']), next_attempt_at=tracker['nextAttemptAt'])
+        return "up_to_date"
+
+    logger.info(f"Found {len(new_videos)} new video(s) for channel {channel_id}")
+
+    # Work through the backlog oldest first, stopping at the first video that needs a retry or that
+    # another worker holds. The owner token identifies this run's claims on the tracker.
+    owner = str(uuid.uuid4())
+    for video in reversed(new_videos):
+        result = process_video(channel_title, channel_id, video, tracker, validators, table, owner=owner)
+        if result in ("retry_scheduled", "claimed_elsewhere"):
+            break
+
+    return result
+
+def process_video(channel_title, channel_id, video, tracker, validators, table, owner=None):
+    """
+    Runs the notify/retry state machine for one new video and writes the outcome to the channel tracker.
+    tracker holds the channel's lastVideoId/pendingVideoId/retryCount and is updated in place.
+
+    The video is claimed on the tracker first, so of two overlapping runs only one notifies; the
+    other returns "claimed_elsewhere" without touching the tracker.
+    """
+    owner = owner or str(uuid.uuid4())
+
+    video_id = video['videoId']
+    video_url = video['link']
+
+    last_video_id = tracker['lastVideoId']
+    pending_video_id = tracker['pendingVideoId']
+    retry_count = tracker['retryCount']
+
     # Determine if this is a retry or a new video
     if video_id == pending_video_id:
         logger.info(f"🔄 Retrying video {video_id} (Attempt {retry_count + 1})")
@@ -106,165 +496,766 @@ def process_channel(channel_title, channel_id, table):
         logger.info(f"🆕 New video detected: {video_id} (Resetting retry count)")
         retry_count = 0
 
-    # Max retries reached?
-    if retry_count > 3:
-        logger.error(f"❌ Max retries reached for video {video_id}. Skipping and notifying failure.")
-        notify_failure(channel_id, latest_video['title'], video_url, table)
-        
+    if not claim_video(table, channel_id, video_id, retry_count, last_video_id, owner):
+        logger.warning(f"⚠️ Video {video_id} of channel {channel_id} is claimed by another worker, or the tracker has moved on. Skipping.")
+        metrics.add_metric(name="TrackerClaimLost", unit=MetricUnit.Count, value=1)
+        _feed_cache.pop(channel_id, None)
+        return "claimed_elsewhere"
+
+    # Max retries reached, or the video is too old to keep trying?
+    age = video_age_seconds(video)
+    if retry_count > MAX_RETRIES or (retry_count > 0 and age is not None and age > RETRY_MAX_AGE_SECONDS):
+        logger.error(f"❌ Max retries reached for video {video_id} (Attempt {retry_count + 1}, age {age}s). Skipping and notifying failure.")
+        notify_failure(channel_id, video['title'], video_url, table, video_id=video_id)
+
         # Mark as processed so we don't retry forever, but clear pending state
-        table.put_item(Item={
-            'userId': tracker_pk,
-            'targetId': tracker_sk,
-            'lastVideoId': video_id, # Treat as stuck/done
-            'lastUpdated': datetime.now(timezone.utc).isoformat(),
-            'channelId': channel_id,
-            # Clear pending state
-            'pendingVideoId': None,
-            'retryCount': 0
-        })
-        return
+        complete_video(table, channel_id, video, tracker, validators, owner)
+        remember_feed(channel_id, validators, pending=False)
+        return "failed"
 
     # Handle the case where this is the first run for this channel
     # If the video is older than 24 hours, skip it
     if not last_video_id and not pending_video_id:
-        published_str = latest_video['published']
-        try:
-            # Handle Z or offset
-            published_dt = datetime.fromisoformat(published_str.replace("Z", "+00:00"))
-            now = datetime.now(timezone.utc)
-            age = now - published_dt
-            if age.total_seconds() > 86400: # 24 hours
-                logger.info(f"⚠️ Video {video_id} was uploaded more than 24 hours ago, age: {age}. Skipping.")
-                # Just update tracker so next video is new
-                table.put_item(Item={
-                    'userId': tracker_pk,
-                    'targetId': tracker_sk,
-                    'lastVideoId': video_id,
-                    'lastUpdated': datetime.now(timezone.utc).isoformat(),
-                    'channelId': channel_id
-                })
-                return
-        except Exception as e:
-            logger.error(f"🛑 Error parsing date {published_str}: {e}")
-            
-    logger.info(f"Processing video: {video_id} ({latest_video['title']})")
-    
-    # Notify Subscribers
-    success = notify_subscribers(channel_id, channel_title, video_url, latest_video['title'], table)
+        if age is not None and age > 86400: # 24 hours
+            logger.info(f"⚠️ Video {video_id} was uploaded more than 24 hours ago, age: {timedelta(seconds=int(age))}. Skipping.")
+            # Just update tracker so next video is new
+            complete_video(table, channel_id, video, tracker, validators, owner)
+            remember_feed(channel_id, validators, pending=False)
+            return "skipped_stale"
+
+    logger.info(f"Processing video: {video_id} ({video['title']})")
+
+    # Notify Subscribers, or hand the work to the queue consumers
+    if job_queue is not None:
+        success = enqueue_video_jobs(channel_id, channel_title, video, table)
+        outcome = "enqueued"
+    else:
+        success = notify_subscribers(channel_id, channel_title, video_id, video_url, video['title'], table)
+        outcome = "notified"
 
     if success:
         # Update Tracker - Success!
-        table.put_item(Item={
-            'userId': tracker_pk,
-            'targetId': tracker_sk,
-            'lastVideoId': video_id,
-            'lastUpdated': datetime.now(timezone.utc).isoformat(),
-            'channelId': channel_id,
-            # Clear pending state
-            'pendingVideoId': None,
-            'retryCount': 0
-        })
+        complete_video(table, channel_id, video, tracker, validators, owner)
+        remember_feed(channel_id, validators, pending=False)
+        return outcome
     else:
-        logger.warning(f"⚠️ Failed to notify all subscribers for channel {channel_id}. Scheduling retry.")
-        # Update Tracker - Schedule Retry
-        table.put_item(Item={
-            'userId': tracker_pk,
-            'targetId': tracker_sk,
-            'lastVideoId': last_video_id, # Keep last successful video
+        next_attempt_at = retry_due_at(retry_count)
+        logger.warning(f"⚠️ Failed to {'enqueue' if job_queue is not None else 'notify'} all subscribers for channel {channel_id}. Scheduling retry at {datetime.fromtimestamp(next_attempt_at, timezone.utc).isoformat()}.")
+        # Update Tracker - Schedule Retry, keeping the last successful video
+        update_tracker(table, channel_id, {
             'lastUpdated': datetime.now(timezone.utc).isoformat(),
             'channelId': channel_id,
-            # Set pending state
             'pendingVideoId': video_id,
-            'retryCount': retry_count
-        })
+            'retryCount': retry_count,
+            'nextAttemptAt': next_attempt_at,
+            **validators
+        }, remove=('leaseOwner', 'leaseExpiresAt'), condition='leaseOwner = :owner', condition_values={':owner': owner})
+        tracker.update(pendingVideoId=video_id, retryCount=retry_count, nextAttemptAt=next_attempt_at)
+        remember_feed(channel_id, validators, pending=True, next_attempt_at=next_attempt_at)
+        return "retry_scheduled"
+
+def update_tracker(table, channel_id, values, remove=(), condition=None, condition_values=None):
+    """
+    Writes attributes of the channel tracker in one (optionally conditional) UpdateItem, without reading
+    it first. Placeholders are named after the attributes, e.g. SET lastVideoId = :lastVideoId.
+    Returns False if the condition did not hold.
+    """
+    clauses = []
+    if values:
+        clauses.append("SET " + ", ".join(f"{name} = :{name}" for name in values))
+    if remove:
+        clauses.append("REMOVE " + ", ".join(remove))
+    expression = " ".join(clauses)
+
+    params = {
+        'Key': {'userId': "system", 'targetId': f"CHANNEL#{channel_id}"},
+        'UpdateExpression': expression,
+    }
+    attribute_values = {**{f":{name}": value for name, value in values.items()}, **(condition_values or {})}
+    if attribute_values:
+        params['ExpressionAttributeValues'] = attribute_values
+    if condition:
+        params['ConditionExpression'] = condition
+
+    try:
+        table.update_item(**params)
+    except Exception as e:
+        if getattr(e, 'response', {}).get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+            return False
+        raise
+
+    return True
+
+def claim_video(table, channel_id, video_id, retry_count, last_video_id, owner):
+    """
+    Leases the video to owner. Fails while another worker holds an unexpired lease, or when the
+    tracker's lastVideoId is no longer the one this run read (someone else already finished the video).
+    """
+    now = int(time.time())
+
+    if last_video_id:
+        unchanged = "lastVideoId = :expectedLastVideoId"
+        unchanged_values = {':expectedLastVideoId': last_video_id}
+    else:
+        # Older trackers stored a missing lastVideoId as NULL
+        unchanged = "(attribute_not_exists(lastVideoId) OR attribute_type(lastVideoId, :nullType))"
+        unchanged_values = {':nullType': 'NULL'}
+
+    return update_tracker(table, channel_id, {
+        'pendingVideoId': video_id,
+        'retryCount': retry_count,
+        'leaseOwner': owner,
+        'leaseExpiresAt': now + TRACKER_LEASE_SECONDS
+    }, condition=f"(attribute_not_exists(leaseExpiresAt) OR leaseExpiresAt < :now) AND {unchanged}", condition_values={':now': now, **unchanged_values})
+
+def complete_video(table, channel_id, video, tracker, validators, owner):
+    """
+    Marks the claimed video as the channel's last processed one, folds its upload time into the
+    channel's cadence and releases the lease. tracker is updated in place.
+    """
+    video_id = video['videoId']
+    cadence = record_upload(tracker, published_at(video))
+
+    completed = update_tracker(table, channel_id, {
+        'lastVideoId': video_id,
+        'lastUpdated': datetime.now(timezone.utc).isoformat(),
+        'channelId': channel_id,
+        'retryCount': 0,
+        'nextPollAt': next_poll_at(cadence['uploadGapEwma'], tracker.get('pushed')),
+        **cadence,
+        **validators
+    }, remove=('pendingVideoId', 'nextAttemptAt', 'leaseOwner', 'leaseExpiresAt'), condition='leaseOwner = :owner', condition_values={':owner': owner})
 
-def get_channel_feed(channel_id):
+    if not completed:
+        logger.warning(f"⚠️ Lease on video {video_id} of channel {channel_id} expired before it completed.")
+
+    tracker.update(lastVideoId=video_id, pendingVideoId=None, retryCount=0, nextAttemptAt=0, **cadence)
+
+    return completed
+
+def record_upload(tracker, uploaded_at):
+    """
+    Returns the channel's lastUploadAt and uploadGapEwma after an upload at uploaded_at (epoch seconds).
+    Uploads older than the latest one seen (backlog, re-published videos) do not move the average.
+    """
+    last_upload_at = tracker.get('lastUploadAt') or 0
+    gap_ewma = tracker.get('uploadGapEwma') or 0
+
+    if uploaded_at is None or uploaded_at <= last_upload_at:
+        return {'lastUploadAt': last_upload_at, 'uploadGapEwma': gap_ewma}
+
+    if last_upload_at:
+        gap = uploaded_at - last_upload_at
+        gap_ewma = gap if not gap_ewma else UPLOAD_GAP_ALPHA * gap + (1 - UPLOAD_GAP_ALPHA) * gap_ewma
+
+    return {'lastUploadAt': int(uploaded_at), 'uploadGapEwma': int(gap_ewma)}
+
+def backlog_cutoff(tracker_item):
+    """
+    Epoch seconds at or before which feed entries are not new uploads: the channel's lastUploadAt. Trackers
+    written before lastUploadAt was recorded fall back to their lastUpdated, or to a day ago without one.
+    """
+    if tracker_item.get('lastUploadAt'):
+        return int(tracker_item['lastUploadAt'])
+
+    try:
+        return datetime.fromisoformat(tracker_item['lastUpdated']).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return time.time() - 86400
+
+def seed_upload_gap(xml_content):
+    """
+    Estimates a channel's upload gap EWMA from the publish times of the entries in its feed, oldest first.
+    Returns {'uploadGapEwma': ...}, or {} when the feed has fewer than two datable uploads.
+    """
+    uploads = sorted(uploaded_at for uploaded_at in (published_at(video) for video in parse_feed(xml_content)) if uploaded_at is not None)
+
+    history = {}
+    for uploaded_at in uploads:
+        history.update(record_upload(history, uploaded_at))
+
+    return {'uploadGapEwma': history['uploadGapEwma']} if history.get('uploadGapEwma') else {}
+
+def schedule_next_poll(table, channel_id, gap_ewma, pushed, scheduled_at=0, values=None):
+    """
+    Stores the channel's nextPollAt (see next_poll_at) together with any other tracker values. nextPollAt is
+    not written when the channel has no cadence (it is due on every run anyway), or when a poll ahead of
+    schedule (a push) would move it by less than POLL_MIN_INTERVAL_SECONDS. Nothing left to store, no write.
+    """
+    values = dict(values or {})
+    now = time.time()
+
+    poll_at = next_poll_at(gap_ewma, pushed)
+    scheduled_at = int(scheduled_at or 0)
+    if poll_at > now and (scheduled_at <= now or abs(poll_at - scheduled_at) >= POLL_MIN_INTERVAL_SECONDS):
+        values['nextPollAt'] = poll_at
+
+    if values:
+        update_tracker(table, channel_id, values)
+
+def next_poll_at(gap_ewma, pushed=False):
+    """
+    Epoch seconds of the channel's next poll given its upload cadence, with +/-10% jitter to spread polls out.
+    Channels with an active WebSub subscription (pushed) are polled as a fallback only.
+    """
+    interval = 0
+    if gap_ewma:
+        interval = min(max(gap_ewma * POLL_INTERVAL_FRACTION, POLL_MIN_INTERVAL_SECONDS), POLL_MAX_INTERVAL_SECONDS)
+    if pushed:
+        interval = max(interval, WEBSUB_FALLBACK_POLL_SECONDS)
+
+    if not interval:
+        return int(time.time())
+
+    return int(time.time() + interval * random.uniform(0.9, 1.1))
+
+def websub_active(tracker_item):
+    """True while the hub has a verified, unexpired subscription for the channel"""
+    return int(tracker_item.get('websubLeaseExpiresAt') or 0) > time.time()
+
+def retry_due_at(retry_count):
+    """Epoch seconds of the next attempt after a failure: exponential backoff with +/-10% jitter"""
+    delay = min(RETRY_BASE_DELAY_SECONDS * 2 ** retry_count, RETRY_MAX_DELAY_SECONDS)
+    return int(time.time() + delay * random.uniform(0.9, 1.1))
+
+def published_at(video):
+    """Epoch seconds the video was published, or None if the feed's timestamp cannot be parsed"""
+    published_str = video['published']
+    try:
+        # Handle Z or offset
+        return datetime.fromisoformat(published_str.replace("Z", "+00:00")).timestamp()
+    except Exception as e:
+        logger.error(f"🛑 Error parsing date {published_str}: {e}")
+        return None
+
+def video_age_seconds(video):
+    """Seconds since the video was published, or None if the feed's timestamp cannot be parsed"""
+    published = published_at(video)
+    return time.time() - published if published is not None else None
+
+def remember_feed(channel_id, validators, pending, next_attempt_at=0):
+    """Caches the feed validators (and retry schedule) of a channel for the next poll in this container"""
+    _feed_cache[channel_id] = {**validators, 'pending': pending, 'nextAttemptAt': next_attempt_at}
+
+def get_channel_feed(channel_id, etag=None, last_modified=None):
+    """
+    Fetches the channel's RSS feed, sending If-None-Match/If-Modified-Since when validators are known.
+    Returns {'content', 'etag', 'lastModified', 'contentHash', 'notModified'} or None on error.
+    """
     url = f"https://www.youtube.com/feeds/videos.xml?channel_id={channel_id}"
 
     logger.info(f"Fetching feed for channel: {url}")
 
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+
     try:
-        with urllib.request.urlopen(url) as response:
-            xml_content = response.read()
-            return xml_content
-    except Exception as e:  
+        response = feed_client.get(url, headers=headers)
+    except Exception as e:
         logger.error(f"Error fetching feed for {url}: {e}")
         return None
 
-def parse_feed(xml_content):
-    if not xml_content:
-        return None
-    
-    logger.info("Parsing feed")
-    
-    root = ET.fromstring(xml_content)
-    ns = {'yt': 'http://www.youtube.com/xml/schemas/2015', 'media': 'http://search.yahoo.com/mrss/', 'atom': 'http://www.w3.org/2005/Atom'}
-    
-    # Get the latest entry
-    entry = root.find('atom:entry', ns)
-    if entry is None:
-        return None
-        
-    video_id_elem = entry.find('yt:videoId', ns)
-    title_elem = entry.find('atom:title', ns)
-    link_elem = entry.find('atom:link', ns)
-    published_elem = entry.find('atom:published', ns)
-    
-    video_id = video_id_elem.text if video_id_elem is not None else None
-    title = title_elem.text if title_elem is not None else "Unknown Title"
-    link = link_elem.get('href') if link_elem is not None else ""
-    published = published_elem.text if published_elem is not None else ""
-    
-    if not video_id:
+    if response.status == 304:
+        return {'content': None, 'etag': etag, 'lastModified': last_modified, 'contentHash': None, 'notModified': True}
+
+    if response.status != 200:
+        logger.error(f"Error fetching feed for {url}: HTTP {response.status}")
         return None
-    
+
     return {
-        'videoId': video_id,
-        'title': title,
-        'link': link,
-        'published': published
+        'content': response.body,
+        'etag': response.headers.get('ETag'),
+        'lastModified': response.headers.get('Last-Modified'),
+        'contentHash': hashlib.sha256(response.body).hexdigest(),
+        'notModified': False
     }
 
-def notify_subscribers(channel_id, channel_title, video_url, video_title, table):
+def parse_feed(xml_content, stop_at=None):
+    """
+    Streams the feed's entries newest first as {'videoId', 'channelId', 'title', 'link', 'published'} dicts.
+    Parsing stops as soon as the entry for stop_at (the last processed video) is reached,
+    so the rest of the document is never read.
+    """
+    if not xml_content:
+        return
+
+    logger.info("Parsing feed")
+
+    for _, elem in ET.iterparse(io.BytesIO(xml_content), events=('end',)):
+        if elem.tag != f"{{{FEED_NS['atom']}}}entry":
+            continue
+
+        video_id_elem = elem.find('yt:videoId', FEED_NS)
+        channel_id_elem = elem.find('yt:channelId', FEED_NS)
+        title_elem = elem.find('atom:title', FEED_NS)
+        link_elem = elem.find('atom:link', FEED_NS)
+        published_elem = elem.find('atom:published', FEED_NS)
+
+        video_id = video_id_elem.text if video_id_elem is not None else None
+        title = title_elem.text if title_elem is not None else "Unknown Title"
+        link = link_elem.get('href') if link_elem is not None else ""
+        published = published_elem.text if published_elem is not None else ""
+
+        # Entries are done with once read, free them as we go
+        elem.clear()
+
+        if not video_id:
+            continue
+
+        if video_id == stop_at:
+            return
+
+        yield {
+            'videoId': video_id,
+            'channelId': channel_id_elem.text if channel_id_elem is not None else None,
+            'title': title,
+            'link': link,
+            'published': published
+        }
+
+def notify_subscribers(channel_id, channel_title, video_id, video_url, video_title, table, subscriber_context=None):
     logger.info(f"Notifying subscribers for video {video_url} from {channel_title}")
-    
-    response = table.query(
-        IndexName='SubscriptionsByChannelIndex',
-        KeyConditionExpression='targetId = :tid',
-        ExpressionAttributeValues={':tid': f"SUBSCRIPTION#{channel_id}"}
-    )
-    
-    subscribers = response.get('Items', [])
-    logger.info(f"Found {len(subscribers)} subscribers for channel {channel_id}")
-    
+
+    if subscriber_context is None:
+        subscriber_context = load_subscriber_context(channel_id, table, video_id=video_id)
+
+    # Subscribers already emailed on an earlier attempt are left out, so fully delivered groups skip the agent
+    prompt_groups = group_by_prompt(channel_id, subscriber_context)
+
+    logger.info(f"Summarizing video once for each of {len(prompt_groups)} prompt group(s)")
+
     all_success = True
 
-    for sub in subscribers:
-        user_id = sub['userId']
-        user_profile = table.get_item(Key={'userId': user_id, 'targetId': 'PROFILE#data'}).get('Item')
-        
-        if not user_profile or not user_profile.get('emailNotificationsEnabled') or not user_profile.get('notificationEmail'):
+    for custom_prompt, recipients in prompt_groups.items():
+        if not deliver_summary(channel_title, video_url, video_title, custom_prompt, recipients, video_id=video_id, table=table):
+            all_success = False
+
+    return all_success
+
+def group_by_prompt(channel_id, subscriber_context):
+    """
+    Groups recipients by their effective prompt so the agent only runs once per distinct prompt.
+    Users without an email and users the video was already delivered to are skipped.
+    Returns prompt -> [(user_id, email), ...] (the empty prompt is the default group)
+    """
+    prompt_groups = {}
+
+    for user_id, context in subscriber_context.items():
+        email = context['email']
+
+        if not email:
             logger.info(f"⚠️ Skipping user {user_id}: Email disabled or missing.")
             continue
-            
-        email = user_profile['notificationEmail']
-        
-        # Lookup the user's custom prompt for this channel
-        # PK = userId, SK = PROMPT#<channelId>
-        prompt_override = table.get_item(Key={'userId': user_id, 'targetId': f"PROMPT#{channel_id}"}).get('Item')
-        custom_prompt = prompt_override.get('prompt', '') if prompt_override else ''
+
+        if context.get('delivered'):
+            logger.info(f"Skipping user {user_id}: Already delivered.")
+            continue
+
+        custom_prompt = context['prompt']
 
         if custom_prompt:
              logger.info(f"Using custom prompt for user {user_id} on channel {channel_id}")
-        
+
+        prompt_groups.setdefault(custom_prompt, []).append((user_id, email))
+
+    return prompt_groups
+
+def prompt_group_id(prompt):
+    """Short stable identifier for a prompt group"""
+    return hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:16]
+
+def deliver_summary(channel_title, video_url, video_title, prompt, recipients, video_id=None, table=None):
+    """
+    Summarizes the video once with the group's prompt and emails it to every recipient. Returns True if all were sent.
+    With a video_id and table, successful sends are recorded in the delivery ledger so retries skip them.
+    """
+    try:
+        summary = invoke_agent(video_url, prompt, channel_title=channel_title, video_title=video_title)
+    except Exception as e:
+        logger.error(f"Failed to summarize video for {len(recipients)} subscriber(s): {e}")
+        return False
+
+    failed_user_ids = send_summary_emails(recipients, video_title, video_url, summary)
+
+    if video_id and table is not None:
+        failed = set(failed_user_ids)
+        record_deliveries(table, video_id, [user_id for user_id, _ in recipients if user_id not in failed])
+
+    return not failed_user_ids
+
+def delivery_key(user_id, video_id):
+    """Delivery ledger item marking that a video's summary reached a user. PK = userId, SK = DELIVERY#<videoId>"""
+    return {'userId': user_id, 'targetId': f"DELIVERY#{video_id}"}
+
+def record_deliveries(table, video_id, user_ids):
+    """
+    Writes a ledger item per delivered user. The put is conditional so the first delivery time is kept
+    when a duplicate job or retry records the same delivery again.
+    """
+    delivered_at = datetime.now(timezone.utc).isoformat()
+    expires_at = int(time.time()) + DELIVERY_TTL_SECONDS
+
+    for user_id in user_ids:
         try:
-            summary = invoke_agent(video_url, custom_prompt, channel_title=channel_title, video_title=video_title)
-            send_email(email, video_title, summary, video_url)
+            table.put_item(
+                Item={**delivery_key(user_id, video_id), 'deliveredAt': delivered_at, 'expiresAt': expires_at},
+                ConditionExpression='attribute_not_exists(targetId)'
+            )
         except Exception as e:
-            logger.error(f"Failed to notify {user_id}: {e}")
-            all_success = False
+            if getattr(e, 'response', {}).get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+                continue
+            # The email went out; a missing record only risks a duplicate on retry
+            logger.warning(f"Failed to record delivery of {video_id} to {user_id}: {e}")
 
-    return all_success
+def enqueue_video_jobs(channel_id, channel_title, video, table):
+    """
+    Queue mode: enqueues one job per prompt group for the video instead of summarizing inline.
+    Returns False if the jobs could not be enqueued so the video is retried.
+    """
+    subscriber_context = load_subscriber_context(channel_id, table, video_id=video['videoId'])
+
+    jobs = [
+        {
+            'channelId': channel_id,
+            'channelTitle': channel_title,
+            'videoId': video['videoId'],
+            'videoTitle': video['title'],
+            'videoUrl': video['link'],
+            'promptGroup': prompt_group_id(prompt),
+            'prompt': prompt,
+            'userIds': [user_id for user_id, _ in recipients]
+        }
+        for prompt, recipients in group_by_prompt(channel_id, subscriber_context).items()
+    ]
+
+    try:
+        job_queue.send(jobs)
+    except Exception as e:
+        logger.error(f"Failed to enqueue jobs for video {video['videoId']}: {e}")
+        return False
+
+    logger.info(f"Enqueued {len(jobs)} job(s) for video {video['videoId']}")
+
+    return True
+
+@logger.inject_lambda_context
+@metrics.log_metrics
+def websub_handler(event, context):
+    """
+    Function URL callback for the WebSub hub. GET requests verify (un)subscriptions; POST requests
+    carry an Atom entry for a new or updated upload, which runs the channel through the same
+    pipeline as a scheduled poll straight away.
+    """
+    table = dynamodb.Table(TABLE_NAME)
+
+    if event.get('requestContext', {}).get('http', {}).get('method') == 'GET':
+        return verify_websub_intent(event.get('queryStringParameters') or {}, table)
+
+    body = event.get('body') or ''
+    body = base64.b64decode(body) if event.get('isBase64Encoded') else body.encode('utf-8')
+    headers = {name.lower(): value for name, value in (event.get('headers') or {}).items()}
+
+    # A notification that fails the signature check is acknowledged but ignored, as WebSub requires
+    if WEBSUB_SECRET and not verify_signature(WEBSUB_SECRET, body, headers.get('x-hub-signature')):
+        logger.warning("⚠️ Ignoring WebSub notification with a missing or invalid signature")
+        metrics.add_metric(name="WebSubSignatureRejected", unit=MetricUnit.Count, value=1)
+        return {"statusCode": 202, "body": ""}
+
+    results = ingest_websub_notification(body, table)
+
+    return {"statusCode": 200, "body": json.dumps({"results": results})}
+
+def verify_websub_intent(params, table):
+    """
+    Confirms a hub verification request by echoing hub.challenge, and records the subscription lease.
+    Only requests carrying the nonce of the channel's last subscribe request (see renew_websub_subscriptions)
+    are accepted; a subscribe must match a pending request, and its lease is capped at the one requested.
+    """
+    mode = params.get('hub.mode')
+    channel_id = channel_id_from_topic(params.get('hub.topic'))
+
+    if not channel_id:
+        return {"statusCode": 404, "body": ""}
+
+    tracker_item = table.get_item(Key={'userId': "system", 'targetId': f"CHANNEL#{channel_id}"}).get('Item') or {}
+    nonce = tracker_item.get('websubNonce')
+    pending = mode != 'subscribe' or tracker_item.get('websubRequestedLease')
+    if not nonce or not pending or not hmac.compare_digest(nonce, params.get('nonce') or ''):
+        logger.warning(f"⚠️ Refusing WebSub {mode} verification for channel {channel_id} that matches no request")
+        metrics.add_metric(name="WebSubVerificationRejected", unit=MetricUnit.Count, value=1)
+        return {"statusCode": 404, "body": ""}
+
+    if mode == 'subscribe':
+        # Only channels someone is subscribed to are worth a push subscription
+        registry_item = table.get_item(Key={'userId': CHANNEL_REGISTRY_PK, 'targetId': f"CHANNEL#{channel_id}"}).get('Item') or {}
+        if int(registry_item.get('subscriberCount', 0)) <= 0:
+            logger.info(f"Refusing WebSub subscription for channel {channel_id} without subscribers")
+            return {"statusCode": 404, "body": ""}
+
+        requested_lease = int(tracker_item['websubRequestedLease'])
+        lease_seconds = min(int(params.get('hub.lease_seconds') or requested_lease), requested_lease)
+        # The request is consumed, so the same verification cannot extend the lease again
+        verified = update_tracker(table, channel_id, {'websubLeaseExpiresAt': int(time.time()) + lease_seconds},
+            remove=('websubRequestedLease',), condition='websubNonce = :nonce', condition_values={':nonce': nonce})
+        if not verified:
+            return {"statusCode": 404, "body": ""}
+        logger.info(f"✅ WebSub subscription for channel {channel_id} verified, lease {lease_seconds}s")
+    elif mode in ('unsubscribe', 'denied'):
+        update_tracker(table, channel_id, {}, remove=('websubLeaseExpiresAt', 'websubRequestedLease'), condition='websubNonce = :nonce', condition_values={':nonce': nonce})
+        logger.info(f"WebSub subscription for channel {channel_id} ended ({mode})")
+
+    if mode == 'denied':
+        return {"statusCode": 200, "body": ""}
+
+    return {"statusCode": 200, "body": params.get('hub.challenge', ''), "headers": {"Content-Type": "text/plain"}}
+
+def ingest_websub_notification(body, table):
+    """
+    Runs process_channel for every channel with an entry in the notification.
+    Returns channel_id -> result, like poll_channels.
+    """
+    channel_ids = []
+    for video in parse_feed(body):
+        if video['channelId'] and video['channelId'] not in channel_ids:
+            channel_ids.append(video['channelId'])
+
+    metrics.add_metric(name="WebSubNotification", unit=MetricUnit.Count, value=1)
+
+    results = {}
+    for channel_id in channel_ids:
+        registry_item = table.get_item(Key={'userId': CHANNEL_REGISTRY_PK, 'targetId': f"CHANNEL#{channel_id}"}).get('Item') or {}
+        if int(registry_item.get('subscriberCount', 0)) <= 0:
+            logger.info(f"Ignoring WebSub notification for channel {channel_id} without subscribers")
+            results[channel_id] = "no_subscribers"
+            continue
+
+        try:
+            results[channel_id] = process_channel(registry_item.get('channelTitle', ''), channel_id, table)
+        except Exception as e:
+            logger.error(f"🛑 Error processing pushed channel {channel_id}: {e}", exc_info=True)
+            results[channel_id] = "error"
+
+    logger.info(f"WebSub notification results: {results}")
+
+    return results
+
+def renew_websub_subscriptions(channels, trackers):
+    """
+    Asks the hub to (re)subscribe every channel whose lease is missing or expires within
+    WEBSUB_RENEW_BEFORE_SECONDS, unless a request went out within WEBSUB_REQUEST_RETRY_SECONDS.
+    At most WEBSUB_MAX_REQUESTS_PER_RUN requests are sent, on the poller's thread pool. The hub
+    confirms asynchronously through websub_handler, which records the new lease.
+    Returns the channel ids a request was sent for.
+    """
+    now = time.time()
+    renew_by = now + WEBSUB_RENEW_BEFORE_SECONDS
+
+    to_renew = [
+        channel_id for channel_id in channels
+        if int(trackers.get(channel_id, {}).get('websubLeaseExpiresAt') or 0) <= renew_by
+        and int(trackers.get(channel_id, {}).get('websubRequestedAt') or 0) <= now - WEBSUB_REQUEST_RETRY_SECONDS
+    ]
+    if len(to_renew) > WEBSUB_MAX_REQUESTS_PER_RUN:
+        logger.info(f"Deferring {len(to_renew) - WEBSUB_MAX_REQUESTS_PER_RUN} WebSub subscription request(s) to a later run")
+        to_renew = to_renew[:WEBSUB_MAX_REQUESTS_PER_RUN]
+
+    if not to_renew:
+        return []
+
+    def renew(channel_id):
+        try:
+            # Record the request first: the hub's verification must carry its nonce, and gets at most its lease.
+            # The hub identifies a subscription by (topic, callback), so a renewal keeps the nonce (and with it
+            # the callback URL) of the active lease; a new callback would add a second subscription instead.
+            tracker_item = trackers.get(channel_id, {})
+            nonce = tracker_item.get('websubNonce') if websub_active(tracker_item) else None
+            nonce = nonce or uuid.uuid4().hex
+            update_tracker(dynamodb.Table(TABLE_NAME), channel_id, {'websubNonce': nonce, 'websubRequestedLease': WEBSUB_LEASE_SECONDS, 'websubRequestedAt': int(now)})
+            websub_hub.subscribe(topic_url(channel_id), callback_url(WEBSUB_CALLBACK_URL, nonce), lease_seconds=WEBSUB_LEASE_SECONDS, secret=WEBSUB_SECRET)
+            return True
+        except Exception as e:
+            logger.error(f"🛑 Error renewing WebSub subscription for channel {channel_id}: {e}")
+            return False
+
+    futures = {channel_id: executor.submit(renew, channel_id) for channel_id in to_renew}
+    renewed = [channel_id for channel_id, future in futures.items() if future.result()]
+
+    if renewed:
+        logger.info(f"Requested WebSub subscriptions for {len(renewed)} channels")
+
+    return renewed
+
+@logger.inject_lambda_context
+@metrics.log_metrics
+def consume_handler(event, context):
+    """
+    Queue consumer: processes SQS records holding (video, prompt group) jobs.
+    Failed jobs are reported in batchItemFailures so only they are redelivered, after a backoff delay.
+    """
+    table = dynamodb.Table(TABLE_NAME)
+
+    failures = []
+
+    for record in event.get('Records', []):
+        try:
+            job = json.loads(record['body'])
+            if not process_job(job, table):
+                delay_job_retry(record)
+                failures.append({'itemIdentifier': record['messageId']})
+        except Exception as e:
+            logger.error(f"🛑 Error processing job {record.get('messageId')}: {e}", exc_info=True)
+            delay_job_retry(record)
+            failures.append({'itemIdentifier': record['messageId']})
+
+    logger.info(f"Processed {len(event.get('Records', []))} job(s), {len(failures)} failed")
+
+    return {'batchItemFailures': failures}
+
+def delay_job_retry(record):
+    """
+    Hides a failed job's message for the backoff delay of its receive count (see retry_due_at), instead of
+    redelivering it after the queue's fixed visibility timeout. On error the visibility timeout applies.
+    """
+    if job_queue is None or not record.get('receiptHandle'):
+        return
+
+    receive_count = int(record.get('attributes', {}).get('ApproximateReceiveCount', '1'))
+    delay = max(0, retry_due_at(receive_count) - int(time.time()))
+
+    try:
+        job_queue.retry_later(record['receiptHandle'], delay)
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to delay the retry of job {record.get('messageId')}: {e}")
+
+def process_job(job, table):
+    """
+    Summarizes one (video, prompt group) job and emails its recipients.
+    Retry state lives on a per-job tracker item. Returns False when the job should be redelivered.
+    """
+    job_key = {'userId': 'system', 'targetId': f"JOB#{job['videoId']}#{job['promptGroup']}"}
+
+    job_item = table.get_item(Key=job_key).get('Item') or {}
+
+    if job_item.get('status') in ('done', 'failed'):
+        logger.info(f"⚠️ Job {job_key['targetId']} already {job_item['status']}, skipping duplicate delivery.")
+        return True
+
+    retry_count = int(job_item.get('retryCount', 0))
+
+    logger.info(f"Processing job {job_key['targetId']} for {len(job['userIds'])} subscriber(s) (Attempt {retry_count + 1})")
+
+    subscriber_context = load_subscriber_context(job['channelId'], table, user_ids=job['userIds'], video_id=job['videoId'])
+    recipients = [
+        (user_id, context['email'])
+        for user_id, context in subscriber_context.items()
+        if context['email'] and not context['delivered']
+    ]
+
+    if not recipients or deliver_summary(job['channelTitle'], job['videoUrl'], job['videoTitle'], job['prompt'], recipients, video_id=job['videoId'], table=table):
+        save_job_state(table, job_key, job, 'done', retry_count)
+        return True
+
+    retry_count += 1
+
+    if retry_count > MAX_RETRIES:
+        logger.error(f"❌ Max retries reached for job {job_key['targetId']}. Notifying failure.")
+        notify_failure(job['channelId'], job['videoTitle'], job['videoUrl'], table, subscriber_context=subscriber_context)
+        save_job_state(table, job_key, job, 'failed', retry_count)
+        return True
+
+    logger.warning(f"⚠️ Job {job_key['targetId']} failed. Scheduling retry.")
+    save_job_state(table, job_key, job, 'pending', retry_count)
+    return False
+
+def save_job_state(table, job_key, job, status, retry_count):
+    table.put_item(Item={
+        **job_key,
+        'channelId': job['channelId'],
+        'pendingVideoId': job['videoId'] if status == 'pending' else None,
+        'status': status,
+        'retryCount': retry_count,
+        'lastUpdated': datetime.now(timezone.utc).isoformat(),
+        'expiresAt': int(time.time()) + JOB_TTL_SECONDS
+    })
+
+def get_channel_subscribers(channel_id, table):
+    """Returns every subscription item for a channel from the SubscriptionsByChannelIndex GSI"""
+    return query_all(table,
+        IndexName='SubscriptionsByChannelIndex',
+        KeyConditionExpression='targetId = :tid',
+        ExpressionAttributeValues={':tid': f"SUBSCRIPTION#{channel_id}"}
+    )
+
+def load_subscriber_context(channel_id, table, user_ids=None, video_id=None):
+    """
+    Loads the profile and channel prompt override of every subscriber of a channel in bulk.
+    user_ids restricts the load to known subscribers instead of querying the channel's subscriptions.
+    With a video_id, each subscriber's delivery ledger item for the video is loaded in the same batch.
+    Returns user_id -> {'email': notification email or None if disabled, 'prompt': custom prompt or '',
+    'delivered': True if the video was already delivered to the user}
+    """
+    if user_ids is None:
+        subscribers = get_channel_subscribers(channel_id, table)
+        logger.info(f"Found {len(subscribers)} subscribers for channel {channel_id}")
+    else:
+        subscribers = [{'userId': user_id} for user_id in user_ids]
+
+    # PK = userId, SK = PROFILE#data / PROMPT#<channelId>
+    keys = []
+    for sub in subscribers:
+        keys.append({'userId': sub['userId'], 'targetId': 'PROFILE#data'})
+        keys.append({'userId': sub['userId'], 'targetId': f"PROMPT#{channel_id}"})
+        if video_id:
+            keys.append(delivery_key(sub['userId'], video_id))
+
+    items = {(item['userId'], item['targetId']): item for item in batch_get_items(keys)}
+
+    subscriber_context = {}
+    for sub in subscribers:
+        user_id = sub['userId']
+        user_profile = items.get((user_id, 'PROFILE#data'))
+        prompt_override = items.get((user_id, f"PROMPT#{channel_id}"))
+
+        email = None
+        if user_profile and user_profile.get('emailNotificationsEnabled') and user_profile.get('notificationEmail'):
+            email = user_profile['notificationEmail']
+
+        subscriber_context[user_id] = {
+            'email': email,
+            'prompt': prompt_override.get('prompt', '') if prompt_override else '',
+            'delivered': bool(video_id) and (user_id, delivery_key(user_id, video_id)['targetId']) in items
+        }
+
+    return subscriber_context
+
+def batch_get_items(keys):
+    """
+    Fetches items with BatchGetItem in chunks of BATCH_GET_MAX_KEYS keys.
+    UnprocessedKeys are retried with jittered exponential backoff.
+    """
+    items = []
+
+    for i in range(0, len(keys), BATCH_GET_MAX_KEYS):
+        request = {TABLE_NAME: {'Keys': keys[i:i + BATCH_GET_MAX_KEYS]}}
+        attempt = 0
+
+        while request:
+            response = dynamodb.batch_get_item(RequestItems=request)
+            items.extend(response.get('Responses', {}).get(TABLE_NAME, []))
+
+            request = response.get('UnprocessedKeys') or {}
+            if request:
+                attempt += 1
+                if attempt >= BATCH_GET_MAX_ATTEMPTS:
+                    raise RuntimeError(f"BatchGetItem still has unprocessed keys after {attempt} attempts")
+                delay = min(0.05 * (2 ** attempt), 2.0)
+                logger.warning(f"⚠️ Retrying unprocessed keys in {delay:.2f}s (Attempt {attempt + 1})")
+                time.sleep(random.uniform(0, delay))
+
+    return items
 
 def sanitize_session_id(channel_title, video_title):
     """
@@ -319,9 +1310,30 @@ def sanitize_session_id(channel_title, video_title):
     
     return session_id
 
+def extract_video_id(video_url):
+    """Extracts the 11 character video ID from a standard or short YouTube URL"""
+    match = re.search(r"(?:v=|\/)([0-9A-Za-z_-]{11}).*", video_url)
+    return match.group(1) if match else None
+
 def invoke_agent(video_url, instructions, channel_title="Briefly", video_title="Video"):
     logger.info(f"▶️ Summarizing video from {channel_title} for notification: {video_url}")
 
+    table = dynamodb.Table(TABLE_NAME)
+    video_id = extract_video_id(video_url)
+
+    if video_id:
+        try:
+            cached_summary = get_cached_summary(table, video_id, instructions, SUMMARY_MODEL_ID)
+        except Exception as e:
+            # Best-effort: a cache failure only costs an agent invocation
+            logger.warning(f"Summary cache read failed for video {video_id}: {e}")
+            cached_summary = None
+        if cached_summary:
+            logger.info(f"Summary cache hit for video {video_id}")
+            metrics.add_metric(name="SummaryCacheHit", unit=MetricUnit.Count, value=1)
+            return cached_summary
+        metrics.add_metric(name="SummaryCacheMiss", unit=MetricUnit.Count, value=1)
+
     payload = json.dumps({
         "videoUrl": video_url,
         "additionalInstructions": instructions
@@ -338,91 +1350,124 @@ def invoke_agent(video_url, instructions, channel_title="Briefly", video_title="
         runtimeSessionId=session_id
     )
     
-    logger.info(f"Agent response: {response}")
-    
-    summary = ""
-    
-    if 'completion' in response:
-        for event in response['completion']:
-            if 'chunk' in event:
-                summary += event['chunk']['bytes'].decode('utf-8')
-    elif 'response' in response:
-        # Handle raw StreamingBody (e.g. SSE or raw text)
-        stream = response['response']
-        logger.info("Starting to read stream from response['response']")
-        try:
-            for line in stream.iter_lines(keepends=True):
-                if line:
-                    decoded_line = line.decode('utf-8')
-                    logger.info(f"Stream line: {repr(decoded_line)}") # Log the raw line with repr to see invisible chars
-                    
-                    # if decoded_line.startswith('data: '):
-                    #     data_str = decoded_line[6:]
-                    #     try:
-                    #         data = json.loads(data_str)
-                    #         logger.info(f"Parsed data chunk: {data}")
-                    #         if 'chunk' in data and 'bytes' in data['chunk']:
-                    #             b_content = data['chunk']['bytes']
-                    #             if isinstance(b_content, str):
-                    #                 # Try standard base64 decode typical for AWS bytes in JSON
-                    #                 try:
-                    #                     decoded_chunk = base64.b64decode(b_content).decode('utf-8')
-                    #                     logger.info(f"Decoded chunk: {repr(decoded_chunk)}")
-                    #                     summary += decoded_chunk
-                    #                 except Exception as e:
-                    #                     logger.error(f"Base64 decode failed, using raw: {e}")
-                    #                     summary += b_content
-                    #             else:
-                    #                 # If it's already bytes (unlikely in this JSON structure but possible in some SDKs)
-                    #                 summary += b_content.decode('utf-8')
-                    #     except Exception as e:
-                    #         logger.error(f"Error parsing SSE line json: {e}")
-                    # else:
-                    # Treat as raw text (e.g. if the agent is just streaming text directly)
-                    #logger.info(f"Non-SSE line: {repr(decoded_line)}")
-                    
-                    summary += decoded_line
-        except Exception as e:
-            logger.error(f"Error iterating stream: {e}")
+    reader = AgentStreamReader(failure_matcher=failure_matcher)
+
+    try:
+        summary = reader.read(response)
+    except TranscriptUnavailable as e:
+        logger.warning(f"Agent reported the transcript as unavailable: {e}")
+        metrics.add_metric(name="TranscriptUnavailable", unit=MetricUnit.Count, value=1)
+        raise ValueError("Transcript unavailable from agent")
+    except FailurePhraseDetected as e:
+        # "Apology" messages indicate the transcript is unavailable
+        logger.warning(f"Detected failure phrase in summary: {e.phrase}")
+        metrics.add_metric(name="FailurePhraseDetected", unit=MetricUnit.Count, value=1)
+        raise ValueError("Transcript unavailable from agent")
+    except AgentStreamError as e:
+        logger.warning(f"Agent reported a failure: {e}")
+        raise ValueError(f"Agent stream error: {e}")
+    except Exception as e:
+        logger.error(f"Error iterating stream: {e}")
+        summary = reader.text
              
     logger.info(f"Final Summary length: {len(summary)}")
-    logger.info(f"Summary content: {summary}")
-
-    # Check for "apology" messages indicating transcript is unavailable
-    fail_phrases = [
-        "The system returned an error",
-        "I apologize",
-        "I couldn't retrieve the transcript",
-        "subtitles or transcripts are disabled for this video",
-        "transcripts are disabled for this video",
-        "I wasn't able to retrieve the transcript",
-        "it seems that subtitles are disabled", 
-        "I cannot access the transcript",
-        "Subtitles are disabled for this video",
-        "transcripts/subtitles are disabled for this video"
-    ]
-    
-    for phrase in fail_phrases:
-        if phrase in summary:
-            logger.warning(f"Detected failure phrase in summary: {phrase}")
-            raise ValueError("Transcript unavailable from agent")
-    
+    logger.debug(f"Summary content: {summary}")
+
     return summary
 
-def send_email(to_address, title, summary, video_url):
+def send_summary_emails(recipients, video_title, video_url, summary):
+    """Emails the summary to every (user_id, email) recipient, rendering it once. Returns the user IDs that were not sent to."""
+    html_summary = convert_markdown_to_html(summary)
+
+    if SES_SUMMARY_TEMPLATE:
+        return send_bulk_templated_email(SES_SUMMARY_TEMPLATE, {
+            'title': video_title,
+            'videoUrl': video_url,
+            'summary': summary,
+            'summaryHtml': html_summary
+        }, recipients)
+
+    failed_user_ids = []
+
+    for user_id, email in recipients:
+        try:
+            send_email(email, video_title, summary, video_url, html_summary=html_summary)
+        except Exception as e:
+            logger.error(f"Failed to notify {user_id}: {e}")
+            failed_user_ids.append(user_id)
+
+    return failed_user_ids
+
+def send_bulk_templated_email(template, template_data, recipients):
+    """
+    Sends the template to every (user_id, email) recipient, SES_BULK_MAX_DESTINATIONS per call.
+    The template data is shared by all destinations. Returns the user IDs SES did not accept.
+    """
+    default_template_data = json.dumps(template_data)
+    failed_user_ids = []
+
+    for i in range(0, len(recipients), SES_BULK_MAX_DESTINATIONS):
+        batch = recipients[i:i + SES_BULK_MAX_DESTINATIONS]
+
+        # Throttled or transiently failed destinations are retried on their own, never the whole batch
+        for attempt in range(ses_limiter.max_attempts):
+            try:
+                response = ses_limiter.call(
+                    ses.send_bulk_templated_email,
+                    tokens=len(batch),
+                    Source=SES_SOURCE_EMAIL,
+                    Template=template,
+                    DefaultTemplateData=default_template_data,
+                    Destinations=[
+                        {'Destination': {'ToAddresses': [email]}, 'ReplacementTemplateData': '{}'}
+                        for _, email in batch
+                    ]
+                )
+            except Exception as e:
+                logger.error(f"Failed to send {template} to {len(batch)} recipient(s): {e}")
+                break
+
+            # One status per destination, in request order
+            statuses = response.get('Status', [])
+            retry = []
+            for n, recipient in enumerate(batch):
+                status = statuses[n] if n < len(statuses) else {}
+                if status.get('Status') == 'Success':
+                    continue
+                if status.get('Status') in SES_RETRYABLE_STATUSES:
+                    retry.append(recipient)
+                else:
+                    logger.error(f"Failed to notify {recipient[0]}: {status.get('Status', 'NoStatus')} {status.get('Error', '')}")
+                    failed_user_ids.append(recipient[0])
+
+            batch = retry
+            if not batch:
+                break
+            ses_limiter.backoff(attempt)
+
+        # Whatever is left could not be sent
+        failed_user_ids.extend(user_id for user_id, _ in batch)
+
+    logger.info(f"Sent {template} to {len(recipients) - len(failed_user_ids)}/{len(recipients)} recipient(s)")
+
+    return failed_user_ids
+
+def send_email(to_address, title, summary, video_url, html_summary=None):
     logger.info(f"Sending video summary to {to_address}")
 
     subject = f"New Video Summary: {title}"
     
-    html_summary = convert_markdown_to_html(summary)
+    if html_summary is None:
+        html_summary = convert_markdown_to_html(summary)
     
     body_html = f"""
-    <h1>New Video: <a href="{video_url}">{title}</a></h1>
+    <h1>New Video: <a href="{html.escape(video_url)}">{html.escape(title, quote=False)}</a></h1>
     {html_summary}
     <p><small>Sent by Briefly AI Poller</small></p>
     """
     
-    ses.send_email(
+    ses_limiter.call(
+        ses.send_email,
         Source=SES_SOURCE_EMAIL,
         Destination={'ToAddresses': [to_address]},
         Message={
@@ -434,26 +1479,28 @@ def send_email(to_address, title, summary, video_url):
         }
     )
 
-def notify_failure(channel_id, video_title, video_url, table):
+def notify_failure(channel_id, video_title, video_url, table, subscriber_context=None, video_id=None):
     logger.info(f"Notifying subscribers of failure for video {video_url}")
-    
-    response = table.query(
-        IndexName='SubscriptionsByChannelIndex',
-        KeyConditionExpression='targetId = :tid',
-        ExpressionAttributeValues={':tid': f"SUBSCRIPTION#{channel_id}"}
-    )
-    
-    subscribers = response.get('Items', [])
-    
-    for sub in subscribers:
-        user_id = sub['userId']
-        user_profile = table.get_item(Key={'userId': user_id, 'targetId': 'PROFILE#data'}).get('Item')
-        
-        if not user_profile or not user_profile.get('emailNotificationsEnabled') or not user_profile.get('notificationEmail'):
+
+    if subscriber_context is None:
+        subscriber_context = load_subscriber_context(channel_id, table, video_id=video_id)
+
+    # Subscribers who did get the summary are not told it failed
+    subscriber_context = {
+        user_id: context for user_id, context in subscriber_context.items() if not context.get('delivered')
+    }
+
+    if SES_FAILURE_TEMPLATE:
+        recipients = [(user_id, context['email']) for user_id, context in subscriber_context.items() if context['email']]
+        send_bulk_templated_email(SES_FAILURE_TEMPLATE, {'videoTitle': video_title, 'videoUrl': video_url}, recipients)
+        return
+
+    for user_id, context in subscriber_context.items():
+        email = context['email']
+
+        if not email:
             continue
-            
-        email = user_profile['notificationEmail']
-        
+
         subject = f"Unable to Process Video: {video_title}"
         
         body_html = f"""
@@ -465,7 +1512,8 @@ def notify_failure(channel_id, video_title, video_url, table):
         """
         
         try:
-            ses.send_email(
+            ses_limiter.call(
+                ses.send_email,
                 Source=SES_SOURCE_EMAIL,
                 Destination={'ToAddresses': [email]},
                 Message={
@@ -1,104 +1,144 @@
 import re
+from html import escape
+
+# Block patterns, matched against a line with trailing whitespace removed
+HEADER_RE = re.compile(r'^\s*(#+)\s*(.*)$')
+HR_RE = re.compile(r'^\s*(?:---|\*\*\*|___)\s*$')
+LIST_ITEM_RE = re.compile(r'^(\s*)(?:([-*])|(\d+)\.)\s+(.*)$')
+
+# Inline tokens: a code span, or an emphasis delimiter
+INLINE_TOKEN_RE = re.compile(r'(`+)(.+?)\1|\*\*|__|\*|_')
+INLINE_SPECIAL_RE = re.compile(r'[*_`]')
+
+EMPHASIS_TAGS = {'**': 'strong', '__': 'strong', '*': 'em', '_': 'em'}
+
+# Nested list items are indented by at least this many columns more than their parent
+NESTED_INDENT = 2
+TAB_WIDTH = 4
 
 def convert_markdown_to_html(text):
+    """
+    Renders the Markdown subset the agent writes (headers, paragraphs, rules, nested bullet and
+    numbered lists, bold, italics and code spans) as HTML. All text is HTML-escaped.
+    """
     if not text:
         return ""
 
-    lines = text.split('\n')
     html_output = []
-    
-    # State tracking
-    state = {'in_list': False, 'list_type': None}
-    
-    def close_list():
-        if state['in_list']:
-            html_output.append(f"</{state['list_type']}>")
-            state['in_list'] = False
-            state['list_type'] = None
-
-    for line in lines:
-        stripped = line.strip()
-        
-        # Empty line
-        if not stripped:
-            close_list()
-            continue
 
-        # Headers
-        if stripped.startswith('#'):
-            close_list()
-            # Determine level
-            level = 0
-            for char in stripped:
-                if char == '#':
-                    level += 1
-                else:
-                    break
-            
-            # Extract content if there is a space after headers, e.g. "### Title"
-            # If "###Title" (no space), treat as header
-            content = stripped[level:].strip()
-            
-            if 1 <= level <= 6:
-                html_output.append(f"<h{level}>{parse_inline(content)}</h{level}>")
-            else:
-                # Treat as normal text if too many #'s? Or just h6?
-                html_output.append(f"<p>{parse_inline(stripped)}</p>")
+    # Open lists, innermost last, as (indent, tag). The last <li> of every open list is still open.
+    lists = []
+
+    def close_lists(indent=-1):
+        """Closes every open list that is indented deeper than indent"""
+        while lists and lists[-1][0] > indent:
+            html_output[-1] += "</li>"
+            html_output.append(f"</{lists.pop()[1]}>")
+
+    for line in text.split('\n'):
+        line = line.rstrip().expandtabs(TAB_WIDTH)
+
+        # Empty line
+        if not line:
+            close_lists()
             continue
 
         # Horizontal Rule
-        if stripped in ['---', '***', '___']:
-            close_list()
+        if HR_RE.match(line):
+            close_lists()
             html_output.append("<hr>")
             continue
-            
+
         # Lists
-        is_ul = stripped.startswith('- ') or stripped.startswith('* ')
-        is_ol = re.match(r'^\d+\.\s', stripped)
-        
-        if is_ul or is_ol:
-            new_type = 'ul' if is_ul else 'ol'
-            
-            # If we are in a list but of different type, close it
-            if state['in_list'] and state['list_type'] != new_type:
-                close_list()
-                
-            # Start new list if needed
-            if not state['in_list']:
-                state['in_list'] = True
-                state['list_type'] = new_type
-                html_output.append(f"<{new_type}>")
-            
-            # Extract content
-            if is_ul:
-                content = stripped[2:] 
+        item = LIST_ITEM_RE.match(line)
+        if item:
+            indent = len(item.group(1))
+            tag = 'ul' if item.group(2) else 'ol'
+
+            # Close lists nested deeper than this item
+            close_lists(indent)
+
+            if lists and indent >= lists[-1][0] + NESTED_INDENT:
+                # Nested inside the open item
+                lists.append((indent, tag))
+                html_output.append(f"<{tag}>")
+            elif lists and lists[-1][1] == tag:
+                # Sibling item
+                html_output[-1] += "</li>"
+            else:
+                # First item, or a list of a different type at the same level
+                close_lists(indent - 1)
+                lists.append((indent, tag))
+                html_output.append(f"<{tag}>")
+
+            html_output.append(f"<li>{parse_inline(item.group(4))}")
+            continue
+
+        close_lists()
+        stripped = line.strip()
+
+        # Headers
+        header = HEADER_RE.match(stripped)
+        if header:
+            level = len(header.group(1))
+            if level <= 6:
+                html_output.append(f"<h{level}>{parse_inline(header.group(2))}</h{level}>")
             else:
-                # Remove "1. " or "10. "
-                content = re.sub(r'^\d+\.\s', '', stripped, count=1)
-                
-            html_output.append(f"<li>{parse_inline(content)}</li>")
+                html_output.append(f"<p>{parse_inline(stripped)}</p>")
             continue
-            
+
         # Paragraph (non-list, non-header, non-hr, non-empty)
-        # If we were in a list, this line breaks the list (simple parser behavior)
-        close_list() 
         html_output.append(f"<p>{parse_inline(stripped)}</p>")
-        
-    close_list()
+
+    close_lists()
     return "\n".join(html_output)
 
 def parse_inline(text):
-    # Bold **text**
-    text = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', text)
-    # Bold __text__
-    text = re.sub(r'__(.*?)__', r'<strong>\1</strong>', text)
-    
-    # Italic *text* (naive: matches pairs regardless of words)
-    # Use negated character class to avoid matching across * * pairs incorrectly if they are far apart
-    # But usually *word* is fine.
-    # Note: This regex `\*([^\*]+)\*` says "match * then anything that is NOT * then *"
-    # This prevents `*bold* and *bold*` from becoming `<em>bold* and *bold</em>`
-    text = re.sub(r'\*([^\*]+)\*', r'<em>\1</em>', text)
-    text = re.sub(r'_([^_]+)_', r'<em>\1</em>', text)
-    
-    return text
+    """
+    Renders inline Markdown in a single scan. Emphasis delimiters are paired with a stack, so
+    unmatched delimiters stay literal; code span contents are not parsed.
+    """
+    # Most lines have no markup at all
+    if not INLINE_SPECIAL_RE.search(text):
+        return escape(text, quote=False)
+
+    output = []
+    # Unclosed delimiters as (delimiter, index of its placeholder in output)
+    openers = []
+    position = 0
+
+    for token in INLINE_TOKEN_RE.finditer(text):
+        start, end = token.span()
+        if start > position:
+            output.append(escape(text[position:start], quote=False))
+        position = end
+
+        # Code span
+        if token.group(1):
+            output.append(f"<code>{escape(token.group(2).strip(), quote=False)}</code>")
+            continue
+
+        delimiter = token.group(0)
+
+        # snake_case identifiers are not emphasis
+        if delimiter[0] == '_' and start > 0 and end < len(text) and text[start - 1].isalnum() and text[end].isalnum():
+            output.append(delimiter)
+            continue
+
+        opener = next((i for i in range(len(openers) - 1, -1, -1) if openers[i][0] == delimiter), None)
+
+        # Close the innermost matching opener, unless that would produce empty emphasis
+        if opener is not None and openers[opener][1] < len(output) - 1:
+            tag = EMPHASIS_TAGS[delimiter]
+            output[openers[opener][1]] = f"<{tag}>"
+            output.append(f"</{tag}>")
+            # Openers inside the closed span can no longer be closed and stay literal
+            del openers[opener:]
+        else:
+            openers.append((delimiter, len(output)))
+            output.append(delimiter)
+
+    if position < len(text):
+        output.append(escape(text[position:], quote=False))
+
+    return "".join(output)
@@ -0,0 +1,72 @@
+import time
+import random
+import threading
+from contextlib import contextmanager
+
+# Error codes AWS services use when a caller exceeds its request or send rate
+THROTTLING_ERROR_CODES = {'Throttling', 'ThrottlingException', 'TooManyRequestsException', 'RequestLimitExceeded'}
+
+def is_throttling_error(error):
+    code = getattr(error, 'response', {}).get('Error', {}).get('Code')
+    return code in THROTTLING_ERROR_CODES
+
+class RateLimiter:
+    """
+    Token bucket plus a cap on in-flight calls, shared by every thread that calls one service.
+
+    Tokens refill at `rate` per second up to `burst`. A call that needs more tokens than the bucket
+    holds waits for the bucket to fill and then borrows the rest, so large batches are admitted and
+    the callers after them wait for the debt to be repaid. Throttling errors that still get through
+    are retried with full-jitter exponential backoff.
+    """
+
+    def __init__(self, rate, max_concurrency, burst=None, max_attempts=5, base_delay=0.1, max_delay=5.0, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst or rate
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+    def acquire(self, tokens=1):
+        """Blocks until `tokens` sends are allowed"""
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                needed = min(tokens, self.burst)
+                if self._tokens >= needed:
+                    self._tokens -= tokens
+                    return
+
+                wait = (needed - self._tokens) / self.rate
+
+            self._sleep(wait)
+
+    def backoff(self, attempt):
+        self._sleep(random.uniform(0, min(self.base_delay * 2 ** attempt, self.max_delay)))
+
+    @contextmanager
+    def slot(self, tokens=1):
+        """Holds one of the concurrency slots for the duration of a call that consumes `tokens`"""
+        with self._slots:
+            self.acquire(tokens)
+            yield
+
+    def call(self, fn, *args, tokens=1, **kwargs):
+        """Calls fn within the rate and concurrency limits, retrying throttling errors. Other errors propagate."""
+        for attempt in range(self.max_attempts):
+            try:
+                with self.slot(tokens):
+                    return fn(*args, **kwargs)
+            except Exception as e:
+                if not is_throttling_error(e) or attempt == self.max_attempts - 1:
+                    raise
+                self.backoff(attempt)
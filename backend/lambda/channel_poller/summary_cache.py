@@ -0,0 +1,23 @@
+import hashlib
+import time
+
+# Default model used by the agent runtime, part of the cache key so a model change never serves stale summaries
+DEFAULT_MODEL_ID = 'us.amazon.nova-2-lite-v1:0'
+
+def summary_cache_key(video_id, prompt, model_id):
+    """
+    Key of the cached summary for (video, prompt, model).
+    PK = SUMMARY#<videoId>, SK = PROMPT#<sha256(prompt)>#MODEL#<modelId>
+    """
+    prompt_hash = hashlib.sha256((prompt or '').encode('utf-8')).hexdigest()
+    return {'userId': f"SUMMARY#{video_id}", 'targetId': f"PROMPT#{prompt_hash}#MODEL#{model_id}"}
+
+def get_cached_summary(table, video_id, prompt, model_id):
+    """
+    Returns the cached summary, or None when missing or expired (TTL deletion can lag behind expiresAt).
+    The agent is the only writer: it caches a summary once it has seen the transcript.
+    """
+    item = table.get_item(Key=summary_cache_key(video_id, prompt, model_id)).get('Item')
+    if not item or int(item.get('expiresAt', 0)) <= time.time():
+        return None
+    return item.get('summary')
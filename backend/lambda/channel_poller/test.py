@@ -1,9 +1,12 @@
 import unittest
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, patch, DEFAULT
 import sys
 import os
+import re
 import json
-from datetime import datetime, timezone
+import time
+import timeit
+from datetime import datetime, timedelta, timezone
 
 # Add directory to path to import main
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -26,22 +29,37 @@ def identity_decorator(func=None, **kwargs):
 
 mock_logger.inject_lambda_context.side_effect = identity_decorator
 mock_powertools.Logger.return_value = mock_logger
+mock_metrics = MagicMock()
+mock_metrics.log_metrics.side_effect = identity_decorator
+mock_powertools.Metrics.return_value = mock_metrics
 sys.modules['aws_lambda_powertools'] = mock_powertools
+sys.modules['aws_lambda_powertools.metrics'] = MagicMock()
 
 # Set Environment Variables required by main.py
 os.environ['TABLE_NAME'] = 'TEST_TABLE'
 os.environ['SES_SOURCE_EMAIL'] = 'test@example.com'
 os.environ['AGENT_RUNTIME_ARN'] = 'arn:aws:bedrock:us-east-1:123456789012:agent-runtime/test-agent'
+# Keep the SES rate limiter out of the way of tests that send in bulk
+os.environ['SES_MAX_SEND_RATE'] = '100000'
 
+import main
 from main import handler, process_channel
+from markdown_utils import convert_markdown_to_html
+from rate_limiter import RateLimiter
+from feed_client import FeedClient, FeedResponse
 
 class TestChannelPoller(unittest.TestCase):
-    
+
+    def setUp(self):
+        # Feed validators are cached per container, start every test cold
+        main._feed_cache.clear()
+        mock_metrics.reset_mock()
+
     @patch('main.dynamodb')
     @patch('main.agentcore')
     @patch('main.ses')
-    @patch('main.urllib.request.urlopen')
-    def test_poller_new_video_fresh(self, mock_urlopen, mock_ses, mock_bedrock, mock_dynamodb):
+    @patch('main.feed_client.get')
+    def test_poller_new_video_fresh(self, mock_feed_get, mock_ses, mock_bedrock, mock_dynamodb):
         # Mock Feed content (Fresh video)
         now = datetime.now(timezone.utc)
         rss_content = f"""
@@ -55,19 +73,15 @@ class TestChannelPoller(unittest.TestCase):
          </entry>
         </feed>
         """
-        mock_response = MagicMock()
-        mock_response.read.return_value = rss_content.encode('utf-8')
-        mock_response.__enter__.return_value = mock_response
-        mock_urlopen.return_value = mock_response
+        self._mock_feed(mock_feed_get, rss_content)
         
         # Mock DynamoDB Table
         mock_table = MagicMock()
         mock_dynamodb.Table.return_value = mock_table
+        self._route_batch_get(mock_dynamodb, mock_table)
         
         # Mock Scan response (channels)
-        mock_table.scan.return_value = {
-            'Items': [{'targetId': 'SUBSCRIPTION#CHANNEL1'}]
-        }
+        self._mock_registry(mock_table, {'CHANNEL1': ''})
         
         # Mock Tracker Get (None = First Run)
         mock_table.get_item.return_value = {} # No tracker yet
@@ -107,8 +121,8 @@ class TestChannelPoller(unittest.TestCase):
     @patch('main.dynamodb')
     @patch('main.agentcore')
     @patch('main.ses')
-    @patch('main.urllib.request.urlopen')
-    def test_poller_new_video_stale(self, mock_urlopen, mock_ses, mock_bedrock, mock_dynamodb):
+    @patch('main.feed_client.get')
+    def test_poller_new_video_stale(self, mock_feed_get, mock_ses, mock_bedrock, mock_dynamodb):
         # Mock Feed content (Stale video > 24h old)
         old_date = datetime(2025, 1, 1, 12, 0, 0, tzinfo=timezone.utc).isoformat()
         rss_content = f"""
@@ -122,17 +136,13 @@ class TestChannelPoller(unittest.TestCase):
          </entry>
         </feed>
         """
-        mock_response = MagicMock()
-        mock_response.read.return_value = rss_content.encode('utf-8')
-        mock_response.__enter__.return_value = mock_response
-        mock_urlopen.return_value = mock_response
+        self._mock_feed(mock_feed_get, rss_content)
         
         # Mock DynamoDB
         mock_table = MagicMock()
         mock_dynamodb.Table.return_value = mock_table
-        mock_table.scan.return_value = {
-            'Items': [{'targetId': 'SUBSCRIPTION#CHANNEL1'}]
-        }
+        self._route_batch_get(mock_dynamodb, mock_table)
+        self._mock_registry(mock_table, {'CHANNEL1': ''})
         # First Run (No tracker)
         mock_table.get_item.return_value = {} 
         
@@ -143,16 +153,14 @@ class TestChannelPoller(unittest.TestCase):
         # Should NOT send email
         mock_ses.send_email.assert_not_called()
         # Should UPDATE tracker
-        mock_table.put_item.assert_called()
-        call_args = mock_table.put_item.call_args[1]
-        self.assertEqual(call_args['Item']['lastVideoId'], 'VIDEO123')
+        self.assertEqual(self._last_tracker_update(mock_table)['lastVideoId'], 'VIDEO123')
 
     @patch('main.dynamodb')
     @patch('main.agentcore')
     @patch('main.ses')
-    @patch('main.urllib.request.urlopen')
+    @patch('main.feed_client.get')
 
-    def test_poller_no_new_video(self, mock_urlopen, mock_ses, mock_bedrock, mock_dynamodb):
+    def test_poller_no_new_video(self, mock_feed_get, mock_ses, mock_bedrock, mock_dynamodb):
          # Mock Feed content
         rss_content = """
         <feed xmlns:yt="http://www.youtube.com/xml/schemas/2015" xmlns:media="http://search.yahoo.com/mrss/" xmlns="http://www.w3.org/2005/Atom">
@@ -163,15 +171,13 @@ class TestChannelPoller(unittest.TestCase):
          </entry>
         </feed>
         """
-        mock_response = MagicMock()
-        mock_response.read.return_value = rss_content.encode('utf-8')
-        mock_response.__enter__.return_value = mock_response
-        mock_urlopen.return_value = mock_response
+        self._mock_feed(mock_feed_get, rss_content)
         
         # Mock Table
         mock_table = MagicMock()
         mock_dynamodb.Table.return_value = mock_table
-        mock_table.scan.return_value = {'Items': [{'targetId': 'SUBSCRIPTION#CHANNEL1'}]}
+        self._route_batch_get(mock_dynamodb, mock_table)
+        self._mock_registry(mock_table, {'CHANNEL1': ''})
         
         # Mock Tracker Get (SAME VIDEO ID)
         mock_table.get_item.return_value = {'Item': {'lastVideoId': 'VIDEO123'}}
@@ -186,8 +192,8 @@ class TestChannelPoller(unittest.TestCase):
     @patch('main.dynamodb')
     @patch('main.agentcore')
     @patch('main.ses')
-    @patch('main.urllib.request.urlopen')
-    def test_poller_new_video_raw_stream(self, mock_urlopen, mock_ses, mock_bedrock, mock_dynamodb):
+    @patch('main.feed_client.get')
+    def test_poller_new_video_raw_stream(self, mock_feed_get, mock_ses, mock_bedrock, mock_dynamodb):
         # Mock Feed content (Fresh video)
         now = datetime.now(timezone.utc)
         rss_content = f"""
@@ -201,15 +207,13 @@ class TestChannelPoller(unittest.TestCase):
          </entry>
         </feed>
         """
-        mock_response = MagicMock()
-        mock_response.read.return_value = rss_content.encode('utf-8')
-        mock_response.__enter__.return_value = mock_response
-        mock_urlopen.return_value = mock_response
+        self._mock_feed(mock_feed_get, rss_content)
         
         # Mock DynamoDB
         mock_table = MagicMock()
         mock_dynamodb.Table.return_value = mock_table
-        mock_table.scan.return_value = {'Items': [{'targetId': 'SUBSCRIPTION#CHANNEL1', 'channelTitle': 'Test Channel'}]}
+        self._route_batch_get(mock_dynamodb, mock_table)
+        self._mock_registry(mock_table, {'CHANNEL1': 'Test Channel'})
         
         # Mock Tracker and User Profile
         def get_item_side_effect(Key):
@@ -241,8 +245,8 @@ class TestChannelPoller(unittest.TestCase):
     @patch('main.dynamodb')
     @patch('main.agentcore')
     @patch('main.ses')
-    @patch('main.urllib.request.urlopen')
-    def test_email_markdown_formatting(self, mock_urlopen, mock_ses, mock_bedrock, mock_dynamodb):
+    @patch('main.feed_client.get')
+    def test_email_markdown_formatting(self, mock_feed_get, mock_ses, mock_bedrock, mock_dynamodb):
         # Mock Feed content
         now = datetime.now(timezone.utc)
         rss_content = f"""
@@ -255,15 +259,13 @@ class TestChannelPoller(unittest.TestCase):
          </entry>
         </feed>
         """
-        mock_response = MagicMock()
-        mock_response.read.return_value = rss_content.encode('utf-8')
-        mock_response.__enter__.return_value = mock_response
-        mock_urlopen.return_value = mock_response
+        self._mock_feed(mock_feed_get, rss_content)
         
         # Mock DynamoDB
         mock_table = MagicMock()
         mock_dynamodb.Table.return_value = mock_table
-        mock_table.scan.return_value = {'Items': [{'targetId': 'SUBSCRIPTION#CHANNEL_MD'}]}
+        self._route_batch_get(mock_dynamodb, mock_table)
+        self._mock_registry(mock_table, {'CHANNEL_MD': ''})
         mock_table.get_item.return_value = {} # No tracker yet
         
         # Mock Subscribers
@@ -302,16 +304,17 @@ class TestChannelPoller(unittest.TestCase):
     @patch('main.dynamodb')
     @patch('main.agentcore')
     @patch('main.ses')
-    @patch('main.urllib.request.urlopen')
-    def test_retry_increment(self, mock_urlopen, mock_ses, mock_bedrock, mock_dynamodb):
+    @patch('main.feed_client.get')
+    def test_retry_increment(self, mock_feed_get, mock_ses, mock_bedrock, mock_dynamodb):
         # Mock Feed
         rss_content = self._create_rss("VIDEO_RETRY", "Retry Video", datetime.now(timezone.utc).isoformat())
-        self._mock_feed(mock_urlopen, rss_content)
+        self._mock_feed(mock_feed_get, rss_content)
         
         # Mock DynamoDB
         mock_table = MagicMock()
         mock_dynamodb.Table.return_value = mock_table
-        mock_table.scan.return_value = {'Items': [{'targetId': 'SUBSCRIPTION#CHANNEL_RETRY'}]}
+        self._route_batch_get(mock_dynamodb, mock_table)
+        self._mock_registry(mock_table, {'CHANNEL_RETRY': ''})
         
         # Mock Tracker (First attempt, no previous retry)
         mock_table.get_item.return_value = {'Item': {'lastVideoId': 'OLD_VIDEO'}}
@@ -343,9 +346,8 @@ class TestChannelPoller(unittest.TestCase):
         mock_ses.send_email.assert_not_called()
         
         # Should UPDATE tracker with retry info
-        # Check the last call to put_item
-        call_args = mock_table.put_item.call_args[1]
-        item = call_args['Item']
+        # Check the last tracker update
+        item = self._last_tracker_update(mock_table)
         self.assertEqual(item['pendingVideoId'], 'VIDEO_RETRY')
         self.assertEqual(item['retryCount'], 0) # 0 start, incremented to 0? Wait, logic is: retry_count = tracker else 0. new video -> retry=0. notify fails -> retry=retry (0). Next run it will be pending so retry=1. 
         # Wait, if failure, we want to start tracking.
@@ -360,19 +362,191 @@ class TestChannelPoller(unittest.TestCase):
         # So first failure sets retryCount=0. 
         self.assertEqual(item['retryCount'], 0)
 
+        # The retry is scheduled one base delay out (+/-10% jitter)
+        delay = item['nextAttemptAt'] - time.time()
+        self.assertGreater(delay, main.RETRY_BASE_DELAY_SECONDS * 0.9 - 5)
+        self.assertLess(delay, main.RETRY_BASE_DELAY_SECONDS * 1.1 + 5)
+
+    @patch('main.dynamodb')
+    @patch('main.agentcore')
+    @patch('main.ses')
+    @patch('main.feed_client.get')
+    def test_overlapping_runs_notify_once(self, mock_feed_get, mock_ses, mock_bedrock, mock_dynamodb):
+        rss_content = self._create_rss("VIDEO_RACE1", "Race Video", datetime.now(timezone.utc).isoformat())
+        self._mock_feed(mock_feed_get, rss_content)
+
+        mock_table = MagicMock()
+        mock_dynamodb.Table.return_value = mock_table
+        self._route_batch_get(mock_dynamodb, mock_table)
+        mock_table.query.return_value = {'Items': [{'userId': 'user1', 'targetId': 'SUBSCRIPTION#CHANNEL_RACE'}]}
+
+        # Tracker honouring the lease and owner conditions of claim and release
+        tracker = {'lastVideoId': 'OLD'}
+        self._route_tracker_updates(mock_table, tracker)
+
+        def get_item_side_effect(Key):
+            if Key.get('targetId') == 'PROFILE#data':
+                return {'Item': {'emailNotificationsEnabled': True, 'notificationEmail': 'test@example.com'}}
+            if Key.get('targetId') == 'CHANNEL#CHANNEL_RACE':
+                return {'Item': dict(tracker)}
+            return {}
+        mock_table.get_item.side_effect = get_item_side_effect
+
+        # A second run starts while the first is still summarizing
+        results = []
+        def invoke_side_effect(**kwargs):
+            main._feed_cache.clear()
+            results.append(process_channel('Race', 'CHANNEL_RACE', mock_table))
+            return {'completion': [{'chunk': {'bytes': b'Summary'}}]}
+        mock_bedrock.invoke_agent_runtime.side_effect = invoke_side_effect
+
+        result = process_channel('Race', 'CHANNEL_RACE', mock_table)
+
+        # Assertions
+        self.assertEqual(result, 'notified')
+        self.assertEqual(results, ['claimed_elsewhere'])
+        mock_ses.send_email.assert_called_once()
+        self.assertEqual(tracker['lastVideoId'], 'VIDEO_RACE1')
+        self.assertNotIn('leaseOwner', tracker)
+        self.assertNotIn('pendingVideoId', tracker)
+
+    @patch('main.dynamodb')
+    @patch('main.agentcore')
+    @patch('main.ses')
+    @patch('main.feed_client.get')
+    def test_websub_push_processes_channel(self, mock_feed_get, mock_ses, mock_bedrock, mock_dynamodb):
+        from websub import FakeHub, function_url_event, topic_url
+
+        rss_content = self._create_rss("VIDEO_PUSH1", "Pushed Video", datetime.now(timezone.utc).isoformat(), channel_id='CHANNEL_PUSH')
+        self._mock_feed(mock_feed_get, rss_content)
+
+        mock_table = MagicMock()
+        mock_dynamodb.Table.return_value = mock_table
+        self._route_batch_get(mock_dynamodb, mock_table)
+        mock_table.query.return_value = {'Items': [{'userId': 'user1', 'targetId': 'SUBSCRIPTION#CHANNEL_PUSH'}]}
+        mock_bedrock.invoke_agent_runtime.return_value = {'completion': [{'chunk': {'bytes': b'Summary'}}]}
+
+        tracker = {'lastVideoId': 'OLD'}
+        self._route_tracker_updates(mock_table, tracker)
+
+        def get_item_side_effect(Key):
+            if Key.get('targetId') == 'PROFILE#data':
+                return {'Item': {'emailNotificationsEnabled': True, 'notificationEmail': 'test@example.com'}}
+            if Key == {'userId': 'CHANNEL_REGISTRY', 'targetId': 'CHANNEL#CHANNEL_PUSH'}:
+                return {'Item': {'channelTitle': 'Push Channel', 'subscriberCount': 1}}
+            if Key == {'userId': 'system', 'targetId': 'CHANNEL#CHANNEL_PUSH'}:
+                return {'Item': dict(tracker)}
+            return {}
+        mock_table.get_item.side_effect = get_item_side_effect
+
+        hub = FakeHub(main.websub_handler)
+        with patch('main.websub_hub', hub), patch('main.WEBSUB_CALLBACK_URL', 'https://callback.example/'), patch('main.WEBSUB_SECRET', 's3cret'):
+            # The poller subscribes, the hub verifies against the callback and the lease is recorded
+            self.assertEqual(main.renew_websub_subscriptions({'CHANNEL_PUSH': 'Push Channel'}, {}), ['CHANNEL_PUSH'])
+            self.assertEqual(len(hub.callbacks(topic_url('CHANNEL_PUSH'))), 1)
+            self.assertGreater(tracker['websubLeaseExpiresAt'], time.time() + main.WEBSUB_RENEW_BEFORE_SECONDS)
+
+            # A lease that is not about to expire is left alone
+            self.assertEqual(main.renew_websub_subscriptions({'CHANNEL_PUSH': 'Push Channel'}, {'CHANNEL_PUSH': dict(tracker)}), [])
+
+            # Nor is a request the hub has not verified yet, until WEBSUB_REQUEST_RETRY_SECONDS have passed
+            self.assertEqual(main.renew_websub_subscriptions({'CHANNEL_PUSH': 'Push Channel'}, {'CHANNEL_PUSH': {'websubRequestedAt': int(time.time())}}), [])
+
+            # A lease about to expire is renewed on the same callback, so the hub keeps one subscription
+            expiring = {**tracker, 'websubLeaseExpiresAt': int(time.time()) + 60, 'websubRequestedAt': 0}
+            self.assertEqual(main.renew_websub_subscriptions({'CHANNEL_PUSH': 'Push Channel'}, {'CHANNEL_PUSH': expiring}), ['CHANNEL_PUSH'])
+            self.assertEqual(len(hub.callbacks(topic_url('CHANNEL_PUSH'))), 1)
+            self.assertGreater(tracker['websubLeaseExpiresAt'], time.time() + main.WEBSUB_RENEW_BEFORE_SECONDS)
+
+            # Unsigned notifications are acknowledged and ignored
+            response = main.websub_handler(function_url_event('POST', body=rss_content), None)
+            self.assertEqual(response['statusCode'], 202)
+            mock_ses.send_email.assert_not_called()
+
+            # A push runs the channel straight away, once
+            responses = hub.publish(topic_url('CHANNEL_PUSH'), rss_content)
+
+            # Requests beyond WEBSUB_MAX_REQUESTS_PER_RUN wait for a later run
+            with patch('main.WEBSUB_MAX_REQUESTS_PER_RUN', 1):
+                renewed = main.renew_websub_subscriptions({'CHANNEL_LATER': 'Later', 'CHANNEL_LAST': 'Last'}, {})
+            self.assertEqual(renewed, ['CHANNEL_LATER'])
+
+        # Assertions
+        self.assertEqual(len(responses), 1)
+        self.assertEqual(json.loads(responses[0]['body'])['results'], {'CHANNEL_PUSH': 'notified'})
+        mock_ses.send_email.assert_called_once()
+        self.assertEqual(tracker['lastVideoId'], 'VIDEO_PUSH1')
+        # Polling falls back to a low frequency while pushes arrive
+        self.assertGreaterEqual(tracker['nextPollAt'], time.time() + main.WEBSUB_FALLBACK_POLL_SECONDS * 0.9 - 5)
+
+    @patch('main.dynamodb')
+    def test_websub_verification_requires_pending_request(self, mock_dynamodb):
+        from websub import function_url_event, topic_url
+
+        mock_table = MagicMock()
+        mock_dynamodb.Table.return_value = mock_table
+        tracker = {}
+        self._route_tracker_updates(mock_table, tracker)
+
+        def get_item_side_effect(Key):
+            if Key == {'userId': 'CHANNEL_REGISTRY', 'targetId': 'CHANNEL#CHANNEL_V'}:
+                return {'Item': {'subscriberCount': 1}}
+            if Key == {'userId': 'system', 'targetId': 'CHANNEL#CHANNEL_V'}:
+                return {'Item': dict(tracker)}
+            return {}
+        mock_table.get_item.side_effect = get_item_side_effect
+
+        def verify(**query):
+            return main.websub_handler(function_url_event('GET', query={
+                'hub.mode': 'subscribe', 'hub.topic': topic_url('CHANNEL_V'), 'hub.challenge': 'c', 'hub.lease_seconds': '864000', **query
+            }), None)
+
+        # Nothing was requested: forged verifications are refused
+        self.assertEqual(verify()['statusCode'], 404)
+        self.assertEqual(verify(nonce='guess')['statusCode'], 404)
+
+        # A pending request is verified once, with the lease capped at the one requested
+        tracker.update(websubNonce='n1', websubRequestedLease=3600)
+        self.assertEqual(verify(nonce='wrong')['statusCode'], 404)
+        response = verify(nonce='n1')
+        self.assertEqual(response['statusCode'], 200)
+        self.assertEqual(response['body'], 'c')
+        self.assertAlmostEqual(tracker['websubLeaseExpiresAt'], time.time() + 3600, delta=5)
+        self.assertNotIn('websubRequestedLease', tracker)
+        self.assertEqual(verify(nonce='n1')['statusCode'], 404)
+
+    @patch('main.feed_client.get')
+    def test_pending_retry_waits_for_next_attempt(self, mock_feed_get):
+        mock_table = MagicMock()
+        mock_table.get_item.return_value = {'Item': {'lastVideoId': 'OLD', 'pendingVideoId': 'VIDEO_WAIT', 'retryCount': 1, 'nextAttemptAt': int(time.time()) + 600}}
+
+        result = process_channel('Channel', 'CHANNEL_WAIT', mock_table)
+
+        # Assertions
+        self.assertEqual(result, 'retry_not_due')
+        mock_feed_get.assert_not_called()
+        mock_table.update_item.assert_not_called()
+
+    def test_retry_backoff_is_exponential_and_capped(self):
+        with patch('main.random.uniform', return_value=1.0), patch('main.time.time', return_value=1000):
+            self.assertEqual(main.retry_due_at(0), 1000 + main.RETRY_BASE_DELAY_SECONDS)
+            self.assertEqual(main.retry_due_at(2), 1000 + min(main.RETRY_BASE_DELAY_SECONDS * 4, main.RETRY_MAX_DELAY_SECONDS))
+            self.assertEqual(main.retry_due_at(30), 1000 + main.RETRY_MAX_DELAY_SECONDS)
+
     @patch('main.dynamodb')
     @patch('main.agentcore')
     @patch('main.ses')
-    @patch('main.urllib.request.urlopen')
-    def test_max_retries_exceeded(self, mock_urlopen, mock_ses, mock_bedrock, mock_dynamodb):
+    @patch('main.feed_client.get')
+    def test_max_retries_exceeded(self, mock_feed_get, mock_ses, mock_bedrock, mock_dynamodb):
         # Mock Feed
         rss_content = self._create_rss("VIDEO_MAX", "Max Retry Video", datetime.now(timezone.utc).isoformat())
-        self._mock_feed(mock_urlopen, rss_content)
+        self._mock_feed(mock_feed_get, rss_content)
         
         # Mock DynamoDB
         mock_table = MagicMock()
         mock_dynamodb.Table.return_value = mock_table
-        mock_table.scan.return_value = {'Items': [{'targetId': 'SUBSCRIPTION#CHANNEL_MAX'}]}
+        self._route_batch_get(mock_dynamodb, mock_table)
+        self._mock_registry(mock_table, {'CHANNEL_MAX': ''})
         
         # Mock Tracker (Retry count 4 - triggers max retry logic)
         # Actually logic is > 3. So if we enter with 3, we inc to 4. 
@@ -406,8 +580,7 @@ class TestChannelPoller(unittest.TestCase):
         self.assertIn('Unable to Process Video', call_args['Message']['Subject']['Data'])
         
         # Should clear pending state
-        call_args_db = mock_table.put_item.call_args[1]
-        item = call_args_db['Item']
+        item = self._last_tracker_update(mock_table)
         self.assertEqual(item['lastVideoId'], 'VIDEO_MAX')
         self.assertIsNone(item['pendingVideoId'])
         self.assertEqual(item['retryCount'], 0)
@@ -415,16 +588,17 @@ class TestChannelPoller(unittest.TestCase):
     @patch('main.dynamodb')
     @patch('main.agentcore')
     @patch('main.ses')
-    @patch('main.urllib.request.urlopen')
-    def test_success_after_retry(self, mock_urlopen, mock_ses, mock_bedrock, mock_dynamodb):
+    @patch('main.feed_client.get')
+    def test_success_after_retry(self, mock_feed_get, mock_ses, mock_bedrock, mock_dynamodb):
         # Mock Feed
         rss_content = self._create_rss("VIDEO_SUCCESS", "Success Video", datetime.now(timezone.utc).isoformat())
-        self._mock_feed(mock_urlopen, rss_content)
+        self._mock_feed(mock_feed_get, rss_content)
         
         # Mock DynamoDB
         mock_table = MagicMock()
         mock_dynamodb.Table.return_value = mock_table
-        mock_table.scan.return_value = {'Items': [{'targetId': 'SUBSCRIPTION#CHANNEL_S'}]}
+        self._route_batch_get(mock_dynamodb, mock_table)
+        self._mock_registry(mock_table, {'CHANNEL_S': ''})
         
         # Mock Tracker (Retry count 2)
         def get_item_side_effect(Key):
@@ -454,8 +628,7 @@ class TestChannelPoller(unittest.TestCase):
         self.assertIn('New Video Summary', mock_ses.send_email.call_args[1]['Message']['Subject']['Data'])
         
         # Should clear pending state
-        call_args_db = mock_table.put_item.call_args[1]
-        item = call_args_db['Item']
+        item = self._last_tracker_update(mock_table)
         self.assertEqual(item['lastVideoId'], 'VIDEO_SUCCESS')
         self.assertIsNone(item['pendingVideoId'])
         self.assertEqual(item['retryCount'], 0)
@@ -463,16 +636,17 @@ class TestChannelPoller(unittest.TestCase):
     @patch('main.dynamodb')
     @patch('main.agentcore')
     @patch('main.ses')
-    @patch('main.urllib.request.urlopen')
-    def test_custom_channel_prompt(self, mock_urlopen, mock_ses, mock_bedrock, mock_dynamodb):
+    @patch('main.feed_client.get')
+    def test_custom_channel_prompt(self, mock_feed_get, mock_ses, mock_bedrock, mock_dynamodb):
         # Mock Feed
         rss_content = self._create_rss("VIDEO_CUSTOM", "Custom Prompt Video", datetime.now(timezone.utc).isoformat())
-        self._mock_feed(mock_urlopen, rss_content)
+        self._mock_feed(mock_feed_get, rss_content)
         
         # Mock DynamoDB
         mock_table = MagicMock()
         mock_dynamodb.Table.return_value = mock_table
-        mock_table.scan.return_value = {'Items': [{'targetId': 'SUBSCRIPTION#CHANNEL_CUSTOM'}]}
+        self._route_batch_get(mock_dynamodb, mock_table)
+        self._mock_registry(mock_table, {'CHANNEL_CUSTOM': ''})
         
         # Mock Tracker
         mock_table.get_item.return_value = {'Item': {'lastVideoId': 'OLD'}}
@@ -514,16 +688,17 @@ class TestChannelPoller(unittest.TestCase):
     @patch('main.dynamodb')
     @patch('main.agentcore')
     @patch('main.ses')
-    @patch('main.urllib.request.urlopen')
-    def test_poller_transcript_unavailable(self, mock_urlopen, mock_ses, mock_bedrock, mock_dynamodb):
+    @patch('main.feed_client.get')
+    def test_poller_transcript_unavailable(self, mock_feed_get, mock_ses, mock_bedrock, mock_dynamodb):
         # Mock Feed
         rss_content = self._create_rss("VIDEO_NO_TRANSCRIPT", "No Transcript Video", datetime.now(timezone.utc).isoformat())
-        self._mock_feed(mock_urlopen, rss_content)
+        self._mock_feed(mock_feed_get, rss_content)
         
         # Mock DynamoDB
         mock_table = MagicMock()
         mock_dynamodb.Table.return_value = mock_table
-        mock_table.scan.return_value = {'Items': [{'targetId': 'SUBSCRIPTION#CHANNEL_NT'}]}
+        self._route_batch_get(mock_dynamodb, mock_table)
+        self._mock_registry(mock_table, {'CHANNEL_NT': ''})
         
         # Mock Tracker
         def get_item_side_effect(Key):
@@ -553,29 +728,916 @@ class TestChannelPoller(unittest.TestCase):
         mock_ses.send_email.assert_not_called()
         
         # Should UPDATE tracker with retry info
-        call_args = mock_table.put_item.call_args[1]
-        item = call_args['Item']
+        item = self._last_tracker_update(mock_table)
         self.assertEqual(item['pendingVideoId'], 'VIDEO_NO_TRANSCRIPT')
         self.assertEqual(item['retryCount'], 0)
 
-    def _create_rss(self, video_id, title, published):
+    @patch('main.dynamodb')
+    @patch('main.agentcore')
+    @patch('main.ses')
+    @patch('main.feed_client.get')
+    def test_summarize_once_per_prompt_group(self, mock_feed_get, mock_ses, mock_bedrock, mock_dynamodb):
+        # Mock Feed
+        rss_content = self._create_rss("VIDEO_GROUP", "Group Video", datetime.now(timezone.utc).isoformat())
+        self._mock_feed(mock_feed_get, rss_content)
+
+        # Mock DynamoDB
+        mock_table = MagicMock()
+        mock_dynamodb.Table.return_value = mock_table
+        self._route_batch_get(mock_dynamodb, mock_table)
+        self._mock_registry(mock_table, {'CHANNEL_G': ''})
+
+        # Mock Subscribers (user1 and user2 share the default prompt, user3 has an override)
+        mock_table.query.return_value = {
+            'Items': [
+                {'userId': 'user1', 'targetId': 'SUBSCRIPTION#CHANNEL_G'},
+                {'userId': 'user2', 'targetId': 'SUBSCRIPTION#CHANNEL_G'},
+                {'userId': 'user3', 'targetId': 'SUBSCRIPTION#CHANNEL_G'}
+            ]
+        }
+
+        def get_item_side_effect(Key):
+            if Key.get('targetId') == 'PROFILE#data':
+                return {'Item': {'emailNotificationsEnabled': True, 'notificationEmail': f"{Key['userId']}@example.com"}}
+            if Key.get('userId') == 'system':
+                return {'Item': {'lastVideoId': 'OLD'}}
+            if Key.get('userId') == 'user3' and Key.get('targetId') == 'PROMPT#CHANNEL_G':
+                return {'Item': {'prompt': 'Only the key numbers'}}
+            return {}
+        mock_table.get_item.side_effect = get_item_side_effect
+
+        # Mock Bedrock
+        mock_bedrock.invoke_agent_runtime.return_value = {'completion': [{'chunk': {'bytes': b'Summary'}}]}
+
+        # Run Handler
+        handler({}, {})
+
+        # Assertions
+        # One agent call per distinct prompt, one email per subscriber
+        self.assertEqual(mock_bedrock.invoke_agent_runtime.call_count, 2)
+        prompts = sorted(json.loads(c[1]['payload'])['additionalInstructions'] for c in mock_bedrock.invoke_agent_runtime.call_args_list)
+        self.assertEqual(prompts, ['', 'Only the key numbers'])
+        self.assertEqual(mock_ses.send_email.call_count, 3)
+
+    @patch('main.dynamodb')
+    @patch('main.agentcore')
+    @patch('main.ses')
+    def test_retry_skips_delivered_subscribers(self, mock_ses, mock_bedrock, mock_dynamodb):
+        from main import notify_subscribers
+
+        mock_table = MagicMock()
+        mock_dynamodb.Table.return_value = mock_table
+        self._route_batch_get(mock_dynamodb, mock_table)
+        mock_table.query.return_value = {'Items': [
+            {'userId': 'user1', 'targetId': 'SUBSCRIPTION#CHANNEL_L'},
+            {'userId': 'user2', 'targetId': 'SUBSCRIPTION#CHANNEL_L'},
+            {'userId': 'user3', 'targetId': 'SUBSCRIPTION#CHANNEL_L'}
+        ]}
+
+        # Ledger items written by put_item are served back by get_item (the summary cache stays cold)
+        ledger = {}
+        def put_item_side_effect(Item, ConditionExpression=None):
+            if not Item['targetId'].startswith('DELIVERY#'):
+                return
+            key = (Item['userId'], Item['targetId'])
+            if ConditionExpression and key in ledger:
+                error = Exception("The conditional request failed")
+                error.response = {'Error': {'Code': 'ConditionalCheckFailedException'}}
+                raise error
+            ledger[key] = Item
+        mock_table.put_item.side_effect = put_item_side_effect
+
+        def get_item_side_effect(Key):
+            if Key['targetId'] == 'PROFILE#data':
+                return {'Item': {'emailNotificationsEnabled': True, 'notificationEmail': f"{Key['userId']}@example.com"}}
+            if Key == {'userId': 'user3', 'targetId': 'PROMPT#CHANNEL_L'}:
+                return {'Item': {'prompt': 'Custom'}}
+            item = ledger.get((Key['userId'], Key['targetId']))
+            return {'Item': item} if item else {}
+        mock_table.get_item.side_effect = get_item_side_effect
+
+        mock_bedrock.invoke_agent_runtime.return_value = {'completion': [{'chunk': {'bytes': b'Summary'}}]}
+
+        # First attempt: user2's email fails
+        def send_email_side_effect(Destination, **kwargs):
+            if Destination['ToAddresses'] == ['user2@example.com']:
+                raise Exception("Mailbox unavailable")
+        mock_ses.send_email.side_effect = send_email_side_effect
+
+        self.assertFalse(notify_subscribers('CHANNEL_L', 'Ledger', 'VIDEOLEDGER', 'https://www.youtube.com/watch?v=VIDEOLEDGER', 'Ledger Video', mock_table))
+        self.assertEqual(sorted(k[0] for k in ledger), ['user1', 'user3'])
+
+        # Retry: only user2 is emailed, and only the default prompt group is summarized again
+        mock_ses.send_email.reset_mock()
+        mock_ses.send_email.side_effect = None
+        mock_bedrock.invoke_agent_runtime.reset_mock()
+
+        self.assertTrue(notify_subscribers('CHANNEL_L', 'Ledger', 'VIDEOLEDGER', 'https://www.youtube.com/watch?v=VIDEOLEDGER', 'Ledger Video', mock_table))
+        mock_bedrock.invoke_agent_runtime.assert_called_once()
+        mock_ses.send_email.assert_called_once()
+        self.assertEqual(mock_ses.send_email.call_args[1]['Destination']['ToAddresses'], ['user2@example.com'])
+        self.assertIn(('user2', 'DELIVERY#VIDEOLEDGER'), ledger)
+
+    @patch('main.dynamodb')
+    @patch('main.process_channel')
+    def test_poll_channels_records_per_channel_results(self, mock_process_channel, mock_dynamodb):
+        # Mock DynamoDB
+        mock_table = MagicMock()
+        mock_dynamodb.Table.return_value = mock_table
+        self._mock_registry(mock_table, {'CHANNEL_OK': 'OK Channel', 'CHANNEL_BAD': 'Bad Channel'})
+
+        # One channel blows up, the other must still be processed
+        def process_side_effect(channel_title, channel_id, table, tracker_item=None):
+            if channel_id == 'CHANNEL_BAD':
+                raise RuntimeError("Agent timed out")
+            return "notified"
+        mock_process_channel.side_effect = process_side_effect
+
+        # Run Handler
+        response = handler({}, {})
+
+        # Assertions
+        self.assertEqual(response['statusCode'], 200)
+        self.assertEqual(response['results'], {'CHANNEL_OK': 'notified', 'CHANNEL_BAD': 'error'})
+        self.assertEqual(mock_process_channel.call_count, 2)
+
+    @patch('main.dynamodb')
+    @patch('main.feed_client.get')
+    def test_trackers_preloaded_in_one_query(self, mock_feed_get, mock_dynamodb):
+        import hashlib
+
+        rss_content = self._create_rss("VIDEO_SAME", "Same Video", datetime.now(timezone.utc).isoformat())
+        self._mock_feed(mock_feed_get, rss_content)
+        content_hash = hashlib.sha256(rss_content.encode('utf-8')).hexdigest()
+
+        mock_table = MagicMock()
+        mock_dynamodb.Table.return_value = mock_table
+        registry_items = [
+            {'userId': 'CHANNEL_REGISTRY', 'targetId': f"CHANNEL#{channel_id}", 'channelId': channel_id, 'channelTitle': channel_id, 'subscriberCount': 1}
+            for channel_id in ['CHANNEL_A', 'CHANNEL_B']
+        ] + [{'userId': 'CHANNEL_REGISTRY', 'targetId': 'BACKFILL#1'}]
+        tracker_items = [
+            {'userId': 'system', 'targetId': f"CHANNEL#{channel_id}", 'lastVideoId': 'VIDEO_SAME', 'contentHash': content_hash}
+            for channel_id in ['CHANNEL_A', 'CHANNEL_B']
+        ]
+        mock_table.query.side_effect = lambda **kwargs: {'Items': registry_items if kwargs['ExpressionAttributeValues'][':pk'] == 'CHANNEL_REGISTRY' else tracker_items}
+
+        # Run Handler
+        response = handler({}, {})
+
+        # Assertions
+        self.assertEqual(response['results'], {'CHANNEL_A': 'unchanged', 'CHANNEL_B': 'unchanged'})
+        self.assertEqual(mock_table.query.call_count, 2)
+        self.assertEqual(mock_table.query.call_args[1]['ExpressionAttributeValues'], {':pk': 'system', ':prefix': 'CHANNEL#'})
+        mock_table.get_item.assert_not_called()
+
+    @patch('main.feed_client.get')
+    def test_poll_schedule_seeded_from_feed(self, mock_feed_get):
+        import hashlib
+
+        now = datetime.now(timezone.utc)
+        rss_content = self._create_feed("".join(
+            self._create_entry(f"VIDEO_DAY{n}", f"Day {n}", (now - timedelta(days=n)).isoformat()) for n in range(3)
+        ))
+        self._mock_feed(mock_feed_get, rss_content)
+        content_hash = hashlib.sha256(rss_content.encode('utf-8')).hexdigest()
+        mock_table = MagicMock()
+
+        # No cadence yet: the feed is fetched in full and the daily gap between its uploads seeds the average
+        tracker_item = {'lastVideoId': 'VIDEO_DAY0', 'etag': '"e"', 'contentHash': content_hash}
+        with patch('main.random.uniform', return_value=1.0):
+            result = process_channel('Channel', 'CHANNEL_SEED', mock_table, tracker_item=tracker_item)
+
+        self.assertEqual(result, 'unchanged')
+        self.assertNotIn('If-None-Match', mock_feed_get.call_args[1]['headers'])
+        update = self._last_tracker_update(mock_table)
+        self.assertEqual(update['uploadGapEwma'], 86400)
+        self.assertAlmostEqual(update['nextPollAt'], time.time() + 86400 * main.POLL_INTERVAL_FRACTION, delta=5)
+
+        # A poll ahead of schedule that would barely move nextPollAt writes nothing
+        mock_table.reset_mock()
+        tracker_item.update(uploadGapEwma=86400, nextPollAt=update['nextPollAt'])
+        with patch('main.random.uniform', return_value=1.0):
+            self.assertEqual(process_channel('Channel', 'CHANNEL_SEED', mock_table, tracker_item=tracker_item), 'unchanged')
+        self.assertEqual(mock_feed_get.call_args[1]['headers']['If-None-Match'], '"e"')
+        mock_table.update_item.assert_not_called()
+
+        # Too little history to seed from: the channel stays due on every run, without a write
+        rss_content = self._create_rss("VIDEO_ONLY", "Only Video", now.isoformat())
+        self._mock_feed(mock_feed_get, rss_content)
+        tracker_item = {'lastVideoId': 'VIDEO_ONLY', 'contentHash': hashlib.sha256(rss_content.encode('utf-8')).hexdigest()}
+        self.assertEqual(process_channel('Channel', 'CHANNEL_NEW', mock_table, tracker_item=tracker_item), 'unchanged')
+        mock_table.update_item.assert_not_called()
+
+    def test_poll_interval_follows_upload_cadence(self):
+        from main import record_upload, next_poll_at
+
+        # Daily uploads: the gap average converges on a day
+        tracker = {}
+        for day in range(1, 6):
+            tracker.update(record_upload(tracker, day * 86400))
+        self.assertEqual(tracker['lastUploadAt'], 5 * 86400)
+        self.assertEqual(tracker['uploadGapEwma'], 86400)
+
+        # Out-of-order (backlog) uploads leave the cadence alone
+        self.assertEqual(record_upload(tracker, 2 * 86400), tracker)
+
+        with patch('main.random.uniform', return_value=1.0), patch('main.time.time', return_value=1000):
+            self.assertEqual(next_poll_at(86400), 1000 + int(86400 * main.POLL_INTERVAL_FRACTION))
+            self.assertEqual(next_poll_at(60), 1000 + main.POLL_MIN_INTERVAL_SECONDS)
+            self.assertEqual(next_poll_at(365 * 86400), 1000 + main.POLL_MAX_INTERVAL_SECONDS)
+            # No history yet: poll on every run
+            self.assertEqual(next_poll_at(0), 1000)
+
+    def test_due_channels(self):
+        from main import due_channels
+
+        channels = {'NEW': 'New', 'DUE': 'Due', 'LATER': 'Later', 'RETRY_DUE': 'Retry due', 'RETRY_LATER': 'Retry later'}
+        trackers = {
+            'DUE': {'nextPollAt': 900},
+            'LATER': {'nextPollAt': 1100},
+            'RETRY_DUE': {'pendingVideoId': 'V', 'nextAttemptAt': 900, 'nextPollAt': 1100},
+            'RETRY_LATER': {'pendingVideoId': 'V', 'nextAttemptAt': 1100, 'nextPollAt': 900}
+        }
+
+        self.assertEqual(sorted(due_channels(channels, trackers, now=1000)), ['DUE', 'NEW', 'RETRY_DUE'])
+
+    def test_thread_local_resource_per_thread(self):
+        import threading
+        from main import ThreadLocalResource
+
+        with patch('main.boto3.session.Session', side_effect=lambda: MagicMock()):
+            resource = ThreadLocalResource('dynamodb')
+            tables = [resource.Table('T'), resource.Table('T')]
+            thread = threading.Thread(target=lambda: tables.append(resource.Table('T')))
+            thread.start()
+            thread.join()
+
+        # Same resource within a thread, a separate one in another thread
+        self.assertIs(tables[0], tables[1])
+        self.assertIsNot(tables[0], tables[2])
+
+    @patch('main.dynamodb')
+    @patch('main.process_channel')
+    def test_poll_threads_reused_across_invocations(self, mock_process_channel, mock_dynamodb):
+        import threading
+        from main import poll_channels
+
+        threads = set()
+        def process_side_effect(channel_title, channel_id, table, tracker_item=None):
+            threads.add(threading.current_thread())
+            time.sleep(0.01)
+            return "unchanged"
+        mock_process_channel.side_effect = process_side_effect
+
+        channels = {f"CHANNEL_{n}": f"Channel {n}" for n in range(main.POLLER_CONCURRENCY * 2)}
+        for _ in range(3):
+            poll_channels(channels, {})
+
+        # Every run shares the container's pool, so no run starts threads of its own
+        self.assertLessEqual(len(threads), main.POLLER_CONCURRENCY)
+        self.assertTrue(all(thread.name.startswith('poller') for thread in threads))
+
+    @patch('main.dynamodb')
+    @patch('main.process_channel')
+    def test_registry_skips_channels_without_subscribers(self, mock_process_channel, mock_dynamodb):
+        # Mock DynamoDB
+        mock_table = MagicMock()
+        mock_dynamodb.Table.return_value = mock_table
+        mock_table.query.return_value = {'Items': [
+            {'userId': 'CHANNEL_REGISTRY', 'targetId': 'CHANNEL#ACTIVE', 'channelId': 'ACTIVE', 'channelTitle': 'Active', 'subscriberCount': 2},
+            {'userId': 'CHANNEL_REGISTRY', 'targetId': 'CHANNEL#EMPTY', 'channelId': 'EMPTY', 'channelTitle': 'Empty', 'subscriberCount': 0},
+            {'userId': 'CHANNEL_REGISTRY', 'targetId': 'BACKFILL#1'}
+        ]}
+        mock_process_channel.return_value = "up_to_date"
+
+        # Run Handler
+        handler({}, {})
+
+        # Assertions
+        # Only the registry partition is read, the subscriptions GSI is never scanned
+        mock_table.scan.assert_not_called()
+        self.assertEqual(mock_table.query.call_args_list[0][1]['ExpressionAttributeValues'], {':pk': 'CHANNEL_REGISTRY'})
+        mock_process_channel.assert_called_once()
+        self.assertEqual(mock_process_channel.call_args[0][:2], ('Active', 'ACTIVE'))
+
+    @patch('main.dynamodb')
+    @patch('main.process_channel')
+    def test_registry_backfilled_from_subscriptions(self, mock_process_channel, mock_dynamodb):
+        # Mock DynamoDB (empty registry, two subscriptions to the same channel)
+        mock_table = MagicMock()
+        mock_dynamodb.Table.return_value = mock_table
+        mock_table.query.return_value = {'Items': []}
+        mock_table.scan.return_value = {'Items': [
+            {'targetId': 'SUBSCRIPTION#CHANNEL1', 'channelTitle': ''},
+            {'targetId': 'SUBSCRIPTION#CHANNEL1', 'channelTitle': 'Channel One'}
+        ]}
+        mock_batch = mock_table.batch_writer.return_value.__enter__.return_value
+        mock_process_channel.return_value = "up_to_date"
+
+        # Run Handler
+        handler({}, {})
+
+        # Assertions
+        mock_batch.put_item.assert_called_once()
+        item = mock_batch.put_item.call_args[1]['Item']
+        self.assertEqual(item['targetId'], 'CHANNEL#CHANNEL1')
+        self.assertEqual(item['channelTitle'], 'Channel One')
+        self.assertEqual(item['subscriberCount'], 2)
+        self.assertEqual(mock_process_channel.call_args[0][:2], ('Channel One', 'CHANNEL1'))
+
+    @patch('main.dynamodb')
+    @patch('main.process_channel')
+    def test_registry_backfilled_once_when_partially_populated(self, mock_process_channel, mock_dynamodb):
+        # A subscribe after deploy registered one channel (and an unsubscribe drove another negative)
+        # before the poller's first run; the GSI also has channels from before the registry existed
+        mock_table = MagicMock()
+        mock_dynamodb.Table.return_value = mock_table
+        registry_items = [
+            {'userId': 'CHANNEL_REGISTRY', 'targetId': 'CHANNEL#NEW', 'channelId': 'NEW', 'channelTitle': 'New', 'subscriberCount': 1},
+            {'userId': 'CHANNEL_REGISTRY', 'targetId': 'CHANNEL#OLD2', 'channelId': 'OLD2', 'channelTitle': 'Old Two', 'subscriberCount': -1},
+            {'userId': 'CHANNEL_REGISTRY', 'targetId': 'CHANNEL#GONE', 'channelId': 'GONE', 'channelTitle': 'Gone', 'subscriberCount': 1}
+        ]
+        mock_table.query.side_effect = lambda **kwargs: {'Items': list(registry_items) if kwargs['ExpressionAttributeValues'][':pk'] == 'CHANNEL_REGISTRY' else []}
+        mock_table.scan.return_value = {'Items': [
+            {'targetId': 'SUBSCRIPTION#NEW', 'channelTitle': 'New'},
+            {'targetId': 'SUBSCRIPTION#OLD1', 'channelTitle': 'Old One'},
+            {'targetId': 'SUBSCRIPTION#OLD2', 'channelTitle': 'Old Two'},
+            {'targetId': 'SUBSCRIPTION#OLD2', 'channelTitle': 'Old Two'}
+        ]}
+        mock_batch = mock_table.batch_writer.return_value.__enter__.return_value
+        mock_process_channel.return_value = "up_to_date"
+
+        # Run Handler
+        handler({}, {})
+
+        # Assertions
+        # Every channel is recounted from subscriptions and the marker is written last
+        written = {c[1]['Item']['channelId']: c[1]['Item']['subscriberCount'] for c in mock_batch.put_item.call_args_list}
+        self.assertEqual(written, {'NEW': 1, 'OLD1': 1, 'OLD2': 2, 'GONE': 0})
+        self.assertEqual(mock_table.put_item.call_args[1]['Item']['targetId'], 'BACKFILL#1')
+        polled = sorted(c[0][1] for c in mock_process_channel.call_args_list)
+        self.assertEqual(polled, ['NEW', 'OLD1', 'OLD2'])
+
+        # With the marker in place the GSI is not scanned again
+        registry_items.append({'userId': 'CHANNEL_REGISTRY', 'targetId': 'BACKFILL#1'})
+        mock_table.scan.reset_mock()
+        handler({}, {})
+        mock_table.scan.assert_not_called()
+
+    @patch('main.time.sleep')
+    @patch('main.dynamodb')
+    def test_load_subscriber_context_batches_and_retries(self, mock_dynamodb, mock_sleep):
+        from main import load_subscriber_context
+
+        # 60 subscribers -> 120 keys -> two BatchGetItem chunks
+        mock_table = MagicMock()
+        mock_table.query.return_value = {'Items': [{'userId': f"user{i}", 'targetId': 'SUBSCRIPTION#CHANNEL_B'} for i in range(60)]}
+
+        def batch_get_side_effect(RequestItems):
+            keys = RequestItems['TEST_TABLE']['Keys']
+            # First call leaves the last key unprocessed
+            if mock_dynamodb.batch_get_item.call_count == 1:
+                keys, unprocessed = keys[:-1], {'TEST_TABLE': {'Keys': keys[-1:]}}
+            else:
+                unprocessed = {}
+            items = []
+            for key in keys:
+                if key['targetId'] == 'PROFILE#data':
+                    items.append({**key, 'emailNotificationsEnabled': True, 'notificationEmail': f"{key['userId']}@example.com"})
+                elif key['userId'] == 'user7':
+                    items.append({**key, 'prompt': 'Custom'})
+            return {'Responses': {'TEST_TABLE': items}, 'UnprocessedKeys': unprocessed}
+        mock_dynamodb.batch_get_item.side_effect = batch_get_side_effect
+
+        context = load_subscriber_context('CHANNEL_B', mock_table)
+
+        # Assertions
+        self.assertEqual(mock_dynamodb.batch_get_item.call_count, 3)
+        self.assertTrue(all(len(c[1]['RequestItems']['TEST_TABLE']['Keys']) <= 100 for c in mock_dynamodb.batch_get_item.call_args_list))
+        mock_sleep.assert_called_once()
+        self.assertEqual(len(context), 60)
+        self.assertTrue(all(ctx['email'] for ctx in context.values()))
+        self.assertEqual(context['user7']['prompt'], 'Custom')
+        self.assertEqual(context['user8']['prompt'], '')
+        mock_table.get_item.assert_not_called()
+
+    @patch('main.parse_feed')
+    @patch('main.feed_client.get')
+    def test_feed_not_modified_skips_tracker_read(self, mock_feed_get, mock_parse_feed):
+        main._feed_cache['CHANNEL_304'] = {'etag': '"abc"', 'lastModified': 'Mon, 01 Jan 2026 00:00:00 GMT', 'contentHash': 'h', 'pending': False}
+        mock_feed_get.return_value = FeedResponse(304, {}, b'')
+        mock_table = MagicMock()
+
+        result = process_channel('Channel', 'CHANNEL_304', mock_table)
+
+        # Assertions
+        self.assertEqual(result, 'unchanged')
+        headers = mock_feed_get.call_args[1]['headers']
+        self.assertEqual(headers['If-None-Match'], '"abc"')
+        self.assertEqual(headers['If-Modified-Since'], 'Mon, 01 Jan 2026 00:00:00 GMT')
+        mock_table.get_item.assert_not_called()
+        mock_parse_feed.assert_not_called()
+
+    @patch('main.parse_feed')
+    @patch('main.feed_client.get')
+    def test_feed_unchanged_hash_skips_tracker_read(self, mock_feed_get, mock_parse_feed):
+        import hashlib
+
+        rss_content = self._create_rss("VIDEO_SAME", "Same Video", datetime.now(timezone.utc).isoformat())
+        self._mock_feed(mock_feed_get, rss_content)
+        content_hash = hashlib.sha256(rss_content.encode('utf-8')).hexdigest()
+        main._feed_cache['CHANNEL_HASH'] = {'etag': None, 'lastModified': None, 'contentHash': content_hash, 'pending': False}
+        mock_table = MagicMock()
+
+        result = process_channel('Channel', 'CHANNEL_HASH', mock_table)
+
+        # Assertions
+        self.assertEqual(result, 'unchanged')
+        mock_table.get_item.assert_not_called()
+        mock_parse_feed.assert_not_called()
+
+    @patch('main.dynamodb')
+    @patch('main.agentcore')
+    @patch('main.ses')
+    @patch('main.feed_client.get')
+    def test_backlog_processed_oldest_first(self, mock_feed_get, mock_ses, mock_bedrock, mock_dynamodb):
+        # Mock Feed (newest first, V1 was the last processed video)
+        now = datetime.now(timezone.utc).isoformat()
+        entries = "".join(self._create_entry(video_id, f"Title {video_id}", now) for video_id in ['V3', 'V2', 'V1', 'V0'])
+        self._mock_feed(mock_feed_get, self._create_feed(entries))
+
+        # Mock DynamoDB
+        mock_table = MagicMock()
+        mock_dynamodb.Table.return_value = mock_table
+        self._route_batch_get(mock_dynamodb, mock_table)
+        self._mock_registry(mock_table, {'CHANNEL_BL': ''})
+        mock_table.query.return_value = {'Items': [{'userId': 'user1', 'targetId': 'SUBSCRIPTION#CHANNEL_BL'}]}
+
+        def get_item_side_effect(Key):
+            if Key.get('targetId') == 'PROFILE#data':
+                return {'Item': {'emailNotificationsEnabled': True, 'notificationEmail': 'test@example.com'}}
+            if Key.get('userId') == 'system':
+                return {'Item': {'lastVideoId': 'V1'}}
+            return {}
+        mock_table.get_item.side_effect = get_item_side_effect
+
+        # Mock Bedrock
+        mock_bedrock.invoke_agent_runtime.return_value = {'completion': [{'chunk': {'bytes': b'Summary'}}]}
+
+        # Run Handler
+        handler({}, {})
+
+        # Assertions
+        # Both unseen videos summarized in upload order, nothing at or before V1
+        video_urls = [json.loads(c[1]['payload'])['videoUrl'] for c in mock_bedrock.invoke_agent_runtime.call_args_list]
+        self.assertEqual(video_urls, ['https://www.youtube.com/watch?v=V2', 'https://www.youtube.com/watch?v=V3'])
+        self.assertEqual(self._last_tracker_update(mock_table)['lastVideoId'], 'V3')
+
+    @patch('main.dynamodb')
+    @patch('main.agentcore')
+    @patch('main.ses')
+    @patch('main.feed_client.get')
+    def test_backlog_bounded_by_last_upload_and_cap(self, mock_feed_get, mock_ses, mock_bedrock, mock_dynamodb):
+        # Mock Feed (newest first). The last processed video was deleted, so it is not in the feed;
+        # V2 and older were published at or before it
+        last_upload = datetime(2026, 1, 10, tzinfo=timezone.utc)
+        entries = "".join(
+            self._create_entry(video_id, f"Title {video_id}", (last_upload + timedelta(days=offset)).isoformat())
+            for video_id, offset in [('V5', 3), ('V4', 2), ('V3', 1), ('V2', 0), ('V1', -1)]
+        )
+        self._mock_feed(mock_feed_get, self._create_feed(entries))
+
+        mock_table = MagicMock()
+        mock_dynamodb.Table.return_value = mock_table
+        self._route_batch_get(mock_dynamodb, mock_table)
+        mock_table.query.return_value = {'Items': [{'userId': 'user1', 'targetId': 'SUBSCRIPTION#CHANNEL_DEL'}]}
+
+        def get_item_side_effect(Key):
+            if Key.get('targetId') == 'PROFILE#data':
+                return {'Item': {'emailNotificationsEnabled': True, 'notificationEmail': 'test@example.com'}}
+            return {}
+        mock_table.get_item.side_effect = get_item_side_effect
+        mock_bedrock.invoke_agent_runtime.return_value = {'completion': [{'chunk': {'bytes': b'Summary'}}]}
+
+        tracker_item = {'lastVideoId': 'V_DELETED', 'lastUploadAt': int(last_upload.timestamp())}
+        with patch('main.MAX_BACKLOG_VIDEOS', 2):
+            process_channel('Deleted', 'CHANNEL_DEL', mock_table, tracker_item=tracker_item)
+
+        # Assertions
+        # Only uploads after the last processed one count, and the cap keeps the newest two
+        video_urls = [json.loads(c[1]['payload'])['videoUrl'] for c in mock_bedrock.invoke_agent_runtime.call_args_list]
+        self.assertEqual(video_urls, ['https://www.youtube.com/watch?v=V4', 'https://www.youtube.com/watch?v=V5'])
+        mock_metrics.add_metric.assert_any_call(name='BacklogVideosSkipped', unit=unittest.mock.ANY, value=1)
+
+    @patch('main.dynamodb')
+    @patch('main.agentcore')
+    @patch('main.ses')
+    @patch('main.feed_client.get')
+    def test_backlog_bounded_for_legacy_tracker(self, mock_feed_get, mock_ses, mock_bedrock, mock_dynamodb):
+        # A tracker from before lastUploadAt was recorded, whose last processed video has left the feed
+        now = datetime.now(timezone.utc)
+        entries = "".join(
+            self._create_entry(video_id, f"Title {video_id}", (now - age).isoformat())
+            for video_id, age in [('V_NEW', timedelta(hours=1)), ('V_OLD2', timedelta(days=3)), ('V_OLD1', timedelta(days=4))]
+        )
+        self._mock_feed(mock_feed_get, self._create_feed(entries))
+
+        mock_table = MagicMock()
+        mock_dynamodb.Table.return_value = mock_table
+        self._route_batch_get(mock_dynamodb, mock_table)
+        mock_table.query.return_value = {'Items': [{'userId': 'user1', 'targetId': 'SUBSCRIPTION#CHANNEL_LEGACY'}]}
+
+        def get_item_side_effect(Key):
+            if Key.get('targetId') == 'PROFILE#data':
+                return {'Item': {'emailNotificationsEnabled': True, 'notificationEmail': 'test@example.com'}}
+            return {}
+        mock_table.get_item.side_effect = get_item_side_effect
+        mock_bedrock.invoke_agent_runtime.return_value = {'completion': [{'chunk': {'bytes': b'Summary'}}]}
+
+        # Last updated two days ago: only uploads since then are new
+        tracker_item = {'lastVideoId': 'V_DELETED', 'lastUpdated': (now - timedelta(days=2)).isoformat()}
+        process_channel('Legacy', 'CHANNEL_LEGACY', mock_table, tracker_item=tracker_item)
+
+        video_urls = [json.loads(c[1]['payload'])['videoUrl'] for c in mock_bedrock.invoke_agent_runtime.call_args_list]
+        self.assertEqual(video_urls, ['https://www.youtube.com/watch?v=V_NEW'])
+
+        # Without lastUpdated either, uploads older than a day are not new
+        mock_bedrock.invoke_agent_runtime.reset_mock()
+        process_channel('Legacy', 'CHANNEL_LEGACY', mock_table, tracker_item={'lastVideoId': 'V_DELETED'})
+
+        video_urls = [json.loads(c[1]['payload'])['videoUrl'] for c in mock_bedrock.invoke_agent_runtime.call_args_list]
+        self.assertEqual(video_urls, ['https://www.youtube.com/watch?v=V_NEW'])
+
+    def test_parse_feed_stops_at_last_video(self):
+        from main import parse_feed
+
+        now = datetime.now(timezone.utc).isoformat()
+        entries = "".join(self._create_entry(video_id, f"Title {video_id}", now) for video_id in ['V3', 'V2', 'V1'])
+        # Anything after the stop entry is never parsed, even if malformed
+        feed = self._create_feed(entries + "<entry><broken").encode('utf-8')
+
+        videos = list(parse_feed(feed, stop_at='V2'))
+
+        self.assertEqual([v['videoId'] for v in videos], ['V3'])
+        self.assertEqual(videos[0]['link'], 'https://www.youtube.com/watch?v=V3')
+
+    @patch('main.dynamodb')
+    @patch('main.agentcore')
+    @patch('main.ses')
+    @patch('main.feed_client.get')
+    def test_queue_mode_enqueues_jobs_and_consumers_deliver(self, mock_feed_get, mock_ses, mock_bedrock, mock_dynamodb):
+        from work_queue import InMemoryQueue
+
+        # Mock Feed
+        rss_content = self._create_rss("VIDEO_Q", "Queued Video", datetime.now(timezone.utc).isoformat())
+        self._mock_feed(mock_feed_get, rss_content)
+
+        # Mock DynamoDB
+        mock_table = MagicMock()
+        mock_dynamodb.Table.return_value = mock_table
+        self._route_batch_get(mock_dynamodb, mock_table)
+        self._mock_registry(mock_table, {'CHANNEL_Q': 'Queue Channel'})
+        mock_table.query.return_value = {'Items': [
+            {'userId': 'user1', 'targetId': 'SUBSCRIPTION#CHANNEL_Q'},
+            {'userId': 'user2', 'targetId': 'SUBSCRIPTION#CHANNEL_Q'}
+        ]}
+
+        def get_item_side_effect(Key):
+            if Key.get('targetId') == 'PROFILE#data':
+                return {'Item': {'emailNotificationsEnabled': True, 'notificationEmail': f"{Key['userId']}@example.com"}}
+            if Key.get('userId') == 'system' and Key.get('targetId') == 'CHANNEL#CHANNEL_Q':
+                return {'Item': {'lastVideoId': 'OLD'}}
+            if Key.get('userId') == 'user2' and Key.get('targetId') == 'PROMPT#CHANNEL_Q':
+                return {'Item': {'prompt': 'Custom'}}
+            return {}
+        mock_table.get_item.side_effect = get_item_side_effect
+
+        mock_bedrock.invoke_agent_runtime.return_value = {'completion': [{'chunk': {'bytes': b'Summary'}}]}
+
+        queue = InMemoryQueue()
+        with patch('main.job_queue', queue):
+            response = handler({}, {})
+
+            # Poller only detects and enqueues, one job per prompt group
+            self.assertEqual(response['results'], {'CHANNEL_Q': 'enqueued'})
+            mock_bedrock.invoke_agent_runtime.assert_not_called()
+            self.assertEqual(len(queue.messages), 2)
+            self.assertEqual(self._last_tracker_update(mock_table)['lastVideoId'], 'VIDEO_Q')
+
+            # Consumers summarize and email
+            queue.drain(main.consume_handler)
+
+        self.assertEqual(mock_bedrock.invoke_agent_runtime.call_count, 2)
+        self.assertEqual(mock_ses.send_email.call_count, 2)
+        self.assertEqual(queue.messages, [])
+        job_items = [c[1]['Item'] for c in mock_table.put_item.call_args_list if c[1]['Item']['targetId'].startswith('JOB#')]
+        self.assertEqual([item['status'] for item in job_items], ['done', 'done'])
+
+    @patch('main.dynamodb')
+    @patch('main.agentcore')
+    @patch('main.ses')
+    def test_consumer_reports_failed_jobs(self, mock_ses, mock_bedrock, mock_dynamodb):
+        from work_queue import InMemoryQueue
+
+        # Mock DynamoDB
+        mock_table = MagicMock()
+        mock_dynamodb.Table.return_value = mock_table
+        self._route_batch_get(mock_dynamodb, mock_table)
+
+        def get_item_side_effect(Key):
+            if Key.get('targetId') == 'PROFILE#data':
+                return {'Item': {'emailNotificationsEnabled': True, 'notificationEmail': 'test@example.com'}}
+            if Key.get('targetId', '').startswith('JOB#'):
+                return {'Item': {'status': 'pending', 'retryCount': 1}}
+            return {}
+        mock_table.get_item.side_effect = get_item_side_effect
+
+        # Mock Bedrock FAILURE
+        mock_bedrock.invoke_agent_runtime.side_effect = Exception("Bedrock Error")
+
+        queue = InMemoryQueue()
+        queue.send([{
+            'channelId': 'CHANNEL_F', 'channelTitle': 'Channel', 'videoId': 'VIDEO_F', 'videoTitle': 'Video',
+            'videoUrl': 'https://www.youtube.com/watch?v=VIDEO_F', 'promptGroup': 'abc', 'prompt': '', 'userIds': ['user1']
+        }])
+        receipt_handle = queue.messages[0]['receiptHandle']
+        with patch('main.job_queue', queue):
+            queue.drain(main.consume_handler)
+
+        # Assertions
+        # Job is redelivered after the backoff delay of its first receive, and its own retry count advanced
+        self.assertEqual(len(queue.messages), 1)
+        self.assertEqual(queue.messages[0]['attributes']['ApproximateReceiveCount'], '2')
+        delay = min(main.RETRY_BASE_DELAY_SECONDS * 2, main.RETRY_MAX_DELAY_SECONDS)
+        self.assertGreaterEqual(queue.visibility_timeouts[receipt_handle], int(delay * 0.9) - 1)
+        self.assertLessEqual(queue.visibility_timeouts[receipt_handle], int(delay * 1.1))
+        item = mock_table.put_item.call_args[1]['Item']
+        self.assertEqual(item['targetId'], 'JOB#VIDEO_F#abc')
+        self.assertEqual(item['pendingVideoId'], 'VIDEO_F')
+        self.assertEqual(item['retryCount'], 2)
+        mock_ses.send_email.assert_not_called()
+
+    @patch('main.dynamodb')
+    @patch('main.agentcore')
+    def test_invoke_agent_uses_summary_cache(self, mock_bedrock, mock_dynamodb):
+        import time
+        from main import invoke_agent
+        from summary_cache import summary_cache_key
+
+        mock_table = MagicMock()
+        mock_dynamodb.Table.return_value = mock_table
+        cache_key = summary_cache_key('VIDEOCACHE1', 'Custom', 'us.amazon.nova-2-lite-v1:0')
+
+        def get_item_side_effect(Key):
+            if Key == cache_key:
+                return {'Item': {**cache_key, 'summary': 'Cached summary', 'expiresAt': int(time.time()) + 60}}
+            return {}
+        mock_table.get_item.side_effect = get_item_side_effect
+        mock_bedrock.invoke_agent_runtime.return_value = {'completion': [{'chunk': {'bytes': b'Fresh summary'}}]}
+
+        # Hit: the agent is never invoked
+        summary = invoke_agent('https://www.youtube.com/watch?v=VIDEOCACHE1', 'Custom')
+        self.assertEqual(summary, 'Cached summary')
+        mock_bedrock.invoke_agent_runtime.assert_not_called()
+        mock_metrics.add_metric.assert_called_with(name='SummaryCacheHit', unit=unittest.mock.ANY, value=1)
+
+        # Miss (different prompt): the agent runs, and caching the summary is left to the agent
+        summary = invoke_agent('https://www.youtube.com/watch?v=VIDEOCACHE1', 'Other prompt')
+        self.assertEqual(summary, 'Fresh summary')
+        mock_bedrock.invoke_agent_runtime.assert_called_once()
+        mock_metrics.add_metric.assert_called_with(name='SummaryCacheMiss', unit=unittest.mock.ANY, value=1)
+        mock_table.put_item.assert_not_called()
+
+        # A failed cache read is treated as a miss
+        mock_table.get_item.side_effect = Exception('Throttled')
+        summary = invoke_agent('https://www.youtube.com/watch?v=VIDEOCACHE1', 'Custom')
+        self.assertEqual(summary, 'Fresh summary')
+        self.assertEqual(mock_bedrock.invoke_agent_runtime.call_count, 2)
+
+    @patch('main.dynamodb')
+    @patch('main.agentcore')
+    def test_invoke_agent_parses_sse_frames(self, mock_bedrock, mock_dynamodb):
+        from main import invoke_agent
+
+        mock_table = MagicMock()
+        mock_dynamodb.Table.return_value = mock_table
+        mock_table.get_item.return_value = {}
+
+        # Raw text mixed with SSE frames (each preceded by a newline), and a multi-byte character split across chunks
+        mock_bedrock.invoke_agent_runtime.return_value = {'completion': [
+            {'chunk': {'bytes': b'Summary \xe2\x80'}},
+            {'chunk': {'bytes': b'\x94 part 1\ndata: " and part 2"\n\n'}},
+            {'chunk': {'bytes': b'\nLast line'}}
+        ]}
+        summary = invoke_agent('https://www.youtube.com/watch?v=VIDEOFRAME1', '')
+        self.assertEqual(summary, 'Summary — part 1 and part 2\nLast line')
+
+        # "data: " inside the summary text is text, not a frame
+        mock_bedrock.invoke_agent_runtime.return_value = {'completion': [
+            {'chunk': {'bytes': b'The API returns data: {"a": 1}\n'}},
+            {'chunk': {'bytes': b'On errors it returns data: {"error": "Not found"}\n'}}
+        ]}
+        summary = invoke_agent('https://www.youtube.com/watch?v=VIDEOFRAME3', '')
+        self.assertEqual(summary, 'The API returns data: {"a": 1}\nOn errors it returns data: {"error": "Not found"}\n')
+
+        # An error frame aborts the read and closes the stream
+        mock_stream = MagicMock()
+        mock_stream.iter_lines.return_value = iter([
+            b'Partial summary \n',
+            b'data: {"error": "Throttled", "type": "stream_error"}\n',
+            b'\n',
+            b'never read'
+        ])
+        mock_bedrock.invoke_agent_runtime.return_value = {'response': mock_stream}
+        with self.assertRaises(ValueError):
+            invoke_agent('https://www.youtube.com/watch?v=VIDEOFRAME2', '')
+        mock_stream.close.assert_called_once()
+        self.assertEqual(list(mock_stream.iter_lines.return_value), [b'\n', b'never read'])
+
+    @patch('main.SES_SUMMARY_TEMPLATE', 'SummaryTemplate')
+    @patch('main.dynamodb')
+    @patch('main.agentcore')
+    @patch('main.ses')
+    def test_bulk_templated_delivery(self, mock_ses, mock_bedrock, mock_dynamodb):
+        from main import deliver_summary
+
+        mock_table = MagicMock()
+        mock_dynamodb.Table.return_value = mock_table
+        mock_table.get_item.return_value = {}
+        mock_bedrock.invoke_agent_runtime.return_value = {'completion': [{'chunk': {'bytes': b'**Bulk** summary'}}]}
+
+        recipients = [(f"user{n}", f"user{n}@example.com") for n in range(120)]
+
+        def bulk_side_effect(Destinations, **kwargs):
+            # The second destination of every batch is rejected
+            return {'Status': [
+                {'Status': 'MessageRejected' if n == 1 else 'Success'} for n in range(len(Destinations))
+            ]}
+        mock_ses.send_bulk_templated_email.side_effect = bulk_side_effect
+
+        self.assertFalse(deliver_summary('Channel', 'https://www.youtube.com/watch?v=VIDEOBULK01', 'Bulk Video', '', recipients))
+
+        # One summary, three batches of at most 50, no per-recipient sends
+        mock_bedrock.invoke_agent_runtime.assert_called_once()
+        mock_ses.send_email.assert_not_called()
+        batches = [c[1]['Destinations'] for c in mock_ses.send_bulk_templated_email.call_args_list]
+        self.assertEqual([len(b) for b in batches], [50, 50, 20])
+        self.assertEqual(batches[2][0]['Destination']['ToAddresses'], ['user100@example.com'])
+
+        template_data = json.loads(mock_ses.send_bulk_templated_email.call_args[1]['DefaultTemplateData'])
+        self.assertEqual(template_data['summaryHtml'], '<p><strong>Bulk</strong> summary</p>')
+        self.assertEqual(template_data['title'], 'Bulk Video')
+
+        self.assertEqual(main.send_summary_emails(recipients[:3], 'Bulk Video', 'url', 'summary'), ['user1'])
+
+    @patch('main.SES_SUMMARY_TEMPLATE', 'SummaryTemplate')
+    @patch('main.ses')
+    def test_bulk_retries_only_throttled_recipients(self, mock_ses):
+        throttling = Exception("Maximum sending rate exceeded.")
+        throttling.response = {'Error': {'Code': 'Throttling'}}
+        mock_ses.send_bulk_templated_email.side_effect = [
+            throttling,
+            {'Status': [{'Status': 'Success'}, {'Status': 'AccountThrottled'}, {'Status': 'MessageRejected'}]},
+            {'Status': [{'Status': 'Success'}]}
+        ]
+        recipients = [('user1', 'a@example.com'), ('user2', 'b@example.com'), ('user3', 'c@example.com')]
+
+        with patch.object(main.ses_limiter, '_sleep'):
+            failed = main.send_summary_emails(recipients, 'Video', 'url', 'summary')
+
+        # The throttled call is retried, then only the throttled destination; the rejected one fails
+        self.assertEqual(failed, ['user3'])
+        destinations = [c[1]['Destinations'] for c in mock_ses.send_bulk_templated_email.call_args_list]
+        self.assertEqual([len(d) for d in destinations], [3, 3, 1])
+        self.assertEqual(destinations[2][0]['Destination']['ToAddresses'], ['b@example.com'])
+
+    @patch('main.dynamodb')
+    @patch('main.agentcore')
+    def test_failure_phrase_aborts_stream(self, mock_bedrock, mock_dynamodb):
+        from main import invoke_agent
+
+        mock_table = MagicMock()
+        mock_dynamodb.Table.return_value = mock_table
+        mock_table.get_item.return_value = {}
+
+        # The phrase is split across lines and the rest of the generation is never read
+        mock_stream = MagicMock()
+        mock_stream.iter_lines.return_value = iter([b'Sorry, I wasn\'t able to ret', b'rieve the transcript.\n', b'More text'])
+        mock_bedrock.invoke_agent_runtime.return_value = {'response': mock_stream}
+
+        with self.assertRaises(ValueError):
+            invoke_agent('https://www.youtube.com/watch?v=VIDEOPHRASE', '')
+
+        mock_stream.close.assert_called_once()
+        self.assertEqual(list(mock_stream.iter_lines.return_value), [b'More text'])
+        mock_metrics.add_metric.assert_called_with(name='FailurePhraseDetected', unit=unittest.mock.ANY, value=1)
+        mock_table.put_item.assert_not_called()
+
+    @patch('main.dynamodb')
+    @patch('main.agentcore')
+    def test_transcript_unavailable_event(self, mock_bedrock, mock_dynamodb):
+        from main import invoke_agent
+
+        mock_table = MagicMock()
+        mock_dynamodb.Table.return_value = mock_table
+        mock_table.get_item.return_value = {}
+
+        mock_stream = MagicMock()
+        mock_stream.iter_lines.return_value = iter([
+            b'\n',
+            b'data: {"type": "transcript_unavailable", "error": "Subtitles are disabled"}\n',
+            b'\n'
+        ])
+        mock_bedrock.invoke_agent_runtime.return_value = {'response': mock_stream}
+
+        with self.assertRaises(ValueError):
+            invoke_agent('https://www.youtube.com/watch?v=VIDEONOSUBS', '')
+
+        mock_stream.close.assert_called_once()
+        mock_metrics.add_metric.assert_called_with(name='TranscriptUnavailable', unit=unittest.mock.ANY, value=1)
+        mock_table.put_item.assert_not_called()
+
+    def _route_tracker_updates(self, mock_table, tracker):
+        """Applies tracker UpdateItems to the tracker dict, honouring the lease, owner and WebSub nonce conditions"""
+        def update_item_side_effect(Key, UpdateExpression, ExpressionAttributeValues=None, ConditionExpression=None):
+            if not Key['targetId'].startswith('CHANNEL#'):
+                return
+            values = ExpressionAttributeValues or {}
+            condition = ConditionExpression or ''
+            held = 'leaseExpiresAt < :now' in condition and tracker.get('leaseExpiresAt', 0) >= values[':now']
+            stolen = 'leaseOwner = :owner' in condition and tracker.get('leaseOwner') != values[':owner']
+            stale = 'websubNonce = :nonce' in condition and tracker.get('websubNonce') != values[':nonce']
+            if held or stolen or stale:
+                error = Exception("The conditional request failed")
+                error.response = {'Error': {'Code': 'ConditionalCheckFailedException'}}
+                raise error
+            set_clause, _, remove_clause = UpdateExpression.partition('REMOVE ')
+            tracker.update({name: values[f":{name}"] for name in re.findall(r'(\w+) = :', set_clause)})
+            for name in remove_clause.split(','):
+                tracker.pop(name.strip(), None)
+        mock_table.update_item.side_effect = update_item_side_effect
+
+    def _last_tracker_update(self, mock_table):
+        """Attributes written by the last UpdateItem on a channel tracker; REMOVEd attributes map to None"""
+        updates = [c[1] for c in mock_table.update_item.call_args_list if c[1]['Key']['targetId'].startswith('CHANNEL#')]
+        set_clause, _, remove_clause = updates[-1]['UpdateExpression'].partition(' REMOVE ')
+        item = {name: updates[-1]['ExpressionAttributeValues'][f":{name}"] for name in re.findall(r'(\w+) = :', set_clause)}
+        item.update({name.strip(): None for name in remove_clause.split(',') if name.strip()})
+        return item
+
+    def _route_batch_get(self, mock_dynamodb, mock_table):
+        # Serve BatchGetItem from the table's get_item mock so each test describes its items once
+        def batch_get_side_effect(RequestItems):
+            responses = {}
+            for table_name, request in RequestItems.items():
+                items = [mock_table.get_item(Key=key).get('Item') for key in request['Keys']]
+                responses[table_name] = [{**item, **key} for key, item in zip(request['Keys'], items) if item]
+            return {'Responses': responses, 'UnprocessedKeys': {}}
+        mock_dynamodb.batch_get_item.side_effect = batch_get_side_effect
+
+    def _mock_registry(self, mock_table, channels):
+        # Route the channel registry query and the tracker preload (served by get_item, like _route_batch_get),
+        # every other query falls through to query.return_value
+        registry_items = [
+            {'userId': 'CHANNEL_REGISTRY', 'targetId': f"CHANNEL#{channel_id}", 'channelId': channel_id, 'channelTitle': channel_title, 'subscriberCount': 1}
+            for channel_id, channel_title in channels.items()
+        ] + [{'userId': 'CHANNEL_REGISTRY', 'targetId': 'BACKFILL#1'}]
+
+        def query_side_effect(**kwargs):
+            if kwargs.get('ExpressionAttributeValues', {}).get(':pk') == 'CHANNEL_REGISTRY':
+                return {'Items': registry_items}
+            if kwargs.get('ExpressionAttributeValues', {}).get(':pk') == 'system':
+                trackers = [mock_table.get_item(Key={'userId': 'system', 'targetId': f"CHANNEL#{channel_id}"}).get('Item') for channel_id in channels]
+                return {'Items': [{'targetId': f"CHANNEL#{channel_id}", **item} for channel_id, item in zip(channels, trackers) if item]}
+            return DEFAULT
+        mock_table.query.side_effect = query_side_effect
+
+    def _create_rss(self, video_id, title, published, channel_id=None):
+        return self._create_feed(self._create_entry(video_id, title, published, channel_id))
+
+    def _create_feed(self, entries):
         return f"""
         <feed xmlns:yt="http://www.youtube.com/xml/schemas/2015" xmlns:media="http://search.yahoo.com/mrss/" xmlns="http://www.w3.org/2005/Atom">
+        {entries}
+        </feed>
+        """
+
+    def _create_entry(self, video_id, title, published, channel_id=None):
+        channel = f"<yt:channelId>{channel_id}</yt:channelId>" if channel_id else ""
+        return f"""
          <entry>
           <id>yt:video:{video_id}</id>
           <yt:videoId>{video_id}</yt:videoId>
+          {channel}
           <title>{title}</title>
           <link rel="alternate" href="https://www.youtube.com/watch?v={video_id}"/>
           <published>{published}</published>
          </entry>
-        </feed>
         """
         
-    def _mock_feed(self, mock_urlopen, content):
-        mock_response = MagicMock()
-        mock_response.read.return_value = content.encode('utf-8')
-        mock_response.__enter__.return_value = mock_response
-        mock_urlopen.return_value = mock_response
+    def _mock_feed(self, mock_feed_get, content):
+        mock_feed_get.return_value = FeedResponse(200, {}, content.encode('utf-8'))
 
     def test_sanitize_session_id(self):
         from main import sanitize_session_id
@@ -598,5 +1660,281 @@ class TestChannelPoller(unittest.TestCase):
         self.assertTrue(sid.startswith("AAAAAAAAAAAAAAAAAAAA-BBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBB-"))
         self.assertLessEqual(len(sid), 95)
 
+# Regex renderer that markdown_utils replaced, kept as the benchmark baseline
+def legacy_convert_markdown_to_html(text):
+    if not text:
+        return ""
+
+    lines = text.split('\n')
+    html_output = []
+    
+    # State tracking
+    state = {'in_list': False, 'list_type': None}
+    
+    def close_list():
+        if state['in_list']:
+            html_output.append(f"</{state['list_type']}>")
+            state['in_list'] = False
+            state['list_type'] = None
+
+    for line in lines:
+        stripped = line.strip()
+        
+        # Empty line
+        if not stripped:
+            close_list()
+            continue
+
+        # Headers
+        if stripped.startswith('#'):
+            close_list()
+            # Determine level
+            level = 0
+            for char in stripped:
+                if char == '#':
+                    level += 1
+                else:
+                    break
+            
+            # Extract content if there is a space after headers, e.g. "### Title"
+            # If "###Title" (no space), treat as header
+            content = stripped[level:].strip()
+            
+            if 1 <= level <= 6:
+                html_output.append(f"<h{level}>{legacy_parse_inline(content)}</h{level}>")
+            else:
+                # Treat as normal text if too many #'s? Or just h6?
+                html_output.append(f"<p>{legacy_parse_inline(stripped)}</p>")
+            continue
+
+        # Horizontal Rule
+        if stripped in ['---', '***', '___']:
+            close_list()
+            html_output.append("<hr>")
+            continue
+            
+        # Lists
+        is_ul = stripped.startswith('- ') or stripped.startswith('* ')
+        is_ol = re.match(r'^\d+\.\s', stripped)
+        
+        if is_ul or is_ol:
+            new_type = 'ul' if is_ul else 'ol'
+            
+            # If we are in a list but of different type, close it
+            if state['in_list'] and state['list_type'] != new_type:
+                close_list()
+                
+            # Start new list if needed
+            if not state['in_list']:
+                state['in_list'] = True
+                state['list_type'] = new_type
+                html_output.append(f"<{new_type}>")
+            
+            # Extract content
+            if is_ul:
+                content = stripped[2:] 
+            else:
+                # Remove "1. " or "10. "
+                content = re.sub(r'^\d+\.\s', '', stripped, count=1)
+                
+            html_output.append(f"<li>{legacy_parse_inline(content)}</li>")
+            continue
+            
+        # Paragraph (non-list, non-header, non-hr, non-empty)
+        # If we were in a list, this line breaks the list (simple parser behavior)
+        close_list() 
+        html_output.append(f"<p>{legacy_parse_inline(stripped)}</p>")
+        
+    close_list()
+    return "\n".join(html_output)
+
+def legacy_parse_inline(text):
+    # Bold **text**
+    text = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', text)
+    # Bold __text__
+    text = re.sub(r'__(.*?)__', r'<strong>\1</strong>', text)
+    
+    # Italic *text* (naive: matches pairs regardless of words)
+    # Use negated character class to avoid matching across * * pairs incorrectly if they are far apart
+    # But usually *word* is fine.
+    # Note: This regex `\*([^\*]+)\*` says "match * then anything that is NOT * then *"
+    # This prevents `*bold* and *bold*` from becoming `<em>bold* and *bold</em>`
+    text = re.sub(r'\*([^\*]+)\*', r'<em>\1</em>', text)
+    text = re.sub(r'_([^_]+)_', r'<em>\1</em>', text)
+    
+    return text
+
+class TestRateLimiter(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def _clock(self):
+        return self.now
+
+    def _sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    def test_token_bucket_paces_sends(self):
+        limiter = RateLimiter(10, max_concurrency=2, clock=self._clock, sleep=self._sleep)
+
+        # The burst goes out immediately, then sends are spaced at the rate
+        for _ in range(15):
+            limiter.acquire()
+        self.assertAlmostEqual(self.now, 0.5)
+
+        # A batch larger than the bucket is admitted once the bucket is full, and later callers repay it
+        self.now += 1.0
+        limiter.acquire(tokens=25)
+        limiter.acquire()
+        self.assertAlmostEqual(self.now, 1.5 + 1.6)
+
+    def test_retries_throttling_errors_only(self):
+        limiter = RateLimiter(100, max_concurrency=1, clock=self._clock, sleep=self._sleep)
+        throttling = Exception("Rate exceeded")
+        throttling.response = {'Error': {'Code': 'Throttling'}}
+
+        send = MagicMock(side_effect=[throttling, throttling, 'sent'])
+        self.assertEqual(limiter.call(send, Destination='a'), 'sent')
+        self.assertEqual(send.call_count, 3)
+
+        send = MagicMock(side_effect=ValueError("bad address"))
+        with self.assertRaises(ValueError):
+            limiter.call(send)
+        self.assertEqual(send.call_count, 1)
+
+class TestFeedClient(unittest.TestCase):
+    """Runs FeedClient against a local keep-alive HTTP server"""
+
+    def setUp(self):
+        import gzip
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.connections = 0
+        self.requests = []
+        test = self
+
+        class FeedHandler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                test.connections += 1
+
+            def do_GET(self):
+                test.requests.append(self.path)
+                if self.path == '/slow':
+                    time.sleep(0.5)
+                if self.path == '/flaky' and test.requests.count('/flaky') == 1:
+                    self._send(503, b'')
+                    return
+                body = b'<feed/>'
+                if 'gzip' in self.headers.get('Accept-Encoding', ''):
+                    self._send(200, gzip.compress(body), {'Content-Encoding': 'gzip'})
+                else:
+                    self._send(200, body)
+
+            def _send(self, status, body, headers=None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FeedHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.client = FeedClient(max_connections=2, read_timeout=0.2, max_attempts=2, sleep=lambda seconds: None)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_reuses_connections_and_decodes_gzip(self):
+        for _ in range(3):
+            response = self.client.get(f"{self.base_url}/feed")
+            self.assertEqual(response.status, 200)
+            self.assertEqual(response.body, b'<feed/>')
+
+        self.assertEqual(self.connections, 1)
+
+    def test_retries_retryable_statuses(self):
+        response = self.client.get(f"{self.base_url}/flaky")
+
+        self.assertEqual(response.status, 200)
+        self.assertEqual(self.requests, ['/flaky', '/flaky'])
+
+    def test_read_timeout(self):
+        with self.assertRaises(OSError):
+            self.client.get(f"{self.base_url}/slow")
+
+        self.assertEqual(self.requests, ['/slow', '/slow'])
+
+    def test_stale_connection_is_replaced(self):
+        self.client.get(f"{self.base_url}/feed")
+
+        # The idle connection breaks, as when the server closes it while the container is frozen
+        for connection in self.client._idle[('http', '127.0.0.1', self.server.server_address[1])]:
+            connection.sock.shutdown(2)
+
+        response = self.client.get(f"{self.base_url}/feed")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(self.connections, 2)
+
+class TestMarkdownRenderer(unittest.TestCase):
+
+    def test_escapes_html(self):
+        html = convert_markdown_to_html("Use <script> & **<b>bold</b>**")
+        self.assertEqual(html, "<p>Use &lt;script&gt; &amp; <strong>&lt;b&gt;bold&lt;/b&gt;</strong></p>")
+
+    def test_nested_lists(self):
+        html = convert_markdown_to_html("- Topic\n  - Detail\n    1. Step\n- Next topic")
+        self.assertEqual(html, "\n".join([
+            "<ul>",
+            "<li>Topic",
+            "<ul>",
+            "<li>Detail",
+            "<ol>",
+            "<li>Step</li>",
+            "</ol></li>",
+            "</ul></li>",
+            "<li>Next topic</li>",
+            "</ul>"
+        ]))
+
+    def test_inline_emphasis_and_code(self):
+        html = convert_markdown_to_html("*a **b** c* and `x * y_z` and snake_case_name and **open")
+        self.assertEqual(html, "<p><em>a <strong>b</strong> c</em> and <code>x * y_z</code> and snake_case_name and **open</p>")
+
+    def test_benchmark_against_regex_renderer(self):
+        block = (
+            "## Section\n\n"
+            "The speaker argues that **latency** matters more than *throughput* for __interactive__ apps.\n"
+            "- Point with a code span and _emphasis_\n"
+            "- Another point about caching and queues\n"
+            "1. First step\n"
+            "2. Second step\n\n"
+            "---\n"
+        )
+        summary = block * 1000
+
+        # Same output wherever the old renderer was correct
+        self.assertEqual(convert_markdown_to_html(block), legacy_convert_markdown_to_html(block))
+
+        legacy_seconds = min(timeit.repeat(lambda: legacy_convert_markdown_to_html(summary), number=3, repeat=3))
+        new_seconds = min(timeit.repeat(lambda: convert_markdown_to_html(summary), number=3, repeat=3))
+        print(f"\nMarkdown render of {len(summary)} chars: regex {legacy_seconds / 3 * 1000:.1f} ms, tokenizer {new_seconds / 3 * 1000:.1f} ms")
+
+        # Loose bound so the benchmark flags regressions without being flaky
+        self.assertLess(new_seconds, legacy_seconds * 2)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,126 @@
+import hmac
+import uuid
+import hashlib
+import urllib.parse
+import urllib.request
+
+# Google's public hub, which YouTube publishes every channel feed to
+DEFAULT_HUB_URL = "https://pubsubhubbub.appspot.com/subscribe"
+TOPIC_URL = "https://www.youtube.com/xml/feeds/videos.xml"
+
+def topic_url(channel_id):
+    return f"{TOPIC_URL}?{urllib.parse.urlencode({'channel_id': channel_id})}"
+
+def channel_id_from_topic(topic):
+    """Returns the channel a YouTube feed topic is for, or None if topic is not one"""
+    url, _, query = (topic or "").partition("?")
+    if url != TOPIC_URL:
+        return None
+    return urllib.parse.parse_qs(query).get('channel_id', [None])[0]
+
+def callback_url(base_url, nonce):
+    """The callback URL for one subscribe request. The hub calls it as given, so verifications carry the nonce back."""
+    separator = '&' if '?' in base_url else '?'
+    return f"{base_url}{separator}{urllib.parse.urlencode({'nonce': nonce})}"
+
+def sign(secret, body):
+    """X-Hub-Signature value the hub sends with a notification body"""
+    return "sha1=" + hmac.new(secret.encode('utf-8'), body, hashlib.sha1).hexdigest()
+
+def verify_signature(secret, body, signature):
+    return bool(signature) and hmac.compare_digest(sign(secret, body), signature)
+
+class WebSubHub:
+    """
+    Subscribes callbacks to topics on a WebSub hub.
+    The hub answers 202 and verifies the intent asynchronously by calling the callback (see
+    main.websub_handler), which is also where notifications arrive until the lease expires.
+    """
+
+    def __init__(self, hub_url=DEFAULT_HUB_URL, timeout=10):
+        self.hub_url = hub_url
+        self.timeout = timeout
+
+    def subscribe(self, topic, callback_url, lease_seconds, secret=None, mode='subscribe'):
+        """Requests a (renewed) subscription. Raises urllib.error.HTTPError if the hub rejects the request."""
+        form = {
+            'hub.mode': mode,
+            'hub.topic': topic,
+            'hub.callback': callback_url,
+            'hub.verify': 'async',
+            'hub.lease_seconds': str(lease_seconds)
+        }
+        if secret:
+            form['hub.secret'] = secret
+
+        request = urllib.request.Request(self.hub_url, data=urllib.parse.urlencode(form).encode('utf-8'), method='POST')
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return response.status
+
+def function_url_event(method, query=None, body=None, headers=None):
+    """A Lambda function URL (payload 2.0) event, as the hub's requests arrive at the callback"""
+    return {
+        'version': '2.0',
+        'rawQueryString': urllib.parse.urlencode(query or {}),
+        'queryStringParameters': query or None,
+        'headers': headers or {},
+        'requestContext': {'http': {'method': method}},
+        'body': body,
+        'isBase64Encoded': False
+    }
+
+class FakeHub:
+    """
+    Local stand-in for WebSubHub.
+    Verifies subscriptions synchronously against a callback handler (a function URL handler such
+    as main.websub_handler), and publish() pushes signed notifications to the verified subscribers.
+    Like a real hub, it identifies a subscription by (topic, callback): subscribing again with the
+    same callback renews it, with a different callback adds a second one.
+    """
+
+    def __init__(self, callback_handler):
+        self.callback_handler = callback_handler
+        # (topic, callback) -> {'secret', 'leaseSeconds'}
+        self.subscriptions = {}
+        self.requests = []
+
+    def subscribe(self, topic, callback_url, lease_seconds, secret=None, mode='subscribe'):
+        self.requests.append({'mode': mode, 'topic': topic, 'callback': callback_url, 'leaseSeconds': lease_seconds})
+
+        # The verification goes to the callback URL as given, query string included
+        challenge = uuid.uuid4().hex
+        callback_query = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(callback_url).query))
+        response = self.callback_handler(function_url_event('GET', query={
+            **callback_query,
+            'hub.mode': mode,
+            'hub.topic': topic,
+            'hub.challenge': challenge,
+            'hub.lease_seconds': str(lease_seconds)
+        }), None)
+
+        # The subscriber confirms by echoing the challenge
+        verified = response.get('statusCode') == 200 and response.get('body') == challenge
+        if verified and mode == 'subscribe':
+            self.subscriptions[(topic, callback_url)] = {'secret': secret, 'leaseSeconds': lease_seconds}
+        elif verified:
+            self.subscriptions.pop((topic, callback_url), None)
+
+        return 202
+
+    def callbacks(self, topic):
+        """The callback URLs subscribed to a topic"""
+        return [callback for (subscribed_topic, callback) in self.subscriptions if subscribed_topic == topic]
+
+    def publish(self, topic, body):
+        """Delivers a notification body to every subscriber of the topic. Returns their responses."""
+        body = body.encode('utf-8') if isinstance(body, str) else body
+
+        responses = []
+        for callback in self.callbacks(topic):
+            subscription = self.subscriptions[(topic, callback)]
+            headers = {'content-type': 'application/atom+xml'}
+            if subscription['secret']:
+                headers['x-hub-signature'] = sign(subscription['secret'], body)
+            responses.append(self.callback_handler(function_url_event('POST', body=body.decode('utf-8'), headers=headers), None))
+
+        return responses
@@ -0,0 +1,82 @@
+import json
+import uuid
+import boto3
+
+# SendMessageBatch accepts at most 10 entries per request
+SQS_BATCH_SIZE = 10
+
+# ChangeMessageVisibility accepts at most 12 hours
+SQS_MAX_VISIBILITY_SECONDS = 43200
+
+class SqsQueue:
+    """
+    Sends summarization jobs to an SQS queue.
+    Consumers receive them as Lambda SQS events (see main.consume_handler).
+    """
+
+    def __init__(self, queue_url, client=None):
+        self.queue_url = queue_url
+        self.client = client or boto3.client('sqs')
+
+    def send(self, jobs):
+        for i in range(0, len(jobs), SQS_BATCH_SIZE):
+            entries = [
+                {'Id': str(n), 'MessageBody': json.dumps(job)}
+                for n, job in enumerate(jobs[i:i + SQS_BATCH_SIZE])
+            ]
+            response = self.client.send_message_batch(QueueUrl=self.queue_url, Entries=entries)
+            if response.get('Failed'):
+                raise RuntimeError(f"Failed to enqueue {len(response['Failed'])} job(s): {response['Failed']}")
+
+    def retry_later(self, receipt_handle, delay_seconds):
+        """Keeps a received message hidden for delay_seconds, so it is redelivered after that instead of the queue's visibility timeout"""
+        self.client.change_message_visibility(
+            QueueUrl=self.queue_url,
+            ReceiptHandle=receipt_handle,
+            VisibilityTimeout=min(int(delay_seconds), SQS_MAX_VISIBILITY_SECONDS)
+        )
+
+class InMemoryQueue:
+    """
+    Local stand-in for SqsQueue.
+    drain() hands queued jobs to a consumer handler as SQS batch events and re-queues
+    the messages it reports in batchItemFailures, like SQS would after the visibility timeout.
+    Delays requested with retry_later() are recorded in visibility_timeouts by receipt handle,
+    not waited for.
+    """
+
+    def __init__(self):
+        self.messages = []
+        self.visibility_timeouts = {}
+
+    def send(self, jobs):
+        for job in jobs:
+            self.messages.append({
+                'messageId': str(uuid.uuid4()),
+                'receiptHandle': str(uuid.uuid4()),
+                'body': json.dumps(job),
+                'attributes': {'ApproximateReceiveCount': '1'}
+            })
+
+    def retry_later(self, receipt_handle, delay_seconds):
+        self.visibility_timeouts[receipt_handle] = min(int(delay_seconds), SQS_MAX_VISIBILITY_SECONDS)
+
+    def drain(self, handler, batch_size=SQS_BATCH_SIZE):
+        """Delivers every message queued so far once. Returns the number of messages delivered."""
+        pending, self.messages = self.messages, []
+
+        for i in range(0, len(pending), batch_size):
+            batch = pending[i:i + batch_size]
+            response = handler({'Records': batch}, None) or {}
+            failed_ids = {f['itemIdentifier'] for f in response.get('batchItemFailures', [])}
+
+            for message in batch:
+                if message['messageId'] in failed_ids:
+                    receive_count = int(message['attributes']['ApproximateReceiveCount']) + 1
+                    self.messages.append({
+                        **message,
+                        'receiptHandle': str(uuid.uuid4()),
+                        'attributes': {'ApproximateReceiveCount': str(receive_count)}
+                    })
+
+        return len(pending)
@@ -4,6 +4,7 @@ import { getUserProfile, UserProfile } from '@/lib/db';
 import { SESClient, SendEmailCommand, SendEmailCommandOutput } from '@aws-sdk/client-ses';
 import { marked } from 'marked';
 import { parseInput } from '@/lib/youtube-utils';
+import { AgentStreamParser, AgentStreamPart, describeFailure } from '@/lib/agent-stream';
 
 const sesClient = new SESClient({
   region: process.env.AWS_REGION || 'us-east-1',
@@ -243,17 +244,58 @@ export async function POST(req: Request) {
           },
         });
 
+    // Split the agent's text from its event frames, so frames are never shown or emailed as the summary
+    const reader = sourceStream.getReader();
+    const parser = new AgentStreamParser();
+    const decoder = new TextDecoder();
+    const encoder = new TextEncoder();
+
+    const readParts = async (): Promise<AgentStreamPart[] | null> => {
+      const { done, value } = await reader.read();
+      if (done) return null;
+      return parser.push(decoder.decode(value, { stream: true }));
+    };
+
+    // A missing transcript is reported before any text, so read up to the first text or event
+    const head: AgentStreamPart[] = [];
+    let ended = false;
+    while (!head.some((part) => part.kind === 'event' || part.text.trim())) {
+      const parts = await readParts();
+      if (parts === null) {
+        head.push(...parser.flush());
+        ended = true;
+        break;
+      }
+      head.push(...parts);
+    }
+
+    const firstEvent = head.find((part) => part.kind === 'event' || part.text.trim());
+    if (firstEvent?.kind === 'event' && firstEvent.event.type === 'transcript_unavailable') {
+      await reader.cancel();
+      return NextResponse.json({ error: describeFailure(firstEvent.event) }, { status: 422 });
+    }
+
     // Capture the summary for email notification
     let fullSummary = '';
-    const decoder = new TextDecoder();
+    let failed = false;
+
+    const emit = (parts: AgentStreamPart[], controller: ReadableStreamDefaultController<Uint8Array>) => {
+      for (const part of parts) {
+        if (part.kind === 'text') {
+          fullSummary += part.text;
+          controller.enqueue(encoder.encode(part.text));
+        } else if (part.event.error || part.event.type === 'transcript_unavailable') {
+          failed = true;
+          controller.enqueue(encoder.encode(`\n\n${describeFailure(part.event)}\n`));
+        }
+      }
+    };
 
-    const transformStream = new TransformStream({
-      transform(chunk, controller) {
-        fullSummary += decoder.decode(chunk, { stream: true });
-        controller.enqueue(chunk);
-      },
-      async flush() {
-        fullSummary += decoder.decode();
+    const finish = async (controller: ReadableStreamDefaultController<Uint8Array>) => {
+      // A failed summary is shown to the user but never emailed
+      if (failed || !fullSummary.trim()) {
+        console.log('Summary incomplete, skipping email notification');
+      } else {
         // Await email notification to ensure execution before process termination
         try {
           console.log('Sending email notification...');
@@ -264,11 +306,30 @@ export async function POST(req: Request) {
         } catch (e) {
           console.error('Error sending email notification:', e);
         }
+      }
+
+      controller.close();
+    };
+
+    const stream = new ReadableStream<Uint8Array>({
+      async start(controller) {
+        emit(head, controller);
+        if (ended) await finish(controller);
+      },
+      async pull(controller) {
+        const parts = await readParts();
+        if (parts === null) {
+          emit(parser.flush(), controller);
+          await finish(controller);
+          return;
+        }
+        emit(parts, controller);
+      },
+      async cancel(reason) {
+        await reader.cancel(reason);
       },
     });
 
-    const stream = sourceStream.pipeThrough(transformStream);
-
     return new NextResponse(stream, {
       status: 200,
       headers: {
@@ -0,0 +1,68 @@
+import { AgentStreamParser, AgentStreamPart, TRANSCRIPT_UNAVAILABLE_MESSAGE, describeFailure } from './agent-stream';
+
+function parse(chunks: string[]): AgentStreamPart[] {
+  const parser = new AgentStreamParser();
+  const parts: AgentStreamPart[] = [];
+  for (const chunk of chunks) parts.push(...parser.push(chunk));
+  parts.push(...parser.flush());
+  return parts;
+}
+
+function text(parts: AgentStreamPart[]): string {
+  return parts.map((part) => (part.kind === 'text' ? part.text : '')).join('');
+}
+
+function events(parts: AgentStreamPart[]) {
+  return parts.flatMap((part) => (part.kind === 'event' ? [part.event] : []));
+}
+
+const tests = [
+  {
+    name: 'missing transcript frame split across chunks',
+    chunks: ['\nda', 'ta: {"type": "transcript_unavailable", "error": "Subtitles are disabled"}\n\n'],
+    expectedText: '\n',
+    expectedEvents: [{ type: 'transcript_unavailable', error: 'Subtitles are disabled' }],
+  },
+  {
+    name: '"data: " inside the summary stays text',
+    chunks: ['The API returns data: {"a": 1}\n', 'data', ' is useful\nEnd'],
+    expectedText: 'The API returns data: {"a": 1}\ndata is useful\nEnd',
+    expectedEvents: [],
+  },
+  {
+    name: 'error frame after partial text',
+    chunks: ['Part 1', '\ndata: {"error": "Throttled", "type": "stream_error"}\n\n'],
+    expectedText: 'Part 1\n',
+    expectedEvents: [{ error: 'Throttled', type: 'stream_error' }],
+  },
+];
+
+let passed = 0;
+let failed = 0;
+
+console.log('Running tests for agent-stream.ts...');
+
+for (const t of tests) {
+  const parts = parse(t.chunks);
+  const isMatch =
+    text(parts) === t.expectedText && JSON.stringify(events(parts)) === JSON.stringify(t.expectedEvents);
+
+  if (isMatch) {
+    passed++;
+  } else {
+    failed++;
+    console.error(`FAIL: ${t.name}`);
+    console.error(`  Expected: ${JSON.stringify({ text: t.expectedText, events: t.expectedEvents })}`);
+    console.error(`  Got:      ${JSON.stringify({ text: text(parts), events: events(parts) })}`);
+  }
+}
+
+if (describeFailure({ type: 'transcript_unavailable', error: 'x' }) === TRANSCRIPT_UNAVAILABLE_MESSAGE) {
+  passed++;
+} else {
+  failed++;
+  console.error('FAIL: transcript_unavailable is described with the readable message');
+}
+
+console.log(`
+Result: ${passed} passed, ${failed} failed.`);
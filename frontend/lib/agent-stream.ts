@@ -0,0 +1,94 @@
+// The agent streams summary text as raw text and every other event as an SSE `data: <json>` frame on a
+// line of its own (see _raw_convert_to_sse in backend/agent/src/agent.py)
+export const SSE_PREFIX = 'data: ';
+
+export const TRANSCRIPT_UNAVAILABLE_MESSAGE =
+  "This video doesn't have a transcript available yet, so it can't be summarized. Please try again later.";
+
+export interface AgentEvent {
+  type?: string;
+  error?: string;
+}
+
+export type AgentStreamPart = { kind: 'text'; text: string } | { kind: 'event'; event: AgentEvent };
+
+function parseFrame(line: string): AgentStreamPart | null {
+  if (!line.startsWith(SSE_PREFIX)) return null;
+
+  try {
+    const payload = JSON.parse(line.slice(SSE_PREFIX.length));
+    if (typeof payload === 'string') return { kind: 'text', text: payload };
+    if (payload && typeof payload === 'object' && !Array.isArray(payload)) return { kind: 'event', event: payload };
+  } catch {
+    // Not a frame, just text that starts like one
+  }
+  return null;
+}
+
+/**
+ * Splits the agent's response stream into summary text and events.
+ * Text is passed on as soon as it arrives, except for the start of a line that could still turn out to be a frame.
+ */
+export class AgentStreamParser {
+  private pending = '';
+  private atLineStart = true;
+  private afterFrame = false;
+
+  push(chunk: string): AgentStreamPart[] {
+    this.pending += chunk;
+    const parts: AgentStreamPart[] = [];
+
+    while (this.pending) {
+      const newline = this.pending.indexOf('\n');
+
+      if (!this.atLineStart) {
+        const end = newline === -1 ? this.pending.length : newline + 1;
+        parts.push({ kind: 'text', text: this.pending.slice(0, end) });
+        this.pending = this.pending.slice(end);
+        this.atLineStart = newline !== -1;
+        continue;
+      }
+
+      if (newline === -1) {
+        // Hold back a partial line that may still become a frame
+        if (SSE_PREFIX.startsWith(this.pending) || this.pending.startsWith(SSE_PREFIX)) break;
+        parts.push({ kind: 'text', text: this.pending });
+        this.pending = '';
+        this.atLineStart = false;
+        this.afterFrame = false;
+        break;
+      }
+
+      const line = this.pending.slice(0, newline + 1);
+      this.pending = this.pending.slice(newline + 1);
+      parts.push(...this.processLine(line));
+    }
+
+    return parts;
+  }
+
+  flush(): AgentStreamPart[] {
+    const line = this.pending;
+    this.pending = '';
+    if (!line) return [];
+    return this.atLineStart ? this.processLine(line) : [{ kind: 'text', text: line }];
+  }
+
+  private processLine(line: string): AgentStreamPart[] {
+    // A frame is terminated by a blank line, which is not part of the summary
+    if (this.afterFrame && !line.trim()) {
+      this.afterFrame = false;
+      return [];
+    }
+
+    const frame = parseFrame(line);
+    this.afterFrame = frame !== null;
+    return [frame ?? { kind: 'text', text: line }];
+  }
+}
+
+/** Text shown in place of the summary for an event that ends the stream early */
+export function describeFailure(event: AgentEvent): string {
+  if (event.type === 'transcript_unavailable') return TRANSCRIPT_UNAVAILABLE_MESSAGE;
+  return `The summary could not be completed: ${event.error || 'unknown error'}`;
+}
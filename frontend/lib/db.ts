@@ -1,5 +1,12 @@
 import { DynamoDBClient } from '@aws-sdk/client-dynamodb';
-import { DynamoDBDocumentClient, GetCommand, PutCommand, QueryCommand, DeleteCommand } from '@aws-sdk/lib-dynamodb';
+import {
+  DynamoDBDocumentClient,
+  GetCommand,
+  PutCommand,
+  QueryCommand,
+  DeleteCommand,
+  TransactWriteCommand,
+} from '@aws-sdk/lib-dynamodb';
 
 const client = new DynamoDBClient({
   region: process.env.AWS_REGION || 'us-east-1',
@@ -157,28 +164,131 @@ export interface Subscription {
   createdAt: string;
 }
 
+// Partition holding one CHANNEL#<channelId> item per subscribed channel. The channel poller reads this
+// instead of scanning every subscription, so it must be kept in step with subscribe/unsubscribe.
+export const CHANNEL_REGISTRY_PK = 'CHANNEL_REGISTRY';
+
+function isConditionalCheckFailure(error: unknown): boolean {
+  // eslint-disable-next-line @typescript-eslint/no-explicit-any
+  const reasons = (error as any)?.CancellationReasons as { Code?: string }[] | undefined;
+  return (
+    (error as Error)?.name === 'TransactionCanceledException' &&
+    !!reasons?.some((r) => r.Code === 'ConditionalCheckFailed')
+  );
+}
+
 export async function saveSubscription(sub: Subscription): Promise<void> {
-  const command = new PutCommand({
-    TableName: TABLE_NAME,
-    Item: {
-      ...sub,
-      targetId: `SUBSCRIPTION#${sub.channelId}`,
-    },
+  const item = {
+    ...sub,
+    targetId: `SUBSCRIPTION#${sub.channelId}`,
+  };
+
+  // Create the subscription and bump the channel's subscriber count atomically
+  const command = new TransactWriteCommand({
+    TransactItems: [
+      {
+        Put: {
+          TableName: TABLE_NAME,
+          Item: item,
+          ConditionExpression: 'attribute_not_exists(targetId)',
+        },
+      },
+      {
+        Update: {
+          TableName: TABLE_NAME,
+          Key: {
+            userId: CHANNEL_REGISTRY_PK,
+            targetId: `CHANNEL#${sub.channelId}`,
+          },
+          UpdateExpression: 'ADD subscriberCount :one SET channelId = :cid, channelTitle = :title, updatedAt = :now',
+          ExpressionAttributeValues: {
+            ':one': 1,
+            ':cid': sub.channelId,
+            ':title': sub.channelTitle || '',
+            ':now': new Date().toISOString(),
+          },
+        },
+      },
+    ],
   });
 
-  await docClient.send(command);
+  try {
+    await docClient.send(command);
+  } catch (error) {
+    if (!isConditionalCheckFailure(error)) throw error;
+
+    // Already subscribed, refresh the subscription details without counting it twice
+    await docClient.send(
+      new PutCommand({
+        TableName: TABLE_NAME,
+        Item: item,
+      }),
+    );
+  }
 }
 
 export async function deleteSubscription(userId: string, channelId: string): Promise<void> {
-  const command = new DeleteCommand({
-    TableName: TABLE_NAME,
-    Key: {
-      userId,
-      targetId: `SUBSCRIPTION#${channelId}`,
-    },
+  // Remove the subscription and decrement the channel's subscriber count atomically.
+  // Channels whose count reaches zero are skipped by the poller.
+  const command = new TransactWriteCommand({
+    TransactItems: [
+      {
+        Delete: {
+          TableName: TABLE_NAME,
+          Key: {
+            userId,
+            targetId: `SUBSCRIPTION#${channelId}`,
+          },
+          ConditionExpression: 'attribute_exists(targetId)',
+        },
+      },
+      {
+        Update: {
+          TableName: TABLE_NAME,
+          Key: {
+            userId: CHANNEL_REGISTRY_PK,
+            targetId: `CHANNEL#${channelId}`,
+          },
+          UpdateExpression: 'ADD subscriberCount :minusOne SET updatedAt = :now',
+          // Channels subscribed to before the registry existed have no item yet; decrementing one
+          // would create a count of -1. The poller's registry backfill counts them instead.
+          ConditionExpression: 'attribute_exists(targetId)',
+          ExpressionAttributeValues: {
+            ':minusOne': -1,
+            ':now': new Date().toISOString(),
+          },
+        },
+      },
+    ],
   });
 
-  await docClient.send(command);
+  try {
+    await docClient.send(command);
+  } catch (error) {
+    if (!isConditionalCheckFailure(error)) throw error;
+
+    // eslint-disable-next-line @typescript-eslint/no-explicit-any
+    const reasons = ((error as any).CancellationReasons || []) as { Code?: string }[];
+
+    // Not subscribed, nothing to delete
+    if (reasons[0]?.Code === 'ConditionalCheckFailed') return;
+
+    // No registry item for the channel: remove the subscription on its own
+    try {
+      await docClient.send(
+        new DeleteCommand({
+          TableName: TABLE_NAME,
+          Key: {
+            userId,
+            targetId: `SUBSCRIPTION#${channelId}`,
+          },
+          ConditionExpression: 'attribute_exists(targetId)',
+        }),
+      );
+    } catch (deleteError) {
+      if ((deleteError as Error)?.name !== 'ConditionalCheckFailedException') throw deleteError;
+    }
+  }
 }
 
 export async function listSubscriptions(userId: string): Promise<Subscription[]> {
@@ -7,6 +7,9 @@ from aws_cdk import (
     aws_lambda as _lambda,
     aws_events as events,
     aws_events_targets as targets,
+    aws_lambda_event_sources as event_sources,
+    aws_sqs as sqs,
+    aws_ses as ses,
     Duration
 )
 from aws_cdk.aws_ecr_assets import Platform
@@ -22,6 +25,26 @@ class AppStack(Stack):
         APP_NAME = app_name
         ENV_NAME = env_name
 
+        # Model used by the agent, also part of the summary cache key shared with the poller
+        MODEL_ID = "us.amazon.nova-2-lite-v1:0"
+
+        # The SES rate limiter is per container, so the account's send rate is split across every
+        # container that can send at once: up to SUMMARY_CONSUMER_CONCURRENCY consumers, which send the
+        # summaries, plus the poller and WebSub callback, which only send failure notices in queue mode
+        SES_ACCOUNT_SEND_RATE = float(os.environ.get("SES_ACCOUNT_SEND_RATE", "14"))
+        SUMMARY_CONSUMER_CONCURRENCY = 6
+        SES_FAILURE_SEND_RATE = 1
+        SES_CONSUMER_SEND_RATE = (SES_ACCOUNT_SEND_RATE - 2 * SES_FAILURE_SEND_RATE) / SUMMARY_CONSUMER_CONCURRENCY
+
+        # Retry settings shared by every function that retries a video or job, so inline and queue mode back off alike
+        MAX_RETRIES = 8
+        retry_environment = {
+            "MAX_RETRIES": str(MAX_RETRIES),
+            "RETRY_BASE_DELAY_SECONDS": "300",
+            "RETRY_MAX_DELAY_SECONDS": "3600",
+            "RETRY_MAX_AGE_SECONDS": "172800"
+        }
+
         #
         # Amazon Bedrock AgentCore
         #
@@ -47,12 +70,103 @@ class AppStack(Stack):
             runtime_name=f"{APP_NAME}_agent_{ENV_NAME}".replace("-", "_"),
             execution_role=role,
             agent_runtime_artifact=agent_runtime_artifact,
+            environment_variables={
+                "MODEL_ID": MODEL_ID,
+                "SUMMARY_CACHE_TABLE": data_stack.resources.table.table_name,
+                "TRANSCRIPT_CACHE_TABLE": data_stack.resources.table.table_name
+            }
+        )
+
+        # Summary and transcript caches
+        data_stack.resources.table.grant_read_write_data(role)
+
+        #
+        # Amazon SQS
+        #
+
+        # Summarization jobs (one per video and prompt group) produced by the poller
+        summary_dlq = sqs.Queue(self, "SummaryJobsDLQ",
+            queue_name=f"{APP_NAME}-summary-jobs-dlq-{ENV_NAME}",
+            retention_period=Duration.days(14)
+        )
+
+        summary_queue = sqs.Queue(self, "SummaryJobsQueue",
+            queue_name=f"{APP_NAME}-summary-jobs-{ENV_NAME}",
+            # Must exceed the consumer timeout. Failed jobs are hidden for their backoff delay instead
+            # (see main.delay_job_retry), so this only applies when the consumer dies mid-job.
+            visibility_timeout=Duration.seconds(960),
+            # Past MAX_RETRIES the consumer gives up on the job itself; the DLQ only catches poison messages
+            dead_letter_queue=sqs.DeadLetterQueue(max_receive_count=MAX_RETRIES + 3, queue=summary_dlq)
+        )
+
+        #
+        # Amazon SES
+        #
+
+        # Rendered once per (video, prompt group) and sent with SendBulkTemplatedEmail.
+        # Handlebars escapes {{...}} as HTML, so the subject and text parts use {{{...}}} to keep titles verbatim
+        summary_template = ses.CfnTemplate(self, "SummaryEmailTemplate",
+            template=ses.CfnTemplate.TemplateProperty(
+                template_name=f"{APP_NAME}-summary-{ENV_NAME}",
+                subject_part="New Video Summary: {{{title}}}",
+                html_part=(
+                    '<h1>New Video: <a href="{{videoUrl}}">{{title}}</a></h1>'
+                    "{{{summaryHtml}}}"
+                    "<p><small>Sent by Briefly AI Poller</small></p>"
+                ),
+                text_part="{{{summary}}}"
+            )
+        )
+
+        failure_template = ses.CfnTemplate(self, "FailureEmailTemplate",
+            template=ses.CfnTemplate.TemplateProperty(
+                template_name=f"{APP_NAME}-video-failed-{ENV_NAME}",
+                subject_part="Unable to Process Video: {{{videoTitle}}}",
+                html_part=(
+                    "<h1>Video Processing Failed</h1>"
+                    "<p>We detected a new video from a channel you are subscribed to, but we were unable to generate a summary for it after multiple attempts.</p>"
+                    '<p><strong>Video:</strong> <a href="{{videoUrl}}">{{videoTitle}}</a></p>'
+                    "<p>This usually happens when transcripts are not available for the video yet. We will skip this video and resume normal processing for the next upload.</p>"
+                    "<p><small>Sent by Briefly AI</small></p>"
+                ),
+                text_part="Unable to process video: {{{videoTitle}}}. {{{videoUrl}}}"
+            )
         )
 
         #
         # AWS Lambda
         #
         
+        # WebSub callback: the hub verifies subscriptions and pushes new uploads to its function URL
+        websub_fn = _lambda.Function(self, "WebSubCallback",
+            function_name=f"{APP_NAME}-websub-callback-{ENV_NAME}",
+            runtime=_lambda.Runtime.PYTHON_3_12,
+            handler="main.websub_handler",
+            code=_lambda.Code.from_asset("../backend/lambda/channel_poller"),
+            timeout=Duration.seconds(300), # 5 minutes
+            environment={
+                "TABLE_NAME": data_stack.resources.table.table_name,
+                "SES_SOURCE_EMAIL": os.environ.get("SES_SOURCE_EMAIL"),
+                "AGENT_RUNTIME_ARN": runtime.agent_runtime_arn,
+                "SUMMARY_MODEL_ID": MODEL_ID,
+                "SUMMARY_QUEUE_URL": summary_queue.queue_url,
+                "SES_SUMMARY_TEMPLATE": summary_template.ref,
+                "SES_FAILURE_TEMPLATE": failure_template.ref,
+                "SES_MAX_SEND_RATE": str(SES_FAILURE_SEND_RATE),
+                **retry_environment,
+                "WEBSUB_SECRET": os.environ.get("WEBSUB_SECRET"),
+                "POWERTOOLS_SERVICE_NAME": "WebSubCallback",
+                "LOG_LEVEL": "INFO"
+            },
+            layers=[
+                _lambda.LayerVersion.from_layer_version_arn(self, "WebSubPowertoolsLayer", 
+                    "arn:aws:lambda:us-east-1:017000801446:layer:AWSLambdaPowertoolsPythonV2:60"
+                )
+            ]
+        )
+
+        websub_url = websub_fn.add_function_url(auth_type=_lambda.FunctionUrlAuthType.NONE)
+
         poller_fn = _lambda.Function(self, "ChannelPoller",
             function_name=f"{APP_NAME}-channel-poller-{ENV_NAME}",
             runtime=_lambda.Runtime.PYTHON_3_12,
@@ -63,6 +177,15 @@ class AppStack(Stack):
                 "TABLE_NAME": data_stack.resources.table.table_name,
                 "SES_SOURCE_EMAIL": os.environ.get("SES_SOURCE_EMAIL"),
                 "AGENT_RUNTIME_ARN": runtime.agent_runtime_arn,
+                "SUMMARY_MODEL_ID": MODEL_ID,
+                "POLLER_CONCURRENCY": "8",
+                "SUMMARY_QUEUE_URL": summary_queue.queue_url,
+                "SES_SUMMARY_TEMPLATE": summary_template.ref,
+                "SES_FAILURE_TEMPLATE": failure_template.ref,
+                "SES_MAX_SEND_RATE": str(SES_FAILURE_SEND_RATE),
+                **retry_environment,
+                "WEBSUB_CALLBACK_URL": websub_url.url,
+                "WEBSUB_SECRET": os.environ.get("WEBSUB_SECRET"),
                 "POWERTOOLS_SERVICE_NAME": "ChannelPoller",
                 "LOG_LEVEL": "INFO"
             },
@@ -72,26 +195,65 @@ class AppStack(Stack):
                 )
             ]
         )
-        
-        # Grant permissions to Poller
-        data_stack.resources.table.grant_read_write_data(poller_fn)
-        
-        poller_fn.add_to_role_policy(PolicyStatement(
-            actions=["bedrock-agentcore:InvokeAgentRuntime"],
-            resources=[runtime.agent_runtime_arn, f"{runtime.agent_runtime_arn}/*"]
-        ))
-        
-        poller_fn.add_to_role_policy(PolicyStatement(
-            actions=["ses:SendEmail"],
-            resources=["*"]
+
+        consumer_fn = _lambda.Function(self, "SummaryConsumer",
+            function_name=f"{APP_NAME}-summary-consumer-{ENV_NAME}",
+            runtime=_lambda.Runtime.PYTHON_3_12,
+            handler="main.consume_handler",
+            code=_lambda.Code.from_asset("../backend/lambda/channel_poller"),
+            timeout=Duration.seconds(900), # 15 minutes
+            environment={
+                "TABLE_NAME": data_stack.resources.table.table_name,
+                "SES_SOURCE_EMAIL": os.environ.get("SES_SOURCE_EMAIL"),
+                "AGENT_RUNTIME_ARN": runtime.agent_runtime_arn,
+                "SUMMARY_MODEL_ID": MODEL_ID,
+                "SUMMARY_QUEUE_URL": summary_queue.queue_url,
+                "SES_SUMMARY_TEMPLATE": summary_template.ref,
+                "SES_FAILURE_TEMPLATE": failure_template.ref,
+                "SES_MAX_SEND_RATE": str(SES_CONSUMER_SEND_RATE),
+                **retry_environment,
+                "POWERTOOLS_SERVICE_NAME": "SummaryConsumer",
+                "LOG_LEVEL": "INFO"
+            },
+            layers=[
+                _lambda.LayerVersion.from_layer_version_arn(self, "ConsumerPowertoolsLayer", 
+                    "arn:aws:lambda:us-east-1:017000801446:layer:AWSLambdaPowertoolsPythonV2:60"
+                )
+            ]
+        )
+
+        # One job per invocation so throughput scales with the number of consumers, bounded so their
+        # combined SES send rate stays within the account quota
+        consumer_fn.add_event_source(event_sources.SqsEventSource(summary_queue,
+            batch_size=1,
+            max_concurrency=SUMMARY_CONSUMER_CONCURRENCY,
+            report_batch_item_failures=True
         ))
+
+        # Grant permissions to Poller and Consumer
+        summary_queue.grant_send_messages(poller_fn)
+        summary_queue.grant_send_messages(websub_fn)
+
+        for fn in [poller_fn, consumer_fn, websub_fn]:
+            data_stack.resources.table.grant_read_write_data(fn)
+
+            fn.add_to_role_policy(PolicyStatement(
+                actions=["bedrock-agentcore:InvokeAgentRuntime"],
+                resources=[runtime.agent_runtime_arn, f"{runtime.agent_runtime_arn}/*"]
+            ))
+
+            fn.add_to_role_policy(PolicyStatement(
+                actions=["ses:SendEmail", "ses:SendBulkTemplatedEmail"],
+                resources=["*"]
+            ))
         
         #
         # Amazon EventBridge 
         #
 
+        # Polls often; channels waiting on a retry are skipped until their nextAttemptAt
         rule = events.Rule(self, "ChannelPollerRule",
-            schedule=events.Schedule.rate(Duration.minutes(15))
+            schedule=events.Schedule.rate(Duration.minutes(5))
         )
         rule.add_target(targets.LambdaFunction(poller_fn))
 
@@ -120,6 +282,11 @@ class AppStack(Stack):
         # Outputs
         #
 
+        CfnOutput(self, "WebSubCallbackUrlOutput",
+            value=websub_url.url,
+            description="WebSub callback URL the poller subscribes YouTube channel feeds with"
+        )
+
         CfnOutput(self, "VercelUserOutput",
             value=vercel_user.user_name,
             description="The IAM User Name for Vercel. Create Access Keys for this user in AWS Console."
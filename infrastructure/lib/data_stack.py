@@ -86,6 +86,8 @@ class DataStack(Stack):
                 type=dynamodb.AttributeType.STRING
             ),
             billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            # Transient items (job trackers, caches) carry an epoch-seconds expiry
+            time_to_live_attribute="expiresAt",
             removal_policy=RemovalPolicy.DESTROY,
         )
 